@@ -31,7 +31,10 @@ target_metadata = Base.metadata
 
 
 def get_url():
-    return str(settings.SQLALCHEMY_DATABASE_URI)
+    # Set by scripts/migrate.py when migrating another database.
+    return config.get_main_option("sqlalchemy.url") or str(
+        settings.SQLALCHEMY_DATABASE_URI
+    )
 
 
 def run_migrations_offline() -> None:
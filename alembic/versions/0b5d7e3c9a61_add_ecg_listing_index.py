@@ -0,0 +1,29 @@
+"""add ecg listing index
+
+Revision ID: 0b5d7e3c9a61
+Revises: f2a6c81d30b7
+Create Date: 2024-11-25 16:08:12.774203
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0b5d7e3c9a61"
+down_revision: str | None = "f2a6c81d30b7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_ecg_user_id_date_id", "ecg", ["user_id", "date", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ecg_user_id_date_id", table_name="ecg")
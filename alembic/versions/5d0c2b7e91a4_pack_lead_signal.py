@@ -0,0 +1,76 @@
+"""pack lead signal
+
+Revision ID: 5d0c2b7e91a4
+Revises: 9580043f720b
+Create Date: 2024-11-18 10:12:41.208113
+
+"""
+
+from typing import Sequence
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d0c2b7e91a4"
+down_revision: str | None = "9580043f720b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 500
+
+
+def _pack(signal: list[int]) -> bytes:
+    # Frozen copy of app.db.types.pack_signal so the migration does not change
+    # meaning if the application format evolves.
+    samples = np.asarray(signal, dtype=np.int64)
+    itemsize = 2
+    if samples.size and (samples.min() < -(2**15) or samples.max() >= 2**15):
+        itemsize = 4
+    return bytes((itemsize,)) + samples.astype(f"<i{itemsize}").tobytes()
+
+
+def _unpack(data: bytes) -> list[int]:
+    return np.frombuffer(data, dtype=f"<i{data[0]}", offset=1).tolist()
+
+
+def _convert(select_sql: str, update_sql: str, convert) -> None:
+    """Rewrite rows in batches so large tables are never loaded at once."""
+    bind = op.get_bind()
+    select_stmt = sa.text(select_sql).bindparams(limit=BATCH_SIZE)
+    update_stmt = sa.text(update_sql)
+    while True:
+        rows = bind.execute(select_stmt).all()
+        if not rows:
+            break
+        bind.execute(
+            update_stmt, [{"id": row.id, "value": convert(row.value)} for row in rows]
+        )
+
+
+def upgrade() -> None:
+    op.add_column("lead", sa.Column("signal_packed", sa.LargeBinary(), nullable=True))
+    _convert(
+        "SELECT id, signal AS value FROM lead WHERE signal_packed IS NULL LIMIT :limit",
+        "UPDATE lead SET signal_packed = :value WHERE id = :id",
+        _pack,
+    )
+    op.drop_column("lead", "signal")
+    op.alter_column("lead", "signal_packed", new_column_name="signal", nullable=False)
+
+
+def downgrade() -> None:
+    op.add_column(
+        "lead",
+        sa.Column("signal_array", postgresql.ARRAY(sa.Integer()), nullable=True),
+    )
+    _convert(
+        "SELECT id, signal AS value FROM lead WHERE signal_array IS NULL LIMIT :limit",
+        "UPDATE lead SET signal_array = :value WHERE id = :id",
+        _unpack,
+    )
+    op.drop_column("lead", "signal")
+    op.alter_column("lead", "signal_array", new_column_name="signal", nullable=False)
@@ -0,0 +1,38 @@
+"""add foreign key indexes
+
+Revision ID: 6c2f94e1b8d3
+Revises: 0b5d7e3c9a61
+Create Date: 2024-11-26 10:31:47.160935
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6c2f94e1b8d3"
+down_revision: str | None = "0b5d7e3c9a61"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # ecg.user_id is the leading column of ix_ecg_user_id_date_id already.
+    op.create_index(op.f("ix_lead_ecg_id"), "lead", ["ecg_id"], unique=False)
+    # Re-running an analysis used to add a second row for the same lead. The
+    # results are identical, so keep any one of them.
+    op.execute(
+        "DELETE FROM ecg_analysis a USING ecg_analysis b "
+        "WHERE a.lead_id = b.lead_id AND a.ctid < b.ctid"
+    )
+    op.create_index(
+        op.f("ix_ecg_analysis_lead_id"), "ecg_analysis", ["lead_id"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_ecg_analysis_lead_id"), table_name="ecg_analysis")
+    op.drop_index(op.f("ix_lead_ecg_id"), table_name="lead")
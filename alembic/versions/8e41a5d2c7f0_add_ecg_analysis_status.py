@@ -0,0 +1,50 @@
+"""add ecg analysis status
+
+Revision ID: 8e41a5d2c7f0
+Revises: 6c2f94e1b8d3
+Create Date: 2024-11-27 15:44:09.218376
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e41a5d2c7f0"
+down_revision: str | None = "6c2f94e1b8d3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+analysisstatus = postgresql.ENUM(
+    "QUEUED", "STARTED", "SUCCEEDED", "FAILED", name="analysisstatus"
+)
+
+
+def upgrade() -> None:
+    # Existing ECGs keep a NULL status and are looked up in the result backend.
+    analysisstatus.create(op.get_bind(), checkfirst=True)
+    op.add_column("ecg", sa.Column("analysis_status", analysisstatus, nullable=True))
+    op.add_column(
+        "ecg",
+        sa.Column("analysis_queued_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "ecg",
+        sa.Column("analysis_started_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "ecg",
+        sa.Column("analysis_finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("ecg", "analysis_finished_at")
+    op.drop_column("ecg", "analysis_started_at")
+    op.drop_column("ecg", "analysis_queued_at")
+    op.drop_column("ecg", "analysis_status")
+    analysisstatus.drop(op.get_bind(), checkfirst=True)
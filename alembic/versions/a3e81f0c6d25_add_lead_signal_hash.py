@@ -0,0 +1,32 @@
+"""add lead signal hash
+
+Revision ID: a3e81f0c6d25
+Revises: 5d0c2b7e91a4
+Create Date: 2024-11-20 09:47:03.511842
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3e81f0c6d25"
+down_revision: str | None = "5d0c2b7e91a4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Existing leads keep a NULL hash and are simply analysed as before.
+    op.add_column(
+        "lead", sa.Column("signal_hash", sa.LargeBinary(length=16), nullable=True)
+    )
+    op.create_index(op.f("ix_lead_signal_hash"), "lead", ["signal_hash"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_lead_signal_hash"), table_name="lead")
+    op.drop_column("lead", "signal_hash")
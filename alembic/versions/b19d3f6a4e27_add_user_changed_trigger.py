@@ -0,0 +1,44 @@
+"""add user changed trigger
+
+Revision ID: b19d3f6a4e27
+Revises: 8e41a5d2c7f0
+Create Date: 2024-11-28 12:05:51.839420
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b19d3f6a4e27"
+down_revision: str | None = "8e41a5d2c7f0"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The channel must match USER_EVENTS_CHANNEL.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_user_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'user_changed',
+                json_build_object('email', OLD.email)::text
+            );
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        'CREATE TRIGGER user_changed AFTER UPDATE OR DELETE ON "user" '
+        "FOR EACH ROW EXECUTE FUNCTION notify_user_changed()"
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER user_changed ON "user"')
+    op.execute("DROP FUNCTION notify_user_changed()")
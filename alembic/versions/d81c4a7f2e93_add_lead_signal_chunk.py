@@ -0,0 +1,36 @@
+"""add lead signal chunk
+
+Revision ID: d81c4a7f2e93
+Revises: b19d3f6a4e27
+Create Date: 2024-11-29 10:14:42.518306
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d81c4a7f2e93"
+down_revision: str | None = "b19d3f6a4e27"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lead_signal_chunk",
+        sa.Column("lead_id", sa.UUID(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["lead_id"], ["lead.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("lead_id", "seq"),
+    )
+    # Chunks are read once and deleted, compressing them would be wasted work.
+    op.execute("ALTER TABLE lead_signal_chunk ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.drop_table("lead_signal_chunk")
@@ -0,0 +1,29 @@
+"""store lead signal uncompressed
+
+Revision ID: e4b9d27a15c8
+Revises: a3e81f0c6d25
+Create Date: 2024-11-21 14:02:36.904177
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b9d27a15c8"
+down_revision: str | None = "a3e81f0c6d25"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # EXTERNAL keeps large values out of line but uncompressed, so substring()
+    # on the packed signal only fetches the TOAST chunks it needs. Only rows
+    # written from now on are affected; f7a2c9e4b3d1 rewrites older ones.
+    op.execute("ALTER TABLE lead ALTER COLUMN signal SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE lead ALTER COLUMN signal SET STORAGE EXTENDED")
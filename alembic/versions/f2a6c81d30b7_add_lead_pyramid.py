@@ -0,0 +1,37 @@
+"""add lead pyramid
+
+Revision ID: f2a6c81d30b7
+Revises: e4b9d27a15c8
+Create Date: 2024-11-22 11:26:58.370415
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a6c81d30b7"
+down_revision: str | None = "e4b9d27a15c8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Leads analysed before this revision have no levels and are decimated
+    # from the raw signal until they are analysed again.
+    op.create_table(
+        "lead_pyramid",
+        sa.Column("lead_id", sa.UUID(), nullable=False),
+        sa.Column("factor", sa.Integer(), nullable=False),
+        sa.Column("mins", sa.LargeBinary(), nullable=False),
+        sa.Column("maxs", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["lead_id"], ["lead.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("lead_id", "factor"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("lead_pyramid")
@@ -0,0 +1,48 @@
+"""rewrite compressed lead signals
+
+Revision ID: f7a2c9e4b3d1
+Revises: d81c4a7f2e93
+Create Date: 2024-12-02 09:41:17.206583
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f7a2c9e4b3d1"
+down_revision: str | None = "d81c4a7f2e93"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    # SET STORAGE EXTERNAL (e4b9d27a15c8) only applies to values written after
+    # it; signals stored before are still compressed and are read whole by
+    # every window query. Concatenating an empty string makes Postgres store a
+    # new, uncompressed value. Each batch commits on its own, so the rewrite
+    # holds few locks at a time and resumes where it stopped if interrupted.
+    update_stmt = sa.text(
+        """
+        UPDATE lead SET signal = signal || ''::bytea
+        WHERE id IN (
+            SELECT id FROM lead
+            WHERE pg_column_compression(signal) IS NOT NULL
+            LIMIT :limit
+        )
+        """
+    ).bindparams(limit=BATCH_SIZE)
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while bind.execute(update_stmt).rowcount:
+            pass
+
+
+def downgrade() -> None:
+    # Uncompressed values are valid under either storage setting.
+    pass
@@ -0,0 +1,47 @@
+import hashlib
+from typing import Sequence
+
+import numpy as np
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+# Bump whenever count_zero_crossings starts returning different results for
+# the same samples, so hashes computed by the old version stop matching.
+ANALYSIS_VERSION = 1
+
+SIGNAL_HASH_SIZE = 16
+
+# Samples are hashed as little-endian int32 whatever width they are stored
+# at, so a recording hashes the same however it was uploaded.
+SIGNAL_HASH_DTYPE = np.dtype("<i4")
+
+
+def new_signal_hasher() -> "hashlib._Hash":
+    """Return a BLAKE2b hasher keyed to the current analysis version.
+
+    Feed it the samples with :func:`update_signal_hasher` to get the content
+    hash stored in ``lead.signal_hash``.
+    """
+    return hashlib.blake2b(
+        digest_size=SIGNAL_HASH_SIZE,
+        person=f"ecg-zc-v{ANALYSIS_VERSION}-i4".encode(),
+    )
+
+
+def update_signal_hasher(
+    hasher: "hashlib._Hash", samples: Sequence[int] | np.ndarray
+) -> None:
+    hasher.update(np.ascontiguousarray(samples, dtype=SIGNAL_HASH_DTYPE))
+
+
+def signal_hash(samples: Sequence[int] | np.ndarray) -> bytes:
+    """Content hash of a signal."""
+    hasher = new_signal_hasher()
+    update_signal_hasher(hasher, samples)
+    return hasher.digest()
+
+
+# Zero crossing counts keyed by signal hash, shared by every analysis run in
+# this process. Misses fall back to the indexed lookup in the database.
+analysis_results: LRUCache[bytes, int] = LRUCache(settings.ANALYSIS_CACHE_SIZE)
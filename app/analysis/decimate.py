@@ -0,0 +1,54 @@
+import numpy as np
+
+
+def bucket_size_for(count: int, max_points: int) -> int:
+    """Smallest bucket size that fits ``count`` samples into ``max_points``.
+
+    Every bucket is rendered as a min/max pair, so decimated ranges use at most
+    ``max_points // 2`` buckets. Ranges that already fit are not decimated.
+    """
+    if count <= max_points:
+        return 1
+    buckets = max(max_points // 2, 1)
+    return -(-count // buckets)
+
+
+def minmax_reduce(
+    mins: np.ndarray, maxs: np.ndarray, bucket_size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Reduce min/max envelopes over consecutive buckets of ``bucket_size``.
+
+    Raw samples are passed as both ``mins`` and ``maxs``. The last bucket may
+    be partial.
+    """
+    if bucket_size <= 1 or mins.size == 0:
+        return mins, maxs
+    starts = np.arange(0, mins.size, bucket_size)
+    return np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
+
+
+def interleave(mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    """Flatten envelopes into ``[min0, max0, min1, max1, ...]``."""
+    points = np.empty(mins.size * 2, dtype=np.result_type(mins, maxs))
+    points[0::2] = mins
+    points[1::2] = maxs
+    return points
+
+
+def build_pyramid(
+    samples: np.ndarray, base: int, min_buckets: int
+) -> list[tuple[int, np.ndarray, np.ndarray]]:
+    """Build min/max levels of ``samples`` at factors ``base``, ``base**2``, ...
+
+    Each level is reduced from the previous one, so building the whole
+    pyramid costs about one pass over the samples. Levels stop once they
+    have no more than ``min_buckets`` buckets, below which reading the finer
+    level is cheap anyway.
+    """
+    levels = []
+    factor, mins, maxs = 1, samples, samples
+    while mins.size > min_buckets:
+        mins, maxs = minmax_reduce(mins, maxs, base)
+        factor *= base
+        levels.append((factor, mins, maxs))
+    return levels
@@ -0,0 +1,85 @@
+"""Zero-crossing counting fanned out to a process pool.
+
+All leads are copied once into a single shared-memory block and every pool
+task receives only the block name and a ``[start, stop)`` sample range, so
+signals are never pickled. Long leads are split into segments that overlap
+by one sample, which lets a single Holter lead use every core while keeping
+the counts identical to :func:`app.analysis.zero_crossings.count_zero_crossings`.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, Sequence
+
+import numpy as np
+
+
+def plan_segments(
+    lengths: Sequence[int], segment_samples: int
+) -> Iterator[tuple[int, int, int]]:
+    """Yield ``(lead index, start, stop)`` ranges over the concatenated leads.
+
+    Consecutive segments of a lead share one sample so that every pair of
+    adjacent samples is compared exactly once.
+    """
+    offset = 0
+    for index, length in enumerate(lengths):
+        for start in range(0, length - 1, segment_samples):
+            stop = min(start + segment_samples + 1, length)
+            yield index, offset + start, offset + stop
+        offset += length
+
+
+def _count_segment(shm_name: str, dtype: str, start: int, stop: int) -> int:
+    shm = SharedMemory(name=shm_name)
+    try:
+        segment = np.ndarray(
+            (stop - start,),
+            dtype=dtype,
+            buffer=shm.buf,
+            offset=start * np.dtype(dtype).itemsize,
+        )
+        negative = segment < 0
+        del segment
+        return int(np.count_nonzero(negative[1:] != negative[:-1]))
+    finally:
+        shm.close()
+
+
+async def count_zero_crossings_parallel(
+    signals: Sequence[Sequence[int] | np.ndarray],
+    executor: Executor,
+    segment_samples: int,
+) -> np.ndarray:
+    """Count zero crossings per lead using ``executor`` for the CPU work."""
+    arrays = [np.asarray(signal).ravel() for signal in signals]
+    lengths = [array.size for array in arrays]
+    crossings = np.zeros(len(arrays), dtype=np.int64)
+    total = sum(lengths)
+    if total == 0:
+        return crossings
+
+    dtype = np.result_type(*arrays)
+    shm = SharedMemory(create=True, size=total * dtype.itemsize)
+    try:
+        shared = np.ndarray((total,), dtype=dtype, buffer=shm.buf)
+        np.concatenate(arrays, out=shared)
+        del shared
+
+        loop = asyncio.get_running_loop()
+        segments = list(plan_segments(lengths, segment_samples))
+        counts = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, _count_segment, shm.name, dtype.str, start, stop
+                )
+                for _, start, stop in segments
+            )
+        )
+        for (index, _, _), count in zip(segments, counts):
+            crossings[index] += count
+    finally:
+        shm.close()
+        shm.unlink()
+    return crossings
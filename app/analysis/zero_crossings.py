@@ -0,0 +1,35 @@
+from typing import Sequence
+
+import numpy as np
+
+
+def count_zero_crossings(signals: Sequence[Sequence[int] | np.ndarray]) -> np.ndarray:
+    """Count zero crossings for every lead of an ECG in one vectorized pass.
+
+    A crossing is counted whenever two consecutive samples fall on different
+    sides of the ``>= 0`` / ``< 0`` split. Leads of equal length are stacked
+    into a 2-D array; ragged leads are concatenated and counted per segment.
+    """
+    arrays = [np.asarray(signal).ravel() for signal in signals]
+    if not arrays:
+        return np.zeros(0, dtype=np.int64)
+    if len({array.size for array in arrays}) == 1:
+        negative = np.stack(arrays) < 0
+        return np.count_nonzero(negative[:, 1:] != negative[:, :-1], axis=1)
+    return _count_ragged(arrays)
+
+
+def _count_ragged(arrays: list[np.ndarray]) -> np.ndarray:
+    lengths = np.array([array.size for array in arrays], dtype=np.int64)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    total = int(ends[-1])
+
+    negative = np.concatenate(arrays) < 0
+    # changes_before[i] is the number of sign changes between samples 0..i, so
+    # a lead spanning [start, end) has changes_before[end - 1] - changes_before[start]
+    # crossings and comparisons across lead boundaries are never counted.
+    changes_before = np.zeros(total + 1, dtype=np.int64)
+    np.cumsum(negative[1:] != negative[:-1], out=changes_before[1:total])
+    changes_before[total] = changes_before[total - 1] if total else 0
+    return changes_before[np.maximum(ends - 1, starts)] - changes_before[starts]
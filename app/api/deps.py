@@ -1,27 +1,99 @@
+import math
 from datetime import datetime
 from typing import Annotated, Any
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, OAuth2PasswordBearer
-from jose import ExpiredSignatureError, JWTError, jwt
+from jose.exceptions import ExpiredSignatureError, JWTError
 from pydantic import ValidationError
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.notifications import NotificationHub, ecg_events, user_events
+from app.core.rate_limit import TokenBucket
 from app.core.security import security, verify_token
-from app.models.user import User
+from app.db.session import AsyncSessionLocal
 from app.schemas.token import TokenPayload
-from app.schemas.user import UserOut
+from app.schemas.user import UserInDB, UserOut
+from app.services.ecg import ECGService
 from app.services.user import UserService
 
 reuseable_oauth = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login", scheme_name="JWT"
 )
 
+# Authenticated users by token subject (email).
+user_cache: TTLCache[str, UserInDB] = TTLCache(
+    settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS
+)
+# Bumped by every invalidation. A user read from the database before one may
+# predate the change it announces, so it is not cached.
+user_cache_generation = 0
+
+
+def invalidate_cached_users(email: str | None = None) -> None:
+    """Drop the cached user ``email``, or every cached user."""
+    global user_cache_generation
+    user_cache_generation += 1
+    if email is None:
+        user_cache.clear()
+    else:
+        user_cache.pop(email)
+
+
+user_events.add_callback(lambda event: invalidate_cached_users(str(event.get("email"))))
+# Changes missed while the listener was down could concern any cached user.
+user_events.add_reconnect_callback(invalidate_cached_users)
+
+
+async def _current_ecg_statuses(ecg_ids: list[str]) -> list[dict[str, Any]]:
+    async with AsyncSessionLocal() as session:
+        events = await ECGService(session).get_status_events(
+            [UUID(ecg_id) for ecg_id in ecg_ids]
+        )
+    return [event.model_dump(mode="json") for event in events]
+
+
+ecg_events.set_resync(_current_ecg_statuses)
+
+login_limiter = TokenBucket(settings.LOGIN_RATE_LIMIT, settings.LOGIN_RATE_LIMIT_BURST)
+
+
+async def admit_login() -> None:
+    """Reject logins beyond the configured per-process rate."""
+    if not login_limiter.acquire():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(login_limiter.retry_after()))},
+        )
+
+
+async def get_user_cache() -> TTLCache[str, UserInDB] | None:
+    """Return the user cache, or None while it cannot be kept up to date.
+
+    Entries are dropped whenever the user table trigger announces a change, so
+    the cache is only used while this process is listening for those. Changes
+    missed while the listener was down are handled by starting over empty
+    once it is back. Connecting is left to the hub in the background, so
+    requests never wait for it. Behind PgBouncer without DB_LISTEN_URI users
+    are never cached.
+    """
+    if settings.USER_CACHE_SIZE <= 0 or not user_events.available:
+        return None
+    if not user_events.listening:
+        user_events.listen_in_background()
+        return None
+    return user_cache
+
+
 async def get_common_user(
     token: Annotated[Any, Depends(reuseable_oauth)],
     user_service: Annotated[UserService, Depends()],
+    cache: Annotated[TTLCache | None, Depends(get_user_cache)],
 ) -> UserOut:
-    user = await _get_token_user(token, settings.SECRET_KEY, user_service)
+    user = await _get_token_user(token, settings.SECRET_KEY, user_service, cache)
     if user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -31,8 +103,11 @@ async def get_common_user(
 
 
 async def _get_token_user(
-    token: str, key: str, user_service: Annotated[UserService, Depends()]
-) -> User:
+    token: str,
+    key: str,
+    user_service: Annotated[UserService, Depends()],
+    cache: TTLCache[str, UserInDB] | None = None,
+) -> UserInDB:
     try:
         payload = verify_token(token, key)
         token_data = TokenPayload(**payload)
@@ -48,34 +123,53 @@ async def _get_token_user(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = await user_service.get_by_email(token_data.sub)
+    user = cache.get(token_data.sub) if cache is not None else None
+    if user is not None:
+        return user
+
+    generation = user_cache_generation
+    db_user = await user_service.get_by_email(token_data.sub)
 
-    if user is None:
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Could not find user",
         )
 
+    user = UserInDB.model_validate(db_user)
+    if cache is not None and generation == user_cache_generation:
+        cache.set(token_data.sub, user)
     return user
 
 
 async def get_refresh_user(
     authorization: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     user_service: Annotated[UserService, Depends()],
+    cache: Annotated[TTLCache | None, Depends(get_user_cache)],
 ) -> UserOut:
     return await _get_token_user(
-        authorization.credentials, settings.RERFRESH_SECRET_KEY, user_service
+        authorization.credentials, settings.RERFRESH_SECRET_KEY, user_service, cache
     )
 
 
 async def get_current_admin(
     token: Annotated[Any, Depends(reuseable_oauth)],
     user_service: Annotated[UserService, Depends()],
+    cache: Annotated[TTLCache | None, Depends(get_user_cache)],
 ) -> UserOut:
-    user = await _get_token_user(token, settings.SECRET_KEY, user_service)
+    user = await _get_token_user(token, settings.SECRET_KEY, user_service, cache)
     if not user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
     return user
+
+
+def get_ecg_events() -> NotificationHub:
+    if not ecg_events.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis events are unavailable",
+        )
+    return ecg_events
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import CONTENT_TYPE_LATEST, render_latest
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """
+    Prometheus metrics of this process, or of every process sharing its
+    multiprocess directory. Reading them blocks, so this runs on a thread.
+    """
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
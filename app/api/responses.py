@@ -0,0 +1,131 @@
+"""Responses for payloads carrying lead signals.
+
+Signals loaded from the database are already validated, so endpoints that
+return them build plain dicts holding the NumPy arrays and wrap them in
+:class:`SignalJSONResponse` instead of going through their response model.
+orjson writes the arrays straight from their buffers.
+
+Clients preferring ``application/vnd.ecg-frames`` in ``Accept`` get the leads
+as binary frames (see :mod:`app.core.signal_stream`) instead, with the ECG
+metadata in ``ECG-Id``, ``ECG-Date`` and ``ECG-Task-Id`` headers.
+"""
+
+from datetime import date
+from enum import Enum
+from typing import Any, Sequence
+from uuid import UUID
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+from app.core.signal_stream import FRAMES_MEDIA_TYPE, encode_frames
+from app.models.ecg import ECG
+from app.models.lead import Lead
+from app.schemas.ecg import CeleryTaskStatus
+
+
+def _default(obj: Any) -> Any:
+    # orjson only handles exact types itself: asyncpg returns a UUID subclass,
+    # and arrays must be contiguous and native-endian.
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content``, writing NumPy arrays as JSON arrays of numbers."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class SignalJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def lead_content(lead: Lead) -> dict[str, Any]:
+    """A :class:`app.schemas.lead.LeadOut` payload without copying the signal."""
+    analysis = lead.analysis
+    return {
+        "name": lead.name,
+        "signal": lead.signal,
+        "sample_number": lead.sample_number,
+        "id": lead.id,
+        "analysis": (
+            None if analysis is None else {"result": analysis.result, "id": analysis.id}
+        ),
+    }
+
+
+def ecg_leads_content(ecg: ECG) -> dict[str, Any]:
+    """A :class:`app.schemas.ecg.ECGOutLeads` payload."""
+    return {
+        "date": ecg.date,
+        "id": ecg.id,
+        "leads": [lead_content(lead) for lead in ecg.leads],
+    }
+
+
+def ecg_task_content(ecg: ECG, task: CeleryTaskStatus | None) -> dict[str, Any]:
+    """A :class:`app.schemas.ecg.ECGTaskOut` payload."""
+    return {
+        "ecg": ecg_leads_content(ecg),
+        "task": None if task is None else task.model_dump(mode="json"),
+    }
+
+
+def ecg_frames_response(ecg: ECG) -> Response:
+    headers = {"ECG-Id": str(ecg.id), "ECG-Date": ecg.date.isoformat()}
+    if ecg.task_id is not None:
+        headers["ECG-Task-Id"] = str(ecg.task_id)
+    body = encode_frames(
+        (lead.name, lead.signal, lead.sample_number) for lead in ecg.leads
+    )
+    return Response(body, media_type=FRAMES_MEDIA_TYPE, headers=headers)
+
+
+def _accept_quality(accept: str, media_type: str) -> float:
+    """Return the quality the most specific matching ``Accept`` range gives."""
+    main_type = media_type.split("/")[0]
+    best, quality = -1, 0.0
+    for media_range in accept.split(","):
+        name, *params = (part.strip() for part in media_range.split(";"))
+        name = name.lower()
+        if name == media_type:
+            specificity = 2
+        elif name == f"{main_type}/*":
+            specificity = 1
+        elif name == "*/*":
+            specificity = 0
+        else:
+            continue
+        if specificity <= best:
+            continue
+        best, quality = specificity, 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+    return quality
+
+
+def preferred_media_type(accept: str | None, offers: Sequence[str]) -> str:
+    """Pick the offer ranked highest by ``Accept``.
+
+    Ties, a missing header and headers matching nothing all go to the first
+    offer, so clients that never asked for a format keep getting the default.
+    """
+    if not accept:
+        return offers[0]
+    qualities = [_accept_quality(accept, offer) for offer in offers]
+    best = max(qualities)
+    return offers[qualities.index(best)] if best > 0 else offers[0]
@@ -4,7 +4,7 @@ from typing import Annotated, Any
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.api.deps import get_refresh_user, get_current_admin
+from app.api.deps import admit_login, get_refresh_user, get_current_admin
 from app.core.security import create_access_token, create_refresh_token
 from app.schemas.token import Token, TokenAccess
 from app.schemas.user import UserCreate, UserOut
@@ -13,7 +13,9 @@ from app.services.user import UserService
 router = APIRouter()
 
 
-@router.post("/login", response_model=Token)
+@router.post(
+    "/login", response_model=Token, dependencies=[Depends(admit_login)]
+)
 async def login(
     data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_service: Annotated[UserService, Depends()],
@@ -1,42 +1,409 @@
-from typing import Annotated
+import asyncio
+import json
+from datetime import date
+from typing import Annotated, AsyncIterator, TypeVar
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 
 from app.api import deps
-from app.celery.worker import analyze_ecg_task
+from app.api.responses import (
+    SignalJSONResponse,
+    ecg_frames_response,
+    ecg_leads_content,
+    ecg_task_content,
+    preferred_media_type,
+)
+from app.celery.dispatch import analyze_ecg_task, analyze_ecgs_task
+from app.core.config import settings
+from app.core.notifications import NotificationHub, Subscription
+from app.core.pagination import (
+    InvalidCursorError,
+    decode_date_id_cursor,
+    encode_date_id_cursor,
+)
+from app.core.signal_stream import (
+    FRAMES_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    SignalStreamError,
+    decode_frames,
+    decode_signal_stream,
+    get_stream_decoder,
+)
+from app.models.ecg import AnalysisStatus
+from app.models.lead import LeadName
 from app.models.user import User
-from app.schemas.ecg import ECGCreate, ECGOutLeads, ECGTaskOut
-from app.services.ecg import ECGService
+from app.schemas.ecg import (
+    CeleryTaskStatus,
+    ECGBatchCreate,
+    ECGBatchOut,
+    ECGCreate,
+    ECGCreated,
+    ECGOutAnalysis,
+    ECGOutLeads,
+    ECGPage,
+    ECGStatusEvent,
+    ECGTaskOut,
+)
+from app.schemas.lead import LeadCreate, LeadSamplesOut
+from app.services.ecg import ECGLoad, ECGService
 
 router = APIRouter()
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
-@router.post("", response_model=ECGOutLeads)
+JSON_MEDIA_TYPE = "application/json"
+
+CREATE_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        JSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/ECGCreate"}},
+        FRAMES_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    },
+}
+
+STREAM_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+        FRAMES_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    },
+}
+
+
+@router.get("", response_model=ECGPage)
+async def list_ecgs(
+    current_user: Annotated[User, Depends(deps.get_common_user)],
+    ecg_service: Annotated[ECGService, Depends()],
+    cursor: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: Annotated[
+        int, Query(ge=1, le=settings.ECG_PAGE_MAX_SIZE)
+    ] = settings.ECG_PAGE_DEFAULT_SIZE,
+) -> ECGPage:
+    """
+    List ECGs newest first, without leads. Pass next_cursor to get the next page.
+    """
+    try:
+        after = decode_date_id_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    ecgs = await ecg_service.list_for_user(
+        current_user.id, limit + 1, after, date_from, date_to
+    )
+    next_cursor = None
+    if len(ecgs) > limit:
+        ecgs = ecgs[:limit]
+        next_cursor = encode_date_id_cursor(ecgs[-1].date, ecgs[-1].id)
+    return ECGPage(items=ecgs, next_cursor=next_cursor)
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_ecg_events(
+    ids: Annotated[
+        list[UUID], Query(min_length=1, max_length=settings.ECG_EVENTS_MAX_IDS)
+    ],
+    current_user: Annotated[User, Depends(deps.get_common_user)],
+    ecg_service: Annotated[ECGService, Depends()],
+    events: Annotated[NotificationHub, Depends(deps.get_ecg_events)],
+) -> StreamingResponse:
+    """
+    Stream analysis status changes of the given ECGs as Server-Sent Events.
+
+    The current status of every ECG is sent first. The stream ends once all of
+    them have finished, successfully or not.
+    """
+    ecg_ids = set(ids)
+    subscription = await events.subscribe([str(ecg_id) for ecg_id in ecg_ids])
+    try:
+        ecgs = await ecg_service.get_many(list(ecg_ids), current_user.id)
+        if len(ecgs) != len(ecg_ids):
+            raise HTTPException(status_code=404, detail="ECG not found")
+    except BaseException:
+        subscription.close()
+        raise
+    current = [
+        ECGStatusEvent(
+            ecg_id=ecg.id,
+            status=(ecg.analysis_status or AnalysisStatus.QUEUED).value,
+        )
+        for ecg in ecgs
+    ]
+    return StreamingResponse(
+        _ecg_status_events(subscription, current),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _ecg_status_events(
+    subscription: Subscription, current: list[ECGStatusEvent]
+) -> AsyncIterator[str]:
+    final_statuses = {AnalysisStatus.SUCCEEDED.value, AnalysisStatus.FAILED.value}
+    pending = {event.ecg_id for event in current}
+    try:
+        for event in current:
+            yield f"event: status\ndata: {event.model_dump_json()}\n\n"
+            if event.status in final_statuses:
+                pending.discard(event.ecg_id)
+        while pending:
+            try:
+                payload = await asyncio.wait_for(
+                    subscription.get(), settings.ECG_EVENTS_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            event = ECGStatusEvent.model_validate(payload)
+            yield f"event: status\ndata: {event.model_dump_json()}\n\n"
+            if event.status in final_statuses:
+                pending.discard(event.ecg_id)
+    finally:
+        subscription.close()
+
+
+@router.post(
+    "",
+    response_model=ECGOutLeads,
+    response_class=SignalJSONResponse,
+    responses={200: {"content": {FRAMES_MEDIA_TYPE: {}}}},
+    openapi_extra={"requestBody": CREATE_REQUEST_BODY},
+)
 async def create_ecg(
+    request: Request,
+    current_user: Annotated[User, Depends(deps.get_common_user)],
+    ecg_service: Annotated[ECGService, Depends()],
+    ecg_date: Annotated[
+        date | None, Query(alias="date", description="Required for binary frames")
+    ] = None,
+) -> Response:
+    """
+    Create new ECG from JSON or, with the date in the query, binary frames.
+
+    The created ECG is returned as JSON or, if preferred by Accept, as frames.
+    """
+    body = await request.body()
+    if _media_type(request.headers.get("content-type")) == FRAMES_MEDIA_TYPE:
+        ecg_in = _decode_frames_upload(body, ecg_date)
+    else:
+        ecg_in = _validate_json_body(ECGCreate, body)
+    ecg = await ecg_service.create(current_user.id, ecg_in)
+    analyze_ecg_task(ecg.id, current_user.id, ecg.task_id)
+    if _prefers_frames(request):
+        return ecg_frames_response(ecg)
+    # Signals were validated on the way in, skip the response model.
+    return SignalJSONResponse(ecg_leads_content(ecg))
+
+
+def _media_type(content_type: str | None) -> str:
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def _prefers_frames(request: Request) -> bool:
+    offers = [JSON_MEDIA_TYPE, FRAMES_MEDIA_TYPE]
+    accept = request.headers.get("accept")
+    return preferred_media_type(accept, offers) == FRAMES_MEDIA_TYPE
+
+
+def _validate_json_body(model: type[ModelT], body: bytes) -> ModelT:
+    """Validate a JSON body, reporting errors like FastAPI does for body models."""
+    if not body:
+        raise RequestValidationError(
+            [{"type": "missing", "loc": ("body",), "msg": "Field required"}]
+        )
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "json_invalid",
+                    "loc": ("body", e.pos),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": e.msg},
+                }
+            ],
+            body=e.doc,
+        )
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        errors = [
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ]
+        raise RequestValidationError(errors, body=data)
+
+
+def _decode_frames_upload(body: bytes, ecg_date: date | None) -> ECGCreate:
+    if ecg_date is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="The date query parameter is required for binary frames",
+        )
+    try:
+        chunks = decode_frames(body)
+    except SignalStreamError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    if not chunks:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="The upload did not contain any leads",
+        )
+    # The frame decoder already checked lead names and sample types, so the
+    # samples are passed on as arrays instead of being validated one by one.
+    return ECGCreate.model_construct(
+        date=ecg_date,
+        leads=[
+            LeadCreate.model_construct(
+                name=chunk.name,
+                signal=chunk.samples,
+                sample_number=chunk.sample_number,
+            )
+            for chunk in chunks
+        ],
+    )
+
+
+@router.post("/batch", response_model=ECGBatchOut)
+async def create_ecg_batch(
     *,
-    ecg: ECGCreate,
+    batch: ECGBatchCreate,
     current_user: Annotated[User, Depends(deps.get_common_user)],
     ecg_service: Annotated[ECGService, Depends()],
-) -> ECGOutLeads:
-    """Create new ECG."""
-    ecg = await ecg_service.create(current_user.id, ecg)
-    task = analyze_ecg_task(ecg.id,current_user.id)
-    ecg = await ecg_service.update_task_id(ecg.id, task.id, current_user.id)
+) -> ECGBatchOut:
+    """
+    Create several ECGs in one transaction and queue their analysis as a group.
+    """
+    ecgs = await ecg_service.create_many(current_user.id, batch.ecgs)
+    analyze_ecgs_task(ecgs, current_user.id)
+    return ECGBatchOut(items=ecgs)
+
+
+@router.post(
+    "/stream",
+    response_model=ECGCreated,
+    openapi_extra={"requestBody": STREAM_REQUEST_BODY},
+)
+async def create_ecg_stream(
+    request: Request,
+    ecg_date: Annotated[date, Query(alias="date")],
+    current_user: Annotated[User, Depends(deps.get_common_user)],
+    ecg_service: Annotated[ECGService, Depends()],
+) -> ECGCreated:
+    """
+    Create new ECG from a streamed NDJSON or binary frame upload.
+    """
+    decoder = get_stream_decoder(
+        request.headers.get("content-type"), settings.ECG_STREAM_MAX_LINE_BYTES
+    )
+    if decoder is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected {NDJSON_MEDIA_TYPE} or {FRAMES_MEDIA_TYPE}",
+        )
+    chunks = decode_signal_stream(request.stream(), decoder)
+    try:
+        ecg = await ecg_service.create_from_stream(current_user.id, ecg_date, chunks)
+    except SignalStreamError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    analyze_ecg_task(ecg.id, current_user.id, ecg.task_id)
     return ecg
 
 
-@router.get("/{ecg_id}", response_model=ECGTaskOut)
+@router.get(
+    "/{ecg_id}",
+    response_model=ECGTaskOut,
+    response_class=SignalJSONResponse,
+    responses={200: {"content": {FRAMES_MEDIA_TYPE: {}}}},
+)
 async def get_ecg(
+    request: Request,
+    ecg_id: UUID,
+    current_user: Annotated[User, Depends(deps.get_common_user)],
+    ecg_service: Annotated[ECGService, Depends()],
+) -> Response:
+    """
+    Get a specific ECG by ID, as JSON or, if preferred by Accept, as frames.
+    """
+    ecg = await ecg_service.get_by_id(ecg_id, current_user.id, ECGLoad.FULL)
+    if not ecg:
+        raise HTTPException(status_code=404, detail="ECG not found")
+    if _prefers_frames(request):
+        return ecg_frames_response(ecg)
+    task = await ecg_service.get_analysis_status(ecg) if ecg.task_id else None
+    # Signals come from the database, skip validating them sample by sample.
+    return SignalJSONResponse(ecg_task_content(ecg, task))
+
+
+@router.get("/{ecg_id}/analysis", response_model=ECGOutAnalysis)
+async def get_ecg_analysis(
     ecg_id: UUID,
     current_user: Annotated[User, Depends(deps.get_common_user)],
     ecg_service: Annotated[ECGService, Depends()],
-) -> ECGTaskOut:
+) -> ECGOutAnalysis:
     """
-    Get a specific ECG by ID.
+    Get the analysis results of every lead, without the signals.
     """
-    ecg = await ecg_service.get_by_id(ecg_id, current_user.id)
-    task = await ecg_service.get_analysis_status(ecg.task_id) if ecg.task_id else None
+    ecg = await ecg_service.get_by_id(ecg_id, current_user.id, ECGLoad.ANALYSIS)
     if not ecg:
         raise HTTPException(status_code=404, detail="ECG not found")
-    return ECGTaskOut(ecg=ecg, task=task)
+    return ecg
+
+
+@router.get("/{ecg_id}/status", response_model=CeleryTaskStatus)
+async def get_ecg_status(
+    ecg_id: UUID,
+    current_user: Annotated[User, Depends(deps.get_common_user)],
+    ecg_service: Annotated[ECGService, Depends()],
+) -> CeleryTaskStatus:
+    """
+    Get the status of the ECG analysis without reading any lead data.
+    """
+    ecg = await ecg_service.get_by_id(ecg_id, current_user.id, ECGLoad.METADATA)
+    if not ecg or not ecg.task_id:
+        raise HTTPException(status_code=404, detail="ECG not found")
+    return await ecg_service.get_analysis_status(ecg)
+
+
+@router.get("/{ecg_id}/leads/{lead_name}/samples", response_model=LeadSamplesOut)
+async def get_lead_samples(
+    ecg_id: UUID,
+    lead_name: LeadName,
+    current_user: Annotated[User, Depends(deps.get_common_user)],
+    ecg_service: Annotated[ECGService, Depends()],
+    start: Annotated[int, Query(ge=0)] = 0,
+    end: Annotated[int | None, Query(gt=0)] = None,
+    max_points: Annotated[
+        int, Query(ge=2, le=settings.ECG_SAMPLES_MAX_POINTS)
+    ] = settings.ECG_SAMPLES_DEFAULT_POINTS,
+) -> LeadSamplesOut:
+    """
+    Get samples [start, end) of one lead, min/max decimated to max_points.
+    """
+    if end is not None and end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="end must be greater than start",
+        )
+    samples = await ecg_service.get_lead_samples(
+        ecg_id, current_user.id, lead_name, start, end, max_points
+    )
+    if samples is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return samples
@@ -0,0 +1,35 @@
+"""Celery entry points for the API, importing Celery only on first use.
+
+Celery and the worker module account for a large share of the API import
+time. The API enqueues tasks and reads task states through these functions
+instead of importing :mod:`app.celery.worker`, which ``app.main`` loads in a
+background thread at startup so that neither startup nor the first request
+waits for it.
+"""
+
+import importlib
+from functools import cache
+from types import ModuleType
+from uuid import UUID
+
+from app.models.ecg import ECG
+
+
+@cache
+def load_worker() -> ModuleType:
+    return importlib.import_module("app.celery.worker")
+
+
+def analyze_ecg_task(ecg_id: UUID, user_id: UUID, task_id: UUID | None = None):
+    """Analyze ECG asynchronously."""
+    return load_worker().analyze_ecg_task(ecg_id, user_id, task_id)
+
+
+def analyze_ecgs_task(ecgs: list[ECG], user_id: UUID):
+    """Analyze a batch of ECGs with one grouped publish, reusing their task ids."""
+    return load_worker().analyze_ecgs_task(ecgs, user_id)
+
+
+def get_task_state(task_id: UUID) -> str:
+    """Ask the result backend for the state of a task. This call blocks."""
+    return load_worker().celery_app.AsyncResult(str(task_id)).status
@@ -0,0 +1,123 @@
+"""Long-lived asyncio runtime for Celery worker processes.
+
+Every worker process owns one event loop and one async engine for its whole
+life, so pooled database connections are reused between tasks instead of
+being opened (and broken) by a fresh ``asyncio.run`` loop per task. When
+``ANALYSIS_PROCESSES`` is set it also owns the process pool that large
+analyses are fanned out to. That pool is a billiard pool: prefork children
+are daemonic, and the standard library refuses to start processes from
+daemonic ones. The runtime is started on ``worker_process_init``
+in prefork children and lazily on first use for the solo pool, and torn down
+on ``worker_process_shutdown``.
+
+Tasks executed eagerly (``task_always_eager``) are called from inside the
+API's running event loop, which cannot run another loop on the same thread.
+The runtime's loop is then driven from a helper thread while the caller
+waits, so eager tasks block the API exactly like inline code would.
+"""
+
+import asyncio
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, TypeVar
+
+import billiard
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.session import create_db_engine, create_session_factory, warm_up_pool
+
+T = TypeVar("T")
+
+
+class AnalysisPool(Executor):
+    """``concurrent.futures`` interface to a billiard process pool."""
+
+    def __init__(self, processes: int):
+        # Spawned children do not inherit the loop or pooled sockets.
+        self._pool = billiard.get_context("spawn").Pool(processes)
+
+    def submit(self, fn: Callable[..., T], /, *args, **kwargs) -> "Future[T]":
+        future: Future[T] = Future()
+        future.set_running_or_notify_cancel()
+        self._pool.apply_async(
+            fn,
+            args,
+            kwargs,
+            callback=future.set_result,
+            # billiard reports failures as ExceptionInfo wrapping the error.
+            error_callback=lambda info: future.set_exception(info.exception),
+        )
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        if cancel_futures:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        if wait:
+            self._pool.join()
+
+
+class WorkerRuntime:
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.engine: AsyncEngine | None = None
+        self.session_factory: sessionmaker | None = None
+        self.executor: AnalysisPool | None = None
+        self._loop_thread: ThreadPoolExecutor | None = None
+
+    def start(self) -> None:
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.engine = create_db_engine()
+        self.session_factory = create_session_factory(self.engine)
+        # A worker runs one task at a time; one connection is all it needs.
+        self._run_until_complete(
+            warm_up_pool(self.engine, min(settings.DB_POOL_WARMUP, 1))
+        )
+        if settings.ANALYSIS_PROCESSES > 0:
+            self.executor = AnalysisPool(settings.ANALYSIS_PROCESSES)
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run ``coro`` to completion on the process-wide event loop."""
+        self.start()
+        return self._run_until_complete(coro)
+
+    def _run_until_complete(self, coro: Coroutine[Any, Any, T]) -> T:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self.loop.run_until_complete(coro)
+        if self._loop_thread is None:
+            self._loop_thread = ThreadPoolExecutor(1, "worker-runtime")
+        return self._loop_thread.submit(self.loop.run_until_complete, coro).result()
+
+    def stop(self) -> None:
+        if self.loop is None:
+            return
+        try:
+            self._run_until_complete(self.engine.dispose())
+        finally:
+            self.loop.close()
+            if self._loop_thread is not None:
+                self._loop_thread.shutdown()
+                self._loop_thread = None
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+            self.loop = self.engine = self.session_factory = self.executor = None
+
+
+runtime = WorkerRuntime()
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    runtime.start()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs) -> None:
+    runtime.stop()
@@ -1,30 +1,117 @@
-import asyncio
+import os
+import time
+from datetime import datetime, timezone
 from uuid import UUID
 
+from celery import group, states
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_shutdown,
+)
+
 from app.celery.celery_app import celery_app
-from app.db.session import AsyncSessionLocal
-from app.services.ecg import ECGService
+from app.celery.runtime import runtime
+from app.core import metrics
+from app.core.config import settings
+from app.models.ecg import ECG, AnalysisStatus
+from app.services.ecg import ECGLoad, ECGService
+
+# A retried task goes back to the queue until its countdown expires.
+POSTRUN_ANALYSIS_STATUSES = {
+    states.SUCCESS: AnalysisStatus.SUCCEEDED,
+    states.FAILURE: AnalysisStatus.FAILED,
+    states.RETRY: AnalysisStatus.QUEUED,
+}
 
 
-def analyze_ecg_task(ecg_id: UUID, user_id: UUID):
+def analyze_ecg_task(ecg_id: UUID, user_id: UUID, task_id: UUID | None = None):
     """Analyze ECG asynchronously."""
-    return analyze_ecg.delay(str(ecg_id), str(user_id))
+    return analyze_ecg.apply_async(
+        (str(ecg_id), str(user_id)), task_id=str(task_id) if task_id else None
+    )
+
+
+def analyze_ecgs_task(ecgs: list[ECG], user_id: UUID):
+    """Analyze a batch of ECGs with one grouped publish, reusing their task ids."""
+    return group(
+        analyze_ecg.signature((str(ecg.id), str(user_id)), task_id=str(ecg.task_id))
+        for ecg in ecgs
+    ).apply_async()
 
 @celery_app.task(bind=True, max_retries=5)
 def analyze_ecg(self, ecg_id: UUID, user_id: UUID):
     """Analyze ECG asynchronously."""
     try:
-        asyncio.run(_analyze_ecg_task(ecg_id, user_id))
+        runtime.run(_analyze_ecg_task(ecg_id, user_id))
     except Exception as e:
         self.retry(exc=e, countdown=600)
 
 
 async def _analyze_ecg_task(ecg_id: UUID, user_id: UUID):
-    async with AsyncSessionLocal() as session:
+    async with runtime.session_factory() as session:
         ecg_service = ECGService(session)
-        ecg = await ecg_service.get_by_id(ecg_id, user_id)
+        ecg = await ecg_service.get_by_id(ecg_id, user_id, ECGLoad.FULL)
         if not ecg:
             return {"status": "error", "message": "ECG not found"}
 
-        analysis_result = await ecg_service.analyze_ecg(ecg)
+        analysis_result = await ecg_service.analyze_ecg(ecg, runtime.executor)
         return {"status": "success", "ecg_id": str(ecg_id), "result": analysis_result}
+
+
+async def _set_analysis_status(ecg_id: UUID, status: AnalysisStatus):
+    async with runtime.session_factory() as session:
+        return await ECGService(session).set_analysis_status(ecg_id, status)
+
+
+# perf_counter() at the start of every task running in this process.
+_task_started: dict[str, float] = {}
+
+
+@task_prerun.connect
+def mark_analysis_started(sender=None, args=(), **kwargs):
+    """Record on the ECG row that its analysis started."""
+    if sender.name == analyze_ecg.name:
+        queued_at = runtime.run(_set_analysis_status(args[0], AnalysisStatus.STARTED))
+        if queued_at is not None:
+            # Includes earlier attempts, as retries keep the upload's queued_at.
+            metrics.TASK_QUEUE_WAIT.labels(sender.name).observe(
+                (datetime.now(timezone.utc) - queued_at).total_seconds()
+            )
+
+
+# Connected after mark_analysis_started and before mark_analysis_finished, so
+# the task duration leaves out the status updates.
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(sender=None, task_id=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.TASK_DURATION.labels(sender.name, state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+@task_postrun.connect
+def mark_analysis_finished(sender=None, args=(), state=None, **kwargs):
+    """Record on the ECG row how its analysis ended."""
+    if sender.name == analyze_ecg.name and state in POSTRUN_ANALYSIS_STATUSES:
+        runtime.run(_set_analysis_status(args[0], POSTRUN_ANALYSIS_STATUSES[state]))
+
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    """Start the metrics of this worker's processes from scratch and serve them."""
+    metrics.prepare_multiprocess_dir()
+    if metrics.enabled() and settings.WORKER_METRICS_PORT:
+        metrics.start_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def discard_process_metrics(**kwargs):
+    metrics.mark_process_dead(os.getpid())
@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded in-process mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key: K, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TTLCache(LRUCache[K, V]):
+    """LRU cache whose entries also expire ``ttl`` seconds after being set."""
+
+    def __init__(
+        self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self._timer = timer
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        item = super().get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= self._timer():
+            super().pop(key)
+            return default
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        super().set(key, (self._timer() + self.ttl, value))
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        item = super().pop(key)
+        return default if item is None else item[1]
@@ -0,0 +1,245 @@
+"""Transparent gzip and zstd compression of request and response bodies.
+
+Request bodies sent with ``Content-Encoding: gzip`` or ``zstd`` are
+decompressed as they are received, so streamed uploads stay streamed; a body
+growing past the decompressed size limit is rejected with 413, and a
+truncated body or data after the last gzip member or zstd frame with 400.
+Responses whose whole body is produced at once and is at least
+``minimum_size`` bytes are compressed with the best encoding offered in
+``Accept-Encoding``, preferring zstd. Streaming responses such as Server-Sent Events are passed
+through untouched. Bodies larger than ``thread_threshold`` are compressed on
+a worker thread so the event loop keeps serving other requests.
+"""
+
+import asyncio
+import gzip
+import zlib
+from typing import Awaitable, Callable
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# zstd decompression takes no output limit, so bodies are fed to it in slices.
+# An RLE block turns 4 bytes into 128 KiB, the most any input can expand, so
+# a slice of budget / ZSTD_MAX_RATIO bytes cannot overshoot the limit by more
+# than ZSTD_MIN_SLICE bytes' worth (2 MiB).
+ZSTD_MAX_RATIO = 128 * 1024 // 4
+ZSTD_MIN_SLICE = 64
+
+
+def supported_encodings() -> list[str]:
+    """Content codings this process can decode and encode, most preferred first."""
+    return ["zstd", "gzip"]
+
+
+def preferred_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the supported coding ranked highest by ``Accept-Encoding``."""
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    best, best_quality = None, 0.0
+    for coding in supported_encodings():
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class BodyDecompressor:
+    """Incrementally decompress a request body of at most ``max_size`` bytes."""
+
+    def __init__(self, encoding: str, max_size: int):
+        self.encoding = encoding
+        self.max_size = max_size
+        self.size = 0
+        self._decoder = self._new_decoder()
+
+    def _new_decoder(self):
+        if self.encoding == "gzip":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes, final: bool) -> bytes:
+        output = []
+        try:
+            # A body may be several gzip members or zstd frames back to back;
+            # whatever follows the end of one must be the start of the next.
+            while data:
+                if self._decoder.eof:
+                    self._decoder = self._new_decoder()
+                if self.encoding == "gzip":
+                    chunk, data = self._decompress_gzip(data)
+                else:
+                    chunk, data = self._decompress_zstd(data)
+                output.append(chunk)
+            if final and not self._decoder.eof:
+                raise EOFError("truncated stream")
+        except (zlib.error, zstandard.ZstdError, EOFError) as e:
+            raise HTTPException(400, f"Invalid {self.encoding} request body: {e}")
+        return b"".join(output)
+
+    def _decompress_gzip(self, data: bytes) -> tuple[bytes, bytes]:
+        # Never inflate more than one byte past the limit, however well the
+        # input compresses.
+        output = self._decoder.decompress(data, self.max_size - self.size + 1)
+        if self._decoder.unconsumed_tail:
+            self._too_large()
+        self._count(len(output))
+        return output, self._decoder.unused_data
+
+    def _decompress_zstd(self, data: bytes) -> tuple[bytes, bytes]:
+        output = []
+        view = memoryview(data)
+        while view and not self._decoder.eof:
+            size = max(ZSTD_MIN_SLICE, (self.max_size - self.size) // ZSTD_MAX_RATIO)
+            chunk = self._decoder.decompress(view[:size])
+            self._count(len(chunk))
+            output.append(chunk)
+            view = view[size:]
+        rest = self._decoder.unused_data + view if self._decoder.eof else b""
+        return b"".join(output), rest
+
+    def _count(self, size: int) -> None:
+        self.size += size
+        if self.size > self.max_size:
+            self._too_large()
+
+    def _too_large(self) -> None:
+        raise HTTPException(
+            413, f"Decompressed request body exceeds {self.max_size} bytes"
+        )
+
+
+def compress(body: bytes, encoding: str, level: int | None = None) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, 6 if level is None else level, mtime=0)
+    return zstandard.ZstdCompressor(3 if level is None else level).compress(body)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        thread_threshold: int = 256 * 1024,
+        max_request_size: int = 256 * 1024 * 1024,
+        gzip_level: int | None = None,
+        zstd_level: int | None = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_threshold = thread_threshold
+        self.max_request_size = max_request_size
+        self.levels = {"gzip": gzip_level, "zstd": zstd_level}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").lower()
+        if content_encoding != "identity":
+            if content_encoding not in supported_encodings():
+                response = JSONResponse(
+                    {"detail": f"Unsupported Content-Encoding {content_encoding}"},
+                    status_code=415,
+                )
+                await response(scope, receive, send)
+                return
+            scope, receive = self._decompressing(scope, receive, content_encoding)
+
+        encoding = preferred_encoding(headers.get("accept-encoding"))
+        if encoding is not None:
+            send = _CompressingSend(
+                send, encoding, lambda body: self._compress(body, encoding)
+            )
+        await self.app(scope, receive, send)
+
+    def _decompressing(
+        self, scope: Scope, receive: Receive, encoding: str
+    ) -> tuple[Scope, Receive]:
+        decompressor = BodyDecompressor(encoding, self.max_request_size)
+        stripped = {b"content-encoding", b"content-length"}
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"] if name not in stripped
+        ]
+
+        async def decompressing_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                final = not message.get("more_body", False)
+                body = decompressor.decompress(message.get("body", b""), final)
+                message = {**message, "body": body}
+            return message
+
+        return scope, decompressing_receive
+
+    async def _compress(self, body: bytes, encoding: str) -> bytes | None:
+        if len(body) < self.minimum_size:
+            return None
+        level = self.levels[encoding]
+        if len(body) >= self.thread_threshold:
+            return await asyncio.to_thread(compress, body, encoding, level)
+        return compress(body, encoding, level)
+
+
+class _CompressingSend:
+    """Compress the response if its whole body arrives in one message."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        compressor: Callable[[bytes], Awaitable[bytes | None]],
+    ):
+        self.send = send
+        self.encoding = encoding
+        self.compressor = compressor
+        self.start: Message | None = None
+        self.done = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if self.done or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        self.done = True
+        start = self.start
+        headers = MutableHeaders(raw=list(start["headers"]))
+        body = message.get("body", b"")
+        compressed = None
+        if (
+            not message.get("more_body", False)
+            and "content-encoding" not in headers
+            and not headers.get("content-type", "").startswith("text/event-stream")
+        ):
+            compressed = await self.compressor(body)
+        if compressed is None:
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        await self.send({**start, "headers": headers.raw})
+        await self.send({**message, "body": compressed})
@@ -47,8 +47,25 @@ class Settings(BaseSettings):
     RABBITMQ_USER: str = "guest"
     RABBITMQ_PASSWORD: str = "guest"
 
+    # Engine and pool settings. DB_POOL_WARMUP connections are opened at
+    # startup. DB_PGBOUNCER disables prepared statement caching and
+    # application-side pooling for PgBouncer in transaction pooling mode.
+    # LISTEN does not work through such a pooler, so notifications are then
+    # only received over DB_LISTEN_URI, a direct connection to Postgres;
+    # without it the user cache and the analysis event stream are disabled.
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER: bool = False
+
     SQLALCHEMY_DATABASE_URI: PostgresDsn | None = None
     TEST_SQLALCHEMY_DATABASE_URI: PostgresDsn | None = None
+    DB_LISTEN_URI: PostgresDsn | None = None
 
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     def assemble_db_connection(cls, v: str | None, values: dict[str, Any]) -> Any:
@@ -77,6 +94,72 @@ class Settings(BaseSettings):
             path=values.data.get("TEST_POSTGRES_DB") or "",
         )
 
+    # Authenticated users are cached per process for USER_CACHE_TTL_SECONDS;
+    # USER_CACHE_SIZE=0 disables the cache. Entries are invalidated through
+    # NOTIFY on USER_EVENTS_CHANNEL, which the user table trigger publishes on.
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_EVENTS_CHANNEL: str = "user_changed"
+
+    # Password hashes are computed on at most PASSWORD_HASH_WORKERS threads;
+    # 0 hashes inline on the event loop. LOGIN_RATE_LIMIT caps the logins a
+    # process accepts per second (0 disables the limit), with bursts of up to
+    # LOGIN_RATE_LIMIT_BURST.
+    PASSWORD_HASH_WORKERS: int = 2
+    LOGIN_RATE_LIMIT: float = 0.0
+    LOGIN_RATE_LIMIT_BURST: int = 20
+
+    # Responses of at least COMPRESSION_MINIMUM_SIZE bytes are compressed,
+    # on a worker thread from COMPRESSION_THREAD_THRESHOLD bytes on.
+    # Compressed request bodies may expand to REQUEST_MAX_DECOMPRESSED_BYTES.
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_THREAD_THRESHOLD: int = 256 * 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    REQUEST_MAX_DECOMPRESSED_BYTES: int = 256 * 1024 * 1024
+
+    # Batch upload settings
+    ECG_BATCH_MAX_SIZE: int = 1000
+
+    # Streaming upload settings
+    ECG_STREAM_BUFFER_SAMPLES: int = 262_144
+    ECG_STREAM_MAX_LINE_BYTES: int = 1_048_576
+
+    # ECG listing settings
+    ECG_PAGE_DEFAULT_SIZE: int = 50
+    ECG_PAGE_MAX_SIZE: int = 500
+
+    # Analysis status events, published with NOTIFY on ECG_EVENTS_CHANNEL and
+    # streamed to clients over SSE
+    ECG_EVENTS_CHANNEL: str = "ecg_analysis"
+    ECG_EVENTS_MAX_IDS: int = 100
+    ECG_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    # Delay between attempts to listen again after losing the connection
+    NOTIFICATIONS_RECONNECT_SECONDS: float = 1.0
+
+    # Lead sample window settings
+    ECG_SAMPLES_DEFAULT_POINTS: int = 2_000
+    ECG_SAMPLES_MAX_POINTS: int = 20_000
+    # The analysis writes min/max levels at factors ECG_PYRAMID_BASE ** k until
+    # a level has no more than ECG_PYRAMID_MIN_BUCKETS buckets.
+    ECG_PYRAMID_BASE: int = 4
+    ECG_PYRAMID_MIN_BUCKETS: int = 1024
+
+    # Analysis settings. ANALYSIS_PROCESSES=0 keeps the analysis inline in the
+    # worker; otherwise ECGs with at least ANALYSIS_PARALLEL_MIN_SAMPLES samples
+    # are split into ANALYSIS_SEGMENT_SAMPLES segments counted by a process pool.
+    ANALYSIS_PROCESSES: int = 0
+    ANALYSIS_PARALLEL_MIN_SAMPLES: int = 1_000_000
+    ANALYSIS_SEGMENT_SAMPLES: int = 2_000_000
+    # Number of zero crossing results kept in memory per process, keyed by the
+    # content hash of the lead signal.
+    ANALYSIS_CACHE_SIZE: int = 10_000
+
+    # Prometheus metrics, see app.core.metrics. WORKER_METRICS_PORT makes the
+    # Celery main process serve its workers' metrics; 0 disables it.
+    METRICS_ENABLED: bool = True
+    WORKER_METRICS_PORT: int = 0
+
     # Celery settings
     CELERY_BROKER_URL: str | None = None
     CELERY_RESULT_BACKEND: str | None = None
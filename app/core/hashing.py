@@ -0,0 +1,75 @@
+"""Password hashing off the event loop.
+
+Hashing and verifying a password costs milliseconds of CPU, which would
+stall every other request served by the same event loop. They run on a
+dedicated thread pool whose size caps how many hashes are computed at once;
+calls beyond that wait in the pool queue. The time they spend there, and
+the calls cancelled before leaving it, are recorded in :mod:`app.core.metrics`.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASHES_ABANDONED
+from app.core.security import get_password_hash, verify_password
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """Hash and verify passwords on at most ``max_workers`` threads.
+
+    ``max_workers=0`` hashes inline on the calling thread.
+    """
+
+    def __init__(
+        self, max_workers: int, timer: Callable[[], float] = time.perf_counter
+    ):
+        self.max_workers = max_workers
+        self._timer = timer
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, password, hashed_password)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self.max_workers <= 0:
+            return func(*args)
+
+        submitted_at = self._timer()
+        started = False
+
+        def call() -> T:
+            nonlocal started
+            started = True
+            PASSWORD_HASH_QUEUE_WAIT.observe(self._timer() - submitted_at)
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            if not started:
+                # Cancelled while still queued, the call never runs.
+                PASSWORD_HASHES_ABANDONED.inc()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS)
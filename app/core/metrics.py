@@ -0,0 +1,229 @@
+"""Prometheus metrics for the API and the Celery workers.
+
+The API records request latency per route, every process records database
+query time, workers record how long analyses waited in the queue and how
+long they ran, the ECG service records analysis time per lead and the
+size of uploaded signals, and password hashing records how long hashes
+waited for a thread. The API exposes them on ``/metrics``.
+
+With ``METRICS_ENABLED`` off, every metric below is a no-op and nothing is
+exposed.
+Processes started with ``PROMETHEUS_MULTIPROC_DIR`` set (prometheus_client's
+own variable) write their values to files in that directory instead of
+keeping them in memory. This is how the prefork children of a Celery worker,
+and several API worker processes, report through one endpoint. The directory
+must exist before the processes start. The Celery main process empties it
+on start and, when ``WORKER_METRICS_PORT`` is set, serves the children's
+aggregated metrics on that port.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Sequence
+
+import prometheus_client
+from prometheus_client import CONTENT_TYPE_LATEST, multiprocess
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+QUEUE_BUCKETS = (0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600)
+LEAD_ANALYSIS_BUCKETS = (1e-5, 1e-4, 5e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+SAMPLE_BUCKETS = (1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+BYTE_BUCKETS = tuple(2 * samples for samples in SAMPLE_BUCKETS)
+
+# Statement types the query histogram is labelled with; anything else is
+# recorded as OTHER to keep the number of series bounded.
+STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE", "COPY"}
+
+
+def enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def observe(self, amount: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+
+def _histogram(
+    name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]
+):
+    if not enabled():
+        return _NoopMetric()
+    return prometheus_client.Histogram(name, documentation, labels, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labels: Sequence[str]):
+    if not enabled():
+        return _NoopMetric()
+    return prometheus_client.Counter(name, documentation, labels)
+
+
+HTTP_REQUEST_DURATION = _histogram(
+    "http_request_duration_seconds",
+    "Time to the last byte of the response, per route template.",
+    ["method", "route", "status"],
+    DURATION_BUCKETS,
+)
+DB_QUERY_DURATION = _histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time.",
+    ["statement"],
+    QUERY_BUCKETS,
+)
+TASK_QUEUE_WAIT = _histogram(
+    "celery_task_queue_wait_seconds",
+    "Time from queueing an analysis to a worker starting it, retries included.",
+    ["task"],
+    QUEUE_BUCKETS,
+)
+TASK_DURATION = _histogram(
+    "celery_task_duration_seconds",
+    "Celery task execution time, per final state.",
+    ["task", "state"],
+    DURATION_BUCKETS,
+)
+PASSWORD_HASH_QUEUE_WAIT = _histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a password hash or verification waited for a hashing thread.",
+    [],
+    DURATION_BUCKETS,
+)
+PASSWORD_HASHES_ABANDONED = _counter(
+    "password_hashes_abandoned",
+    "Password hashes and verifications cancelled while waiting for a thread.",
+    [],
+)
+LEAD_ANALYSIS_DURATION = _histogram(
+    "ecg_lead_analysis_duration_seconds",
+    "Zero crossing time per analysed lead.",
+    ["mode"],
+    LEAD_ANALYSIS_BUCKETS,
+)
+ANALYZED_LEADS = _counter(
+    "ecg_analyzed_leads",
+    "Leads analysed, by whether the result was computed or found in a cache.",
+    ["source"],
+)
+LEAD_SAMPLES = _histogram(
+    "ecg_lead_samples", "Samples per uploaded lead.", [], SAMPLE_BUCKETS
+)
+LEAD_SIGNAL_BYTES = _histogram(
+    "ecg_lead_signal_bytes",
+    "Packed signal size per uploaded lead.",
+    [],
+    BYTE_BUCKETS,
+)
+
+
+def observe_lead_signal(samples: int, packed_bytes: int) -> None:
+    LEAD_SAMPLES.observe(samples)
+    LEAD_SIGNAL_BYTES.observe(packed_bytes)
+
+
+def statement_type(statement: str) -> str:
+    verb = statement.lstrip()[:6].upper()
+    return verb if verb in STATEMENT_TYPES else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement executed through ``engine``."""
+    if not enabled():
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def finish_query(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERY_DURATION.labels(statement_type(statement)).observe(
+            time.perf_counter() - context._query_started
+        )
+
+
+def prepare_multiprocess_dir() -> None:
+    """Remove the files of earlier processes from ``PROMETHEUS_MULTIPROC_DIR``.
+
+    Files of this process, created when its metrics were defined, are kept.
+    """
+    directory = os.environ.get(MULTIPROC_DIR_ENV)
+    if not directory:
+        return
+    path = Path(directory)
+    own = f"_{os.getpid()}.db"
+    for file in path.glob("*.db"):
+        if not file.name.endswith(own):
+            file.unlink()
+
+
+def mark_process_dead(pid: int) -> None:
+    if enabled() and os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
+
+
+def registry() -> "prometheus_client.CollectorRegistry":
+    """The registry holding this process's metrics, or every process's."""
+    if not os.environ.get(MULTIPROC_DIR_ENV):
+        return prometheus_client.REGISTRY
+    collected = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def render_latest() -> bytes:
+    return prometheus_client.generate_latest(registry())
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve the metrics of every process in the background on ``port``."""
+    prometheus_client.start_http_server(port, registry=registry())
+
+
+class MetricsMiddleware:
+    """Record the latency of every HTTP request.
+
+    Requests are labelled with the template of the route they matched, such
+    as ``/api/v1/ecg/{ecg_id}``, so the number of series does not grow with
+    the ids requested. Requests matching no route share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,216 @@
+"""Fan-out of Postgres ``LISTEN``/``NOTIFY`` events to in-process subscribers.
+
+Every API process keeps a single asyncpg connection listening on a channel,
+opened on the first subscription. Payloads are JSON objects; each one is
+routed to the subscribers of the value of its ``key`` field. A subscription
+keeps only the latest undelivered event of every key, so a slow consumer
+skips intermediate events but always receives the last one, and its backlog
+never outgrows the number of keys it watches.
+
+If the listening connection drops, for instance because the server restarted
+or the backend was terminated, the hub reconnects in the background, retrying
+every ``NOTIFICATIONS_RECONNECT_SECONDS``. Events published in between are
+lost, so once listening again it calls its reconnect callbacks and, with a
+``resync`` function, delivers the current state of every subscribed key to
+the subscriptions.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Returns the current events of the given keys.
+Resync = Callable[[list[str]], Awaitable[list[dict[str, Any]]]]
+
+
+class Subscription:
+    def __init__(self, hub: "NotificationHub", keys: set[str]):
+        self.keys = keys
+        # Undelivered events by key, in the order their keys first got one.
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self._hub = hub
+
+    def put(self, key: str, event: dict[str, Any]) -> None:
+        self._pending[key] = event
+        self._ready.set()
+
+    async def get(self) -> dict[str, Any]:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.pop(next(iter(self._pending)))
+
+    def empty(self) -> bool:
+        return not self._pending
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+
+class NotificationHub:
+    """Route the notifications of ``channel`` by their ``key`` field.
+
+    A hub without a ``dsn`` has nothing to listen on and cannot be started.
+    """
+
+    def __init__(self, dsn: str | None, channel: str, key: str):
+        self.dsn = dsn
+        self.channel = channel
+        self.key = key
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._callbacks: list[Callable[[dict[str, Any]], None]] = []
+        self._reconnect_callbacks: list[Callable[[], None]] = []
+        self._resync: Resync | None = None
+        self._connection: asyncpg.Connection | None = None
+        self._reconnecting: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, keys: list[str]) -> Subscription:
+        """Start listening if needed and register a subscription for ``keys``.
+
+        Events are only delivered from this point on, so callers should read
+        the current state after subscribing, not before.
+        """
+        await self.start()
+        subscription = Subscription(self, set(keys))
+        for key in subscription.keys:
+            self._subscriptions.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for key in subscription.keys:
+            subscribers = self._subscriptions.get(key)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[key]
+
+    def add_callback(self, callback: Callable[[dict[str, Any]], None]) -> None:
+        """Call ``callback`` with every event, whatever its key."""
+        self._callbacks.append(callback)
+
+    def add_reconnect_callback(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` whenever listening starts in the background, as it
+        does after a dropped connection."""
+        self._reconnect_callbacks.append(callback)
+
+    def set_resync(self, resync: Resync) -> None:
+        """Read the current events of subscribed keys with ``resync`` after
+        a dropped connection, and deliver them to the subscriptions."""
+        self._resync = resync
+
+    def publish(self, event: dict[str, Any]) -> None:
+        """Deliver ``event`` to the callbacks and the subscribers of its key."""
+        for callback in self._callbacks:
+            callback(event)
+        key = str(event.get(self.key))
+        for subscription in self._subscriptions.get(key, ()):
+            subscription.put(key, event)
+
+    @property
+    def available(self) -> bool:
+        return self.dsn is not None
+
+    @property
+    def listening(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.listening:
+                return
+            if self.dsn is None:
+                raise RuntimeError(f"No connection to listen on {self.channel}")
+            self._connection = await asyncpg.connect(self.dsn)
+            self._connection.add_termination_listener(self._on_termination)
+            await self._connection.add_listener(self.channel, self._on_notification)
+
+    async def stop(self) -> None:
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            self._reconnecting = None
+        async with self._lock:
+            if self._connection is not None:
+                self._connection.remove_termination_listener(self._on_termination)
+                await self._connection.close()
+                self._connection = None
+
+    def _on_notification(
+        self, connection, pid: int, channel: str, payload: str
+    ) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed %s notification: %r", channel, payload)
+            return
+        self.publish(event)
+
+    def listen_in_background(self) -> None:
+        """Start listening without waiting for it, retrying until it works."""
+        if self.listening or self._reconnecting is not None or not self.available:
+            return
+        self._reconnecting = asyncio.get_running_loop().create_task(self._reconnect())
+
+    def _on_termination(self, connection) -> None:
+        if connection is not self._connection:
+            return
+        logger.warning("Lost the %s listener connection, reconnecting", self.channel)
+        self._connection = None
+        self.listen_in_background()
+
+    async def _reconnect(self) -> None:
+        while True:
+            try:
+                await self.start()
+                break
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("Cannot listen on %s: %s", self.channel, e)
+                await asyncio.sleep(settings.NOTIFICATIONS_RECONNECT_SECONDS)
+        self._reconnecting = None
+        for callback in self._reconnect_callbacks:
+            callback()
+        if self._resync is not None and self._subscriptions:
+            try:
+                events = await self._resync(list(self._subscriptions))
+            except Exception:
+                logger.exception("Cannot resync %s subscriptions", self.channel)
+                return
+            for event in events:
+                self.publish(event)
+
+
+def asyncpg_dsn(url: Any) -> str:
+    """Turn an SQLAlchemy ``postgresql+asyncpg`` URL into a plain asyncpg DSN."""
+    return str(url).replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def listen_dsn() -> str | None:
+    """The DSN to LISTEN on, or None behind PgBouncer without DB_LISTEN_URI."""
+    if settings.DB_LISTEN_URI is not None:
+        return asyncpg_dsn(settings.DB_LISTEN_URI)
+    if settings.DB_PGBOUNCER:
+        return None
+    return asyncpg_dsn(settings.SQLALCHEMY_DATABASE_URI)
+
+
+ecg_events = NotificationHub(
+    listen_dsn(),
+    settings.ECG_EVENTS_CHANNEL,
+    key="ecg_id",
+)
+
+# Announced by a trigger on the user table, see app.models.user.
+user_events = NotificationHub(
+    listen_dsn(),
+    settings.USER_EVENTS_CHANNEL,
+    key="email",
+)
@@ -0,0 +1,27 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor is the URL-safe base64 of the sort key of the last item on a page,
+so the next page starts right after it without counting skipped rows.
+"""
+
+import base64
+from datetime import date
+from uuid import UUID
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_date_id_cursor(key_date: date, key_id: UUID) -> str:
+    raw = f"{key_date.isoformat()}|{key_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_date_id_cursor(cursor: str) -> tuple[date, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        key_date, key_id = raw.split("|")
+        return date.fromisoformat(key_date), UUID(key_id)
+    except ValueError as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
@@ -0,0 +1,36 @@
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Admit up to ``rate`` events per second with bursts of ``burst``.
+
+    A ``rate`` of zero or less admits everything.
+    """
+
+    def __init__(
+        self, rate: float, burst: int, timer: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._timer = timer
+        self._tokens = float(self.burst)
+        self._updated = timer()
+
+    def acquire(self) -> bool:
+        """Take a token if one is available."""
+        if self.rate <= 0:
+            return True
+        now = self._timer()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until the next token becomes available."""
+        if self.rate <= 0:
+            return 0.0
+        return max(0.0, (1 - self._tokens) / self.rate)
@@ -1,22 +1,32 @@
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
 from fastapi.security import HTTPBearer
-from jose import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# passlib and jose (with its cryptography backend) are imported on first use,
+# app.main preloads them in the background at startup.
 security = HTTPBearer(description="To refresh token")
 
 
+@cache
+def get_pwd_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def __create_token(
@@ -27,6 +37,8 @@ def __create_token(
     else:
         expires_delta = datetime.now(timezone.utc) + timedelta(minutes=minutes)
 
+    from jose import jwt
+
     to_encode = {"exp": expires_delta, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, key, settings.ALGORITHM)
     return encoded_jwt
@@ -51,4 +63,6 @@ def create_refresh_token(subject: str, expires_delta: int = None) -> str:
 
 
 def verify_token(token: str, key: str) -> dict[str, Any]:
+    from jose import jwt
+
     return jwt.decode(token, key, algorithms=[settings.ALGORITHM])
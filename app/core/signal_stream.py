@@ -0,0 +1,228 @@
+"""Incremental decoders for streamed ECG uploads.
+
+Two wire formats are accepted, both carrying per-lead chunks. Consecutive
+chunks of the same lead are appended to each other.
+
+``application/x-ndjson``: one JSON object per line::
+
+    {"name": "I", "signal": [1, -2, 3], "sample_number": 250, "dtype": "int16"}
+
+``dtype`` is ``int16`` or ``int32`` (the default) and must not change between
+chunks of a lead.
+
+``application/vnd.ecg-frames``: the ``ECGF`` magic followed by frames made of
+a 16-byte little-endian header and the samples::
+
+    offset  size  field
+    0       4     lead name, ASCII, NUL padded ("I", "aVR", "V6", ...)
+    4       1     item size in bytes: 2 (int16) or 4 (int32)
+    5       3     reserved, zero
+    8       4     sample_number, uint32, 0 when unset
+    12      4     sample count, uint32
+    16      ...   count * item size bytes of little-endian signed samples
+
+The frame format is also accepted by ``POST /ecg`` and produced by
+``GET /ecg/{id}`` when negotiated through ``Content-Type`` and ``Accept``.
+"""
+
+import json
+import struct
+from itertools import chain
+from typing import AsyncIterator, Iterable, Iterator, NamedTuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.db.types import SIGNAL_DTYPES
+from app.models.lead import LeadName
+from app.schemas.lead import LeadChunkIn
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+FRAMES_MEDIA_TYPE = "application/vnd.ecg-frames"
+
+FRAMES_MAGIC = b"ECGF"
+FRAME_HEADER = struct.Struct("<4sB3xII")
+
+SIGNAL_DTYPES_BY_NAME = {"int16": SIGNAL_DTYPES[2], "int32": SIGNAL_DTYPES[4]}
+
+
+class SignalStreamError(ValueError):
+    """Raised when a streamed upload is malformed."""
+
+
+class LeadChunk(NamedTuple):
+    name: LeadName
+    sample_number: int | None
+    itemsize: int
+    samples: np.ndarray
+
+
+def encode_frame(
+    name: LeadName, samples: np.ndarray, sample_number: int | None = None
+) -> bytes:
+    """Encode one lead as a binary frame."""
+    itemsize = 2 if samples.dtype.itemsize <= 2 else 4
+    header = FRAME_HEADER.pack(
+        name.value.encode("ascii"), itemsize, sample_number or 0, samples.size
+    )
+    return header + samples.astype(SIGNAL_DTYPES[itemsize], copy=False).tobytes()
+
+
+def encode_frames(leads: Iterable[tuple[LeadName, np.ndarray, int | None]]) -> bytes:
+    """Encode ``(name, samples, sample_number)`` leads as a whole frame stream."""
+    return FRAMES_MAGIC + b"".join(
+        encode_frame(name, samples, sample_number)
+        for name, samples, sample_number in leads
+    )
+
+
+def merge_lead_chunks(chunks: Iterable[LeadChunk]) -> list[LeadChunk]:
+    """Join the chunks of every lead, in the order the leads first appear."""
+    parts: dict[LeadName, list[LeadChunk]] = {}
+    for chunk in chunks:
+        lead_parts = parts.setdefault(chunk.name, [])
+        if lead_parts and lead_parts[0].itemsize != chunk.itemsize:
+            raise SignalStreamError(f"Lead {chunk.name} changed its sample type")
+        lead_parts.append(chunk)
+    return [
+        LeadChunk(
+            name,
+            lead_parts[0].sample_number,
+            lead_parts[0].itemsize,
+            np.concatenate([part.samples for part in lead_parts]),
+        )
+        for name, lead_parts in parts.items()
+    ]
+
+
+def decode_frames(data: bytes) -> list[LeadChunk]:
+    """Decode a complete frame stream into one chunk per lead."""
+    decoder = FrameDecoder()
+    return merge_lead_chunks(chain(decoder.feed(data), decoder.close()))
+
+
+class NDJSONDecoder:
+    def __init__(self, max_line_bytes: int):
+        self.max_line_bytes = max_line_bytes
+        self._pending = bytearray()
+
+    def feed(self, data: bytes) -> Iterator[LeadChunk]:
+        start, search_from = 0, len(self._pending)
+        self._pending += data
+        while (end := self._pending.find(b"\n", search_from)) != -1:
+            yield from self._parse_line(self._pending[start:end])
+            start = search_from = end + 1
+        del self._pending[:start]
+        if len(self._pending) > self.max_line_bytes:
+            raise SignalStreamError(
+                f"NDJSON lines must not exceed {self.max_line_bytes} bytes"
+            )
+
+    def close(self) -> Iterator[LeadChunk]:
+        yield from self._parse_line(self._pending)
+        self._pending.clear()
+
+    def _parse_line(self, line: bytes) -> Iterator[LeadChunk]:
+        if not line.strip():
+            return
+        try:
+            chunk = LeadChunkIn.model_validate(json.loads(line))
+        except (ValueError, ValidationError) as e:
+            raise SignalStreamError(f"Invalid NDJSON chunk: {e}") from e
+        dtype = SIGNAL_DTYPES_BY_NAME[chunk.dtype]
+        info = np.iinfo(dtype)
+        signal = chunk.signal
+        if signal and (min(signal) < info.min or max(signal) > info.max):
+            raise SignalStreamError(f"Samples do not fit into {chunk.dtype}")
+        samples = np.asarray(signal, dtype=dtype)
+        yield LeadChunk(chunk.name, chunk.sample_number, dtype.itemsize, samples)
+
+
+class FrameDecoder:
+    """Decode frames incrementally, yielding samples as soon as they arrive."""
+
+    def __init__(self):
+        self._pending = bytearray()
+        self._magic_seen = False
+        self._frame: tuple[LeadName, int | None, int] | None = None
+        self._remaining = 0
+
+    def feed(self, data: bytes) -> Iterator[LeadChunk]:
+        self._pending += data
+        if not self._magic_seen:
+            if len(self._pending) < len(FRAMES_MAGIC):
+                return
+            if self._pending[: len(FRAMES_MAGIC)] != FRAMES_MAGIC:
+                raise SignalStreamError("Missing ECGF stream header")
+            del self._pending[: len(FRAMES_MAGIC)]
+            self._magic_seen = True
+
+        while True:
+            if self._frame is None:
+                if len(self._pending) < FRAME_HEADER.size:
+                    return
+                self._start_frame()
+                if self._remaining == 0:
+                    name, sample_number, itemsize = self._frame
+                    self._frame = None
+                    samples = np.empty(0, dtype=SIGNAL_DTYPES[itemsize])
+                    yield LeadChunk(name, sample_number, itemsize, samples)
+                    continue
+
+            name, sample_number, itemsize = self._frame
+            available = min(len(self._pending) // itemsize, self._remaining)
+            if available == 0:
+                return
+            size = available * itemsize
+            samples = np.frombuffer(
+                bytes(self._pending[:size]), dtype=SIGNAL_DTYPES[itemsize]
+            )
+            del self._pending[:size]
+            self._remaining -= available
+            if self._remaining == 0:
+                self._frame = None
+            yield LeadChunk(name, sample_number, itemsize, samples)
+
+    def close(self) -> Iterator[LeadChunk]:
+        if not self._magic_seen and self._pending:
+            raise SignalStreamError("Missing ECGF stream header")
+        if self._frame is not None or self._pending:
+            raise SignalStreamError("Stream ended in the middle of a frame")
+        return iter(())
+
+    def _start_frame(self) -> None:
+        raw_name, itemsize, sample_number, count = FRAME_HEADER.unpack_from(
+            self._pending
+        )
+        del self._pending[: FRAME_HEADER.size]
+        try:
+            name = LeadName(raw_name.rstrip(b"\0").decode("ascii"))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise SignalStreamError(f"Unknown lead name {raw_name!r}") from e
+        if itemsize not in SIGNAL_DTYPES:
+            raise SignalStreamError(f"Unsupported item size {itemsize}")
+        self._frame = (name, sample_number or None, itemsize)
+        self._remaining = count
+
+
+async def decode_signal_stream(
+    body: AsyncIterator[bytes], decoder: NDJSONDecoder | FrameDecoder
+) -> AsyncIterator[LeadChunk]:
+    """Yield lead chunks from a request body without buffering it whole."""
+    async for data in body:
+        for chunk in decoder.feed(data):
+            yield chunk
+    for chunk in decoder.close():
+        yield chunk
+
+
+def get_stream_decoder(
+    content_type: str | None, max_line_bytes: int
+) -> NDJSONDecoder | FrameDecoder | None:
+    """Pick the decoder for a request ``Content-Type``, ignoring parameters."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == NDJSON_MEDIA_TYPE:
+        return NDJSONDecoder(max_line_bytes)
+    if media_type == FRAMES_MEDIA_TYPE:
+        return FrameDecoder()
+    return None
@@ -0,0 +1,64 @@
+"""Check whether the database schema is at the Alembic head without Alembic.
+
+Loading Alembic's script directory imports every migration module, which in
+turn imports SQLAlchemy, NumPy and the models. The heads are instead read
+from the migration files with :mod:`ast` and compared with the
+``alembic_version`` table over a single asyncpg connection.
+"""
+
+import ast
+from pathlib import Path
+
+import asyncpg
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+
+def _revisions(value: str | tuple[str, ...] | None) -> set[str]:
+    if value is None:
+        return set()
+    if isinstance(value, str):
+        return {value}
+    return set(value)
+
+
+def read_revision(path: Path) -> tuple[str, set[str]]:
+    """Return the revision of a migration file and the revisions it revises."""
+    values = {}
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.AnnAssign):
+            target, value = node.target, node.value
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target, value = node.targets[0], node.value
+        else:
+            continue
+        if isinstance(target, ast.Name) and value is not None:
+            if target.id in ("revision", "down_revision"):
+                values[target.id] = ast.literal_eval(value)
+    return values["revision"], _revisions(values.get("down_revision"))
+
+
+def read_heads(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """Return the revisions no other migration revises."""
+    revisions, revised = set(), set()
+    for path in versions_dir.glob("*.py"):
+        revision, down_revisions = read_revision(path)
+        revisions.add(revision)
+        revised |= down_revisions
+    return revisions - revised
+
+
+async def current_revisions(dsn: str) -> set[str]:
+    """Return the revisions stamped in the database, empty if never migrated."""
+    connection = await asyncpg.connect(dsn)
+    try:
+        rows = await connection.fetch("SELECT version_num FROM alembic_version")
+    except asyncpg.UndefinedTableError:
+        return set()
+    finally:
+        await connection.close()
+    return {row["version_num"] for row in rows}
+
+
+async def is_at_head(dsn: str, versions_dir: Path = VERSIONS_DIR) -> bool:
+    return await current_revisions(dsn) == read_heads(versions_dir)
@@ -1,30 +1,93 @@
-from sqlalchemy.engine.url import URL
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+
+
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options() -> dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` taken from the settings.
+
+    Behind PgBouncer in transaction pooling mode consecutive statements may
+    run on different server connections, so nothing can rely on a prepared
+    statement surviving: both statement caches are disabled, statements get
+    unique names, and pooling is left to PgBouncer.
+    """
+    options: dict[str, Any] = {"echo": settings.DB_ECHO}
+    if settings.DB_PGBOUNCER:
+        options["poolclass"] = NullPool
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name,
+        }
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+    return options
+
+
+def create_db_engine(url: Any = None) -> AsyncEngine:
+    """Create an async engine with its own connection pool.
+
+    ``url`` defaults to ``settings.SQLALCHEMY_DATABASE_URI``.
+    """
+    engine = create_async_engine(
+        str(url or settings.SQLALCHEMY_DATABASE_URI), **engine_options()
+    )
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> None:
+    """Open ``connections`` pooled connections at once and return them idle.
+
+    Requests arriving right after startup then find connected sessions instead
+    of each paying for a new connection.
+    """
+    if connections <= 0 or isinstance(engine.pool, NullPool):
+        return
+    async with AsyncExitStack() as stack:
+        await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+        )
+
+
+def create_session_factory(engine: AsyncEngine) -> sessionmaker:
+    """Create an async session factory bound to ``engine``."""
+    return sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
 
 # Create async engine
-engine = create_async_engine(
-    URL.create(
-        drivername="postgresql+asyncpg",
-        username="postgres",
-        password="postgres",
-        host="db",
-        port=5432,
-        database="postgres",
-    ),
-    echo=True,
-)
+engine = create_db_engine()
 
 # Create async session factory
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+AsyncSessionLocal = create_session_factory(engine)
 
 
 async def get_db() -> AsyncSession:
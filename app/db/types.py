@@ -0,0 +1,55 @@
+from typing import Any, Sequence
+
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Packed signal layout: one header byte holding the item size (2 or 4),
+# followed by the samples as little-endian signed integers.
+SIGNAL_DTYPES = {2: np.dtype("<i2"), 4: np.dtype("<i4")}
+INT16_INFO = np.iinfo(np.int16)
+INT32_INFO = np.iinfo(np.int32)
+
+
+def signal_itemsize(signal: np.ndarray) -> int:
+    """Return the narrowest supported item size able to hold every sample."""
+    if signal.size == 0:
+        return 2
+    low, high = int(signal.min()), int(signal.max())
+    if INT16_INFO.min <= low and high <= INT16_INFO.max:
+        return 2
+    if INT32_INFO.min <= low and high <= INT32_INFO.max:
+        return 4
+    raise ValueError("Signal samples must fit into a 32-bit signed integer")
+
+
+def pack_signal(
+    signal: Sequence[int] | np.ndarray, itemsize: int | None = None
+) -> bytes:
+    """Pack samples into the int16/int32 binary layout stored in the database."""
+    samples = np.asarray(signal, dtype=np.int64).ravel()
+    if itemsize is None:
+        itemsize = signal_itemsize(samples)
+    return bytes((itemsize,)) + samples.astype(SIGNAL_DTYPES[itemsize]).tobytes()
+
+
+def unpack_signal(data: bytes | memoryview) -> np.ndarray:
+    """Decode a packed signal into a read-only NumPy view over the buffer."""
+    return np.frombuffer(data, dtype=SIGNAL_DTYPES[data[0]], offset=1)
+
+
+class PackedSignal(TypeDecorator):
+    """Integer signal stored as a packed ``bytea`` and loaded as a NumPy array."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> bytes | None:
+        if value is None or isinstance(value, bytes):
+            return value
+        return pack_signal(value)
+
+    def process_result_value(self, value: bytes | None, dialect) -> np.ndarray | None:
+        if value is None:
+            return None
+        return unpack_signal(value)
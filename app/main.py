@@ -1,13 +1,47 @@
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api import metrics as metrics_api
 from app.api.v1.router import api_router
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.notifications import ecg_events, user_events
+from app.db.session import engine, warm_up_pool
+
+
+# Modules the API only imports on first use, see app.celery.dispatch and
+# app.core.security. They are loaded while the server already accepts requests.
+DEFERRED_IMPORTS = ["app.celery.worker", "jose.jwt", "passlib.context"]
+
+
+def import_deferred() -> None:
+    for name in DEFERRED_IMPORTS:
+        importlib.import_module(name)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    deferred_import = asyncio.create_task(asyncio.to_thread(import_deferred))
+    await warm_up_pool(engine, settings.DB_POOL_WARMUP)
+    yield
+    await deferred_import
+    await ecg_events.stop()
+    await user_events.stop()
+    password_hasher.shutdown()
+    await engine.dispose()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -20,4 +54,19 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+if metrics.enabled():
+    # Inside the compression middleware, which copies the scope of compressed
+    # requests: the route matched is only visible on the copy.
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(metrics_api.router)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    thread_threshold=settings.COMPRESSION_THREAD_THRESHOLD,
+    max_request_size=settings.REQUEST_MAX_DECOMPRESSED_BYTES,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -3,4 +3,6 @@
 from app.models.analysis import ECGAnalysis
 from app.models.ecg import ECG
 from app.models.lead import Lead
+from app.models.lead_pyramid import LeadPyramidLevel
+from app.models.lead_signal_chunk import LeadSignalChunk
 from app.models.user import User
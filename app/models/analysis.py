@@ -14,7 +14,10 @@ class ECGAnalysis(Base):
         PgUUID(as_uuid=True), primary_key=True, default=uuid4
     )
     lead_id: Mapped[UUID] = mapped_column(
-        PgUUID(as_uuid=True), ForeignKey("lead.id", ondelete="CASCADE")
+        PgUUID(as_uuid=True),
+        ForeignKey("lead.id", ondelete="CASCADE"),
+        index=True,
+        unique=True,
     )
     result: Mapped[str] = mapped_column(Integer)
 
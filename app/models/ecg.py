@@ -1,15 +1,28 @@
 from datetime import datetime
+from enum import StrEnum
 from uuid import UUID, uuid4
 
-from sqlalchemy import Date, DateTime, ForeignKey
+from sqlalchemy import Date, DateTime
+from sqlalchemy import Enum as SQLAlchemyEnum
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
 
 
+class AnalysisStatus(StrEnum):
+    # Values are the matching Celery task states, as reported by the API.
+    QUEUED = "PENDING"
+    STARTED = "STARTED"
+    SUCCEEDED = "SUCCESS"
+    FAILED = "FAILURE"
+
+
 class ECG(Base):
     __tablename__ = "ecg"
+    # Keyset pagination of a user's ECGs, see ECGService.list_for_user.
+    __table_args__ = (Index("ix_ecg_user_id_date_id", "user_id", "date", "id"),)
 
     id: Mapped[UUID] = mapped_column(
         PgUUID(as_uuid=True), primary_key=True, default=uuid4
@@ -22,6 +35,26 @@ class ECG(Base):
     task_id: Mapped[UUID] = mapped_column(
         PgUUID(as_uuid=True), default=uuid4, nullable=True
     )
+    # Written by the worker's task signals; NULL for ECGs created before the
+    # status was tracked here.
+    analysis_status: Mapped[AnalysisStatus | None] = mapped_column(
+        SQLAlchemyEnum(AnalysisStatus, native_enum=True), nullable=True
+    )
+    analysis_queued_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    analysis_started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    analysis_finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Leads carry the full signals, so they are never loaded implicitly; pick
+    # a profile with ECGService.get_by_id instead.
     leads: Mapped[list["Lead"]] = relationship(
-        "Lead", back_populates="ecg", cascade="all, delete-orphan", lazy="joined"
+        "Lead",
+        back_populates="ecg",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
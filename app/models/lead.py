@@ -1,13 +1,14 @@
 from enum import StrEnum
 from uuid import UUID, uuid4
 
+import numpy as np
 from sqlalchemy import CheckConstraint
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy import ForeignKey, Integer
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import ForeignKey, Integer, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.db.types import PackedSignal
 from app.models.user import Base
 
 
@@ -33,11 +34,15 @@ class Lead(Base):
         PgUUID(as_uuid=True), primary_key=True, default=uuid4
     )
     ecg_id: Mapped[UUID] = mapped_column(
-        PgUUID(as_uuid=True), ForeignKey("ecg.id", ondelete="CASCADE")
+        PgUUID(as_uuid=True), ForeignKey("ecg.id", ondelete="CASCADE"), index=True
     )
     name: Mapped[LeadName] = mapped_column(SQLAlchemyEnum(LeadName, native_enum=True))
-    signal: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    signal: Mapped[np.ndarray] = mapped_column(PackedSignal)
     sample_number: Mapped[int] = mapped_column(Integer,CheckConstraint('sample_number > 0', name="sample_number_con"), nullable=True)
+    # BLAKE2b of the samples and the analysis version, see app.analysis.cache.
+    signal_hash: Mapped[bytes | None] = mapped_column(
+        LargeBinary(16), nullable=True, index=True
+    )
 
     # Relationship
     ecg: Mapped["ECG"] = relationship("ECG", back_populates="leads")
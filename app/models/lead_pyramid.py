@@ -0,0 +1,24 @@
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+from app.db.types import PackedSignal
+
+
+class LeadPyramidLevel(Base):
+    """Min/max envelope of a lead over buckets of ``factor`` samples."""
+
+    __tablename__ = "lead_pyramid"
+
+    lead_id: Mapped[UUID] = mapped_column(
+        PgUUID(as_uuid=True),
+        ForeignKey("lead.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    factor: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mins: Mapped[np.ndarray] = mapped_column(PackedSignal)
+    maxs: Mapped[np.ndarray] = mapped_column(PackedSignal)
@@ -0,0 +1,26 @@
+from uuid import UUID
+
+from sqlalchemy import ForeignKey, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class LeadSignalChunk(Base):
+    """Samples of a streamed lead, stored until the upload is complete.
+
+    ``ECGService.create_from_stream`` writes one row per filled buffer and
+    concatenates them into ``lead.signal`` in one statement at the end, in
+    the same transaction, so rows never outlive an upload.
+    """
+
+    __tablename__ = "lead_signal_chunk"
+
+    lead_id: Mapped[UUID] = mapped_column(
+        PgUUID(as_uuid=True),
+        ForeignKey("lead.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
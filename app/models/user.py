@@ -1,10 +1,11 @@
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import Boolean, DateTime, String, func
+from sqlalchemy import DDL, Boolean, DateTime, String, event, func
 from sqlalchemy.dialects.postgresql import UUID as PgUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.config import settings
 from app.core.security import verify_password
 from app.db.base_class import Base
 from app.models.base import TimestampMixin
@@ -27,3 +28,26 @@ class User(Base, TimestampMixin):
 
     def verify_password(self, password: str) -> bool:
         return verify_password(password, self.hashed_password)
+
+
+# Any change to a user row is announced with its old email, so processes that
+# cache authenticated users can drop the entry (see app.api.deps).
+USER_CHANGED_FUNCTION = DDL(
+    f"""
+    CREATE OR REPLACE FUNCTION notify_user_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify(
+            '{settings.USER_EVENTS_CHANNEL}',
+            json_build_object('email', OLD.email)::text
+        );
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """
+)
+USER_CHANGED_TRIGGER = DDL(
+    'CREATE TRIGGER user_changed AFTER UPDATE OR DELETE ON "user" '
+    "FOR EACH ROW EXECUTE FUNCTION notify_user_changed()"
+)
+event.listen(User.__table__, "after_create", USER_CHANGED_FUNCTION)
+event.listen(User.__table__, "after_create", USER_CHANGED_TRIGGER)
@@ -1,8 +1,9 @@
-from datetime import date
+from datetime import date, datetime
 
-from pydantic import UUID4, BaseModel, ConfigDict
+from pydantic import UUID4, BaseModel, ConfigDict, Field
 
-from app.schemas.lead import LeadCreate, LeadOut
+from app.core.config import settings
+from app.schemas.lead import LeadAnalysisOut, LeadCreate, LeadOut
 
 
 class ECGBase(BaseModel):
@@ -23,9 +24,38 @@ class ECGOutLeads(ECGOut):
     leads: list[LeadOut]
 
 
+class ECGOutAnalysis(ECGOut):
+    leads: list[LeadAnalysisOut]
+
+
+class ECGCreated(ECGOut):
+    task_id: UUID4 | None = None
+
+
+class ECGPage(BaseModel):
+    items: list[ECGCreated]
+    next_cursor: str | None = None
+
+
+class ECGBatchCreate(BaseModel):
+    ecgs: list[ECGCreate] = Field(min_length=1, max_length=settings.ECG_BATCH_MAX_SIZE)
+
+
+class ECGBatchOut(BaseModel):
+    items: list[ECGCreated]
+
+
 class CeleryTaskStatus(BaseModel):
     task_id: UUID4
     status: str
+    queued_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class ECGStatusEvent(BaseModel):
+    ecg_id: UUID4
+    status: str
 
 
 class ECGTaskOut(BaseModel):
@@ -1,10 +1,15 @@
-from typing import Annotated
+from typing import Annotated, Any, Literal
 
-from pydantic import UUID4, BaseModel, ConfigDict, Field
+import numpy as np
+from pydantic import UUID4, BaseModel, ConfigDict, Field, field_validator
 
+from app.db.types import INT32_INFO
 from app.models.lead import LeadName
 from app.schemas.analysis import ECGAnalysisOut
 
+# Signals are stored as int16 or int32, see app.db.types.
+Sample = Annotated[int, Field(ge=int(INT32_INFO.min), le=int(INT32_INFO.max))]
+
 
 class LeadBase(BaseModel):
     name: LeadName
@@ -12,7 +17,44 @@ class LeadBase(BaseModel):
     sample_number: Annotated[int, Field(strict=True, gt=0)] | None = None
 
 class LeadCreate(LeadBase):
-    pass
+    signal: list[Sample]
+
+
+class LeadChunkIn(LeadBase):
+    dtype: Literal["int16", "int32"] = "int32"
+
+
+class LeadSamplesOut(BaseModel):
+    """Window ``[start, end)`` of a lead.
+
+    With ``bucket_size`` 1 ``signal`` holds the raw samples. Otherwise every
+    ``bucket_size`` samples are reduced to a min/max pair and ``signal`` is
+    ``[min0, max0, min1, max1, ...]``. Decimated windows served from a
+    precomputed pyramid level may start and end slightly outside the
+    requested range, aligned to that level's buckets.
+    """
+
+    name: LeadName
+    start: int
+    end: int
+    total_samples: int
+    bucket_size: int
+    signal: list[int]
+
+    @field_validator("signal", mode="before")
+    def unpack_signal(cls, v: Any) -> Any:
+        if isinstance(v, np.ndarray):
+            return v.tolist()
+        return v
+
+
+class LeadAnalysisOut(BaseModel):
+    id: UUID4
+    name: LeadName
+    sample_number: int | None = None
+    analysis: ECGAnalysisOut | None = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LeadOut(LeadBase):
@@ -20,3 +62,10 @@ class LeadOut(LeadBase):
     analysis: ECGAnalysisOut | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("signal", mode="before")
+    def unpack_signal(cls, v: Any) -> Any:
+        """Convert packed signals loaded from the database in a single C call."""
+        if isinstance(v, np.ndarray):
+            return v.tolist()
+        return v
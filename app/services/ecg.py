@@ -1,76 +1,600 @@
-from typing import List
-from uuid import UUID
+import asyncio
+import time
+from concurrent.futures import Executor
+from datetime import date, datetime, timezone
+from enum import StrEnum
+from typing import AsyncIterator, Iterator, List
+from uuid import UUID, uuid4
 
-from celery.result import AsyncResult
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+import numpy as np
+from sqlalchemy import (
+    LargeBinary,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import defer, raiseload, selectinload
 
+from app.analysis.cache import (
+    analysis_results,
+    new_signal_hasher,
+    signal_hash,
+    update_signal_hasher,
+)
+from app.analysis.decimate import (
+    bucket_size_for,
+    build_pyramid,
+    interleave,
+    minmax_reduce,
+)
+from app.analysis.parallel import count_zero_crossings_parallel
+from app.analysis.zero_crossings import count_zero_crossings
+from app.celery.dispatch import get_task_state
+from app.core.config import settings
+from app.core.metrics import (
+    ANALYZED_LEADS,
+    DB_QUERY_DURATION,
+    LEAD_ANALYSIS_DURATION,
+    observe_lead_signal,
+)
+from app.core.signal_stream import LeadChunk, SignalStreamError
+from app.db.types import SIGNAL_DTYPES, pack_signal, unpack_signal
 from app.models.analysis import ECGAnalysis
-from app.models.ecg import ECG
-from app.models.lead import Lead
-from app.schemas.ecg import CeleryTaskStatus, ECGCreate
+from app.models.ecg import ECG, AnalysisStatus
+from app.models.lead import Lead, LeadName
+from app.models.lead_pyramid import LeadPyramidLevel
+from app.models.lead_signal_chunk import LeadSignalChunk
+from app.schemas.ecg import CeleryTaskStatus, ECGCreate, ECGStatusEvent
+from app.schemas.lead import LeadSamplesOut
 from app.services.base import BaseService
 
+LEAD_COPY_COLUMNS = ["id", "ecg_id", "name", "signal", "sample_number", "signal_hash"]
+
+ANALYSIS_STATUS_TIMESTAMPS = {
+    AnalysisStatus.QUEUED: "analysis_queued_at",
+    AnalysisStatus.STARTED: "analysis_started_at",
+    AnalysisStatus.SUCCEEDED: "analysis_finished_at",
+    AnalysisStatus.FAILED: "analysis_finished_at",
+}
+
+
+def _packed_window(column, start, end):
+    """Select samples ``[start, end)`` of a packed signal column in SQL.
+
+    Returns expressions for the item size and the window bytes. Offsets may be
+    Python ints or SQL expressions.
+
+    With the column stored uncompressed, Postgres only reads the TOAST chunks
+    covering the window.
+    """
+    itemsize = func.get_byte(column, 0)
+    data = func.substring(
+        column, itemsize * start + 2, itemsize * (end - start), type_=LargeBinary
+    )
+    return itemsize, data
+
+
+class _LeadSignalWriter:
+    """Collect streamed samples of one lead in a fixed-size buffer."""
+
+    def __init__(self, lead_id: UUID, itemsize: int, buffer_samples: int):
+        self.lead_id = lead_id
+        self.itemsize = itemsize
+        self._buffer = np.empty(buffer_samples, dtype=SIGNAL_DTYPES[itemsize])
+        self._size = 0
+        self.samples = 0
+        self.chunks = 0
+        self._hasher = new_signal_hasher()
+
+    def write(self, samples: np.ndarray) -> Iterator[bytes]:
+        """Copy samples into the buffer, yielding its bytes every time it fills."""
+        while samples.size:
+            count = min(samples.size, self._buffer.size - self._size)
+            self._buffer[self._size : self._size + count] = samples[:count]
+            self._size += count
+            self.samples += count
+            samples = samples[count:]
+            if self._size == self._buffer.size:
+                yield self.flush()
+
+    def flush(self) -> bytes:
+        samples = self._buffer[: self._size]
+        update_signal_hasher(self._hasher, samples)
+        self._size = 0
+        return samples.tobytes()
+
+    def signal_hash(self) -> bytes:
+        """Content hash of everything flushed so far."""
+        return self._hasher.digest()
+
+
+class ECGLoad(StrEnum):
+    """How much of an ECG ``ECGService.get_by_id`` reads."""
+
+    METADATA = "metadata"  # the ECG row only
+    ANALYSIS = "analysis"  # leads and their results, without signals
+    FULL = "full"  # leads with signals and results
+
+
+ECG_LOAD_OPTIONS = {
+    ECGLoad.METADATA: [raiseload(ECG.leads)],
+    ECGLoad.ANALYSIS: [
+        selectinload(ECG.leads).options(defer(Lead.signal, raiseload=True))
+    ],
+    ECGLoad.FULL: [selectinload(ECG.leads)],
+}
+
 
 class ECGService(BaseService):
-    async def get_by_id(self, ecg_id: UUID, user_id: UUID) -> ECG | None:
+    async def get_by_id(
+        self, ecg_id: UUID, user_id: UUID, load: ECGLoad = ECGLoad.FULL
+    ) -> ECG | None:
         result = await self.db.execute(
             select(ECG)
-            .options(selectinload(ECG.leads))
+            .options(*ECG_LOAD_OPTIONS[load])
             .where((ECG.id == ecg_id) & (ECG.user_id == user_id))
         )
         return result.scalar_one_or_none()
 
+    async def list_for_user(
+        self,
+        user_id: UUID,
+        limit: int,
+        after: tuple[date, UUID] | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> List[ECG]:
+        """List ECGs without their leads, newest first.
+
+        Pages are keyed on ``(date, id)``: ``after`` is the key of the last ECG
+        of the previous page. Together with the ``(user_id, date, id)`` index
+        every page is a bounded index range scan, however deep it is.
+        """
+        query = (
+            select(ECG)
+            .options(raiseload(ECG.leads))
+            .where(ECG.user_id == user_id)
+            .order_by(ECG.date.desc(), ECG.id.desc())
+            .limit(limit)
+        )
+        if date_from is not None:
+            query = query.where(ECG.date >= date_from)
+        if date_to is not None:
+            query = query.where(ECG.date <= date_to)
+        if after is not None:
+            query = query.where(tuple_(ECG.date, ECG.id) < after)
+        result = await self.db.execute(query)
+        return list(result.scalars())
+
+    async def get_lead_samples(
+        self,
+        ecg_id: UUID,
+        user_id: UUID,
+        name: LeadName,
+        start: int,
+        end: int | None,
+        max_points: int,
+    ) -> LeadSamplesOut | None:
+        """Read samples ``[start, end)`` of one lead, decimated to ``max_points``.
+
+        Decimated windows are served from the coarsest pyramid level that still
+        meets the requested resolution; their bounds are widened to that
+        level's buckets. Either way the window is cut out of the packed column
+        by the database, so only the requested bytes are sent over.
+        """
+        result = await self.db.execute(
+            select(
+                Lead.id, func.octet_length(Lead.signal), func.get_byte(Lead.signal, 0)
+            )
+            .join(ECG, ECG.id == Lead.ecg_id)
+            .where((Lead.ecg_id == ecg_id) & (ECG.user_id == user_id))
+            .where(Lead.name == name)
+            .limit(1)
+        )
+        row = result.first()
+        if row is None:
+            return None
+
+        lead_id, size, itemsize = row
+        total_samples = (size - 1) // itemsize
+        end = max(start, min(total_samples, total_samples if end is None else end))
+        bucket_size = bucket_size_for(end - start, max_points)
+        window = None
+        if bucket_size > 1:
+            window = await self._read_pyramid_window(lead_id, start, end, bucket_size)
+        if window is None:
+            samples = await self._read_signal_window(lead_id, start, end)
+            mins, maxs = minmax_reduce(samples, samples, bucket_size)
+        else:
+            factor, mins, maxs = window
+            # The window was widened to whole level buckets, so the buckets
+            # are sized from what was read, not from the requested range.
+            level_bucket_size = max(-(-mins.size // max(max_points // 2, 1)), 1)
+            mins, maxs = minmax_reduce(mins, maxs, level_bucket_size)
+            bucket_size = level_bucket_size * factor
+            start = start // factor * factor
+            end = min(-(-end // factor) * factor, total_samples)
+
+        return LeadSamplesOut(
+            name=name,
+            start=start,
+            end=end,
+            total_samples=total_samples,
+            bucket_size=bucket_size,
+            signal=mins if bucket_size == 1 else interleave(mins, maxs),
+        )
+
+    async def _read_signal_window(
+        self, lead_id: UUID, start: int, end: int
+    ) -> np.ndarray:
+        itemsize, data = _packed_window(Lead.signal, start, end)
+        result = await self.db.execute(select(itemsize, data).where(Lead.id == lead_id))
+        itemsize, data = result.one()
+        return np.frombuffer(data, dtype=SIGNAL_DTYPES[itemsize])
+
+    async def _read_pyramid_window(
+        self, lead_id: UUID, start: int, end: int, bucket_size: int
+    ) -> tuple[int, np.ndarray, np.ndarray] | None:
+        """Read the buckets covering ``[start, end)`` from the coarsest level.
+
+        Only levels whose factor does not exceed ``bucket_size`` qualify.
+        """
+        factor = LeadPyramidLevel.factor
+        level_start = literal(start) // factor
+        level_end = (literal(end) + factor - 1) // factor
+        mins_itemsize, mins = _packed_window(
+            LeadPyramidLevel.mins, level_start, level_end
+        )
+        maxs_itemsize, maxs = _packed_window(
+            LeadPyramidLevel.maxs, level_start, level_end
+        )
+        result = await self.db.execute(
+            select(factor, mins_itemsize, mins, maxs_itemsize, maxs)
+            .where(LeadPyramidLevel.lead_id == lead_id)
+            .where(factor <= bucket_size)
+            .order_by(factor.desc())
+            .limit(1)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        factor, mins_itemsize, mins, maxs_itemsize, maxs = row
+        return (
+            factor,
+            np.frombuffer(mins, dtype=SIGNAL_DTYPES[mins_itemsize]),
+            np.frombuffer(maxs, dtype=SIGNAL_DTYPES[maxs_itemsize]),
+        )
+
     async def create(self, user_id: UUID, ecg_in: ECGCreate) -> ECG:
         """Create new ECG with leads and trigger analysis."""
-        ecg = ECG(
-            user_id=user_id,
-            date=ecg_in.date,
-            leads=[
-                Lead(
-                    name=lead_data.name,
-                    signal=lead_data.signal,
-                    sample_number=lead_data.sample_number,
+        ecgs = await self.create_many(user_id, [ecg_in])
+        return ecgs[0]
+
+    async def create_many(self, user_id: UUID, ecgs_in: list[ECGCreate]) -> list[ECG]:
+        """Create ECGs in one transaction without going through the unit of work.
+
+        ECG rows are written with a single multi-row INSERT and their leads
+        with one binary COPY. The returned objects are transient, carry the
+        generated ids and task ids, and are only meant to be serialized.
+        """
+        ecgs = []
+        lead_records = []
+        queued_at = datetime.now(timezone.utc)
+        for ecg_in in ecgs_in:
+            ecg = ECG(
+                id=uuid4(),
+                user_id=user_id,
+                date=ecg_in.date,
+                task_id=uuid4(),
+                analysis_status=AnalysisStatus.QUEUED,
+                analysis_queued_at=queued_at,
+            )
+            for lead_in in ecg_in.leads:
+                packed = pack_signal(lead_in.signal)
+                samples = unpack_signal(packed)
+                lead = Lead(
+                    id=uuid4(),
+                    ecg_id=ecg.id,
+                    name=lead_in.name,
+                    signal=samples,
+                    sample_number=lead_in.sample_number,
+                    signal_hash=signal_hash(samples),
+                )
+                ecg.leads.append(lead)
+                observe_lead_signal(len(lead.signal), len(packed))
+                # The leadname enum is stored by member name (e.g. "AVR").
+                lead_records.append(
+                    (
+                        lead.id,
+                        ecg.id,
+                        lead.name.name,
+                        packed,
+                        lead.sample_number,
+                        lead.signal_hash,
+                    )
                 )
-                for lead_data in ecg_in.leads
+            ecgs.append(ecg)
+
+        await self.db.execute(
+            insert(ECG),
+            [
+                {
+                    "id": e.id,
+                    "user_id": e.user_id,
+                    "date": e.date,
+                    "task_id": e.task_id,
+                    "analysis_status": e.analysis_status,
+                    "analysis_queued_at": e.analysis_queued_at,
+                }
+                for e in ecgs
             ],
         )
-        self.db.add(ecg)
+        if lead_records:
+            # The INSERT above has opened the transaction, so COPY joins it.
+            connection = await self.db.connection()
+            raw_connection = await connection.get_raw_connection()
+            start = time.perf_counter()
+            await raw_connection.driver_connection.copy_records_to_table(
+                Lead.__tablename__, records=lead_records, columns=LEAD_COPY_COLUMNS
+            )
+            # COPY bypasses the engine events timing every other statement.
+            DB_QUERY_DURATION.labels("COPY").observe(time.perf_counter() - start)
         await self.commit()
-        await self.refresh(ecg)
-        return ecg
+        return ecgs
+
+    async def create_from_stream(
+        self, user_id: UUID, ecg_date: date, chunks: AsyncIterator[LeadChunk]
+    ) -> ECG:
+        """Create new ECG from streamed lead chunks.
+
+        Samples are written to ``lead_signal_chunk`` rows every time a
+        per-lead buffer of ``ECG_STREAM_BUFFER_SAMPLES`` fills up, so memory
+        use does not grow with the recording length. At the end every lead's
+        chunks are concatenated into its signal at once and removed, and
+        everything is committed.
+        """
+        ecg = ECG(
+            user_id=user_id,
+            date=ecg_date,
+            analysis_status=AnalysisStatus.QUEUED,
+            analysis_queued_at=datetime.now(timezone.utc),
+        )
+        self.db.add(ecg)
+        await self.db.flush()
+
+        writers: dict[LeadName, _LeadSignalWriter] = {}
+        async for chunk in chunks:
+            writer = writers.get(chunk.name)
+            if writer is None:
+                writer = writers[chunk.name] = await self._add_stream_lead(ecg, chunk)
+            elif writer.itemsize != chunk.itemsize:
+                raise SignalStreamError(f"Lead {chunk.name} changed its sample type")
+            for data in writer.write(chunk.samples):
+                await self._write_chunk(writer, data)
+        if not writers:
+            raise SignalStreamError("The stream did not contain any leads")
+        for writer in writers.values():
+            await self._write_chunk(writer, writer.flush())
+            await self._assemble_signal(writer)
+            observe_lead_signal(writer.samples, 1 + writer.samples * writer.itemsize)
 
-    async def update_task_id(self, ecg_id: UUID, task_id: str, user_id: UUID) -> ECG:
-        ecg = await self.get_by_id(ecg_id, user_id)
-        ecg.task_id = task_id
         await self.commit()
-        await self.refresh(ecg)
         return ecg
 
-    async def analyze_ecg(self, ecg: ECG) -> ECG:
-        """Calculate zero crossings for each lead in the ECG."""
+    async def _add_stream_lead(self, ecg: ECG, chunk: LeadChunk) -> _LeadSignalWriter:
+        lead = Lead(
+            ecg_id=ecg.id,
+            name=chunk.name,
+            signal=bytes((chunk.itemsize,)),
+            sample_number=chunk.sample_number,
+        )
+        self.db.add(lead)
+        await self.db.flush()
+        return _LeadSignalWriter(
+            lead.id, chunk.itemsize, settings.ECG_STREAM_BUFFER_SAMPLES
+        )
+
+    async def _write_chunk(self, writer: _LeadSignalWriter, data: bytes) -> None:
+        if not data:
+            return
+        await self.db.execute(
+            insert(LeadSignalChunk).values(
+                lead_id=writer.lead_id, seq=writer.chunks, data=data
+            )
+        )
+        writer.chunks += 1
+
+    async def _assemble_signal(self, writer: _LeadSignalWriter) -> None:
+        # Appending every chunk to the signal would copy the whole value each
+        # time; string_agg builds it once.
+        chunks = (
+            select(
+                func.string_agg(
+                    LeadSignalChunk.data,
+                    aggregate_order_by(literal(b"", LargeBinary), LeadSignalChunk.seq),
+                    type_=LargeBinary,
+                )
+            )
+            .where(LeadSignalChunk.lead_id == writer.lead_id)
+            .scalar_subquery()
+        )
+        await self.db.execute(
+            update(Lead)
+            .where(Lead.id == writer.lead_id)
+            .values(
+                signal=Lead.signal.op("||")(
+                    func.coalesce(chunks, literal(b"", LargeBinary))
+                ),
+                signal_hash=writer.signal_hash(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(
+            delete(LeadSignalChunk).where(LeadSignalChunk.lead_id == writer.lead_id)
+        )
+
+    async def analyze_ecg(self, ecg: ECG, executor: Executor | None = None) -> ECG:
+        """Calculate zero crossings for each lead in the ECG.
+
+        Leads whose signal hash has been analysed before reuse that result,
+        looked up in the in-process LRU first and in the database second.
+        The remaining large ECGs are counted on ``executor`` when one is given,
+        keeping the event loop free for database I/O.
+        """
+        results = await self._get_cached_results(ecg.leads)
+        pending = [lead for lead in ecg.leads if lead.id not in results]
+        ANALYZED_LEADS.labels("cache").inc(len(ecg.leads) - len(pending))
+        if pending:
+            signals = [lead.signal for lead in pending]
+            total_samples = sum(len(signal) for signal in signals)
+            start = time.perf_counter()
+            if executor and total_samples >= settings.ANALYSIS_PARALLEL_MIN_SAMPLES:
+                mode = "parallel"
+                crossings = await count_zero_crossings_parallel(
+                    signals, executor, settings.ANALYSIS_SEGMENT_SAMPLES
+                )
+            else:
+                mode = "inline"
+                crossings = count_zero_crossings(signals)
+            # Leads are counted together; each gets an equal share of the time.
+            per_lead = (time.perf_counter() - start) / len(pending)
+            for _ in pending:
+                LEAD_ANALYSIS_DURATION.labels(mode).observe(per_lead)
+            ANALYZED_LEADS.labels("computed").inc(len(pending))
+            for lead, zero_crossings in zip(pending, crossings.tolist()):
+                results[lead.id] = zero_crossings
+                if lead.signal_hash is not None:
+                    analysis_results.set(lead.signal_hash, zero_crossings)
+
         for lead in ecg.leads:
-            zero_crossings = await self._count_zero_crossings(lead.signal)
-            analysis_item = ECGAnalysis(lead_id=lead.id, result=zero_crossings)
-            lead.analysis = analysis_item
+            # Update in place on re-runs: a lead has at most one analysis row.
+            if lead.analysis is None:
+                lead.analysis = ECGAnalysis(lead_id=lead.id, result=results[lead.id])
+            else:
+                lead.analysis.result = results[lead.id]
+        await self._write_pyramids(ecg.leads)
         await self.commit()
-        await self.refresh(ecg)
 
         return ecg
 
-    async def _count_zero_crossings(self, signal: list[int]) -> int:
-        """Count the number of times the signal crosses zero."""
-        crossings = 0
-        for i, value in enumerate(signal[:-1]):
-            next_value = signal[i + 1]
-            if (value >= 0 and next_value < 0) or (value < 0 and next_value >= 0):
-                crossings += 1
-        return crossings
-
-    async def get_analysis_status(self, task_id: str) -> CeleryTaskStatus:
-        """Get the status of an analysis task."""
-        result = AsyncResult(str(task_id))
+    async def _write_pyramids(self, leads: List[Lead]) -> None:
+        """Replace the min/max pyramid levels of every lead."""
+        levels = [
+            {
+                "lead_id": lead.id,
+                "factor": factor,
+                "mins": pack_signal(mins),
+                "maxs": pack_signal(maxs),
+            }
+            for lead in leads
+            for factor, mins, maxs in build_pyramid(
+                lead.signal, settings.ECG_PYRAMID_BASE, settings.ECG_PYRAMID_MIN_BUCKETS
+            )
+        ]
+        await self.db.execute(
+            delete(LeadPyramidLevel).where(
+                LeadPyramidLevel.lead_id.in_([lead.id for lead in leads])
+            )
+        )
+        if levels:
+            await self.db.execute(insert(LeadPyramidLevel), levels)
+
+    async def _get_cached_results(self, leads: List[Lead]) -> dict[UUID, int]:
+        """Map lead ids to known zero crossing counts of identical signals."""
+        results: dict[UUID, int] = {}
+        missing: dict[bytes, list[UUID]] = {}
+        for lead in leads:
+            if lead.signal_hash is None:
+                continue
+            cached = analysis_results.get(lead.signal_hash)
+            if cached is None:
+                missing.setdefault(lead.signal_hash, []).append(lead.id)
+            else:
+                results[lead.id] = cached
+        if not missing:
+            return results
+
+        rows = await self.db.execute(
+            select(Lead.signal_hash, ECGAnalysis.result)
+            .join(ECGAnalysis, ECGAnalysis.lead_id == Lead.id)
+            .where(Lead.signal_hash.in_(missing))
+            .distinct(Lead.signal_hash)
+        )
+        for lead_hash, result in rows:
+            analysis_results.set(lead_hash, result)
+            for lead_id in missing[lead_hash]:
+                results[lead_id] = result
+        return results
+
+    async def set_analysis_status(
+        self, ecg_id: UUID, status: AnalysisStatus
+    ) -> datetime | None:
+        """Record an analysis state transition and when it happened.
+
+        The transition is also published on ``ECG_EVENTS_CHANNEL``; Postgres
+        delivers the notification once the update commits. Returns when the
+        analysis was queued, if the ECG exists and recorded it.
+
+        Going back to QUEUED, as a retry does, keeps the time of the upload,
+        so queue waits measured from it include the retries.
+        """
+        timestamp = ANALYSIS_STATUS_TIMESTAMPS[status]
+        value = func.now()
+        if status is AnalysisStatus.QUEUED:
+            value = func.coalesce(getattr(ECG, timestamp), value)
+        queued_at = await self.db.scalar(
+            update(ECG)
+            .where(ECG.id == ecg_id)
+            .values({"analysis_status": status, timestamp: value})
+            .returning(ECG.analysis_queued_at)
+        )
+        event = ECGStatusEvent(ecg_id=ecg_id, status=status.value)
+        await self.db.execute(
+            select(func.pg_notify(settings.ECG_EVENTS_CHANNEL, event.model_dump_json()))
+        )
+        await self.commit()
+        return queued_at
+
+    async def get_many(self, ecg_ids: List[UUID], user_id: UUID) -> List[ECG]:
+        """Get the rows of several ECGs of a user, without their leads."""
+        result = await self.db.execute(
+            select(ECG)
+            .options(*ECG_LOAD_OPTIONS[ECGLoad.METADATA])
+            .where(ECG.id.in_(ecg_ids) & (ECG.user_id == user_id))
+        )
+        return list(result.scalars())
+
+    async def get_status_events(self, ecg_ids: List[UUID]) -> List[ECGStatusEvent]:
+        """Get the current analysis status of several ECGs as status events."""
+        rows = await self.db.execute(
+            select(ECG.id, ECG.analysis_status).where(ECG.id.in_(ecg_ids))
+        )
+        return [
+            ECGStatusEvent(
+                ecg_id=ecg_id, status=(status or AnalysisStatus.QUEUED).value
+            )
+            for ecg_id, status in rows
+        ]
+
+    async def get_analysis_status(self, ecg: ECG) -> CeleryTaskStatus:
+        """Get the status of the analysis of an ECG.
+
+        The status is read from the ECG row, where the worker records it. Only
+        ECGs created before that fall back to the result backend, whose client
+        blocks, so it is queried in a thread.
+        """
+        if ecg.analysis_status is None:
+            status = await asyncio.to_thread(get_task_state, ecg.task_id)
+            return CeleryTaskStatus(task_id=ecg.task_id, status=status)
         return CeleryTaskStatus(
-            task_id=task_id,
-            status=result.status,
+            task_id=ecg.task_id,
+            status=ecg.analysis_status.value,
+            queued_at=ecg.analysis_queued_at,
+            started_at=ecg.analysis_started_at,
+            finished_at=ecg.analysis_finished_at,
         )
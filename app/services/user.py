@@ -3,14 +3,16 @@ from sqlalchemy.future import select
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.services.base import BaseService
-from app.core.security import get_password_hash, verify_password
+from app.core.hashing import password_hasher
 
 
 class UserService(BaseService):
     async def authenticate(self, email: str, password: str) -> User | None:
         user = await self.db.execute(select(User).where(User.email == email))
         user = user.scalar_one_or_none()
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await password_hasher.verify(
+            password, user.hashed_password
+        ):
             return None
         return user
 
@@ -21,7 +23,7 @@ class UserService(BaseService):
     async def _create(self, user_in: UserCreate, is_admin: bool = False) -> User:
         user = User(
             email=user_in.email,
-            hashed_password=get_password_hash(user_in.password),
+            hashed_password=await password_hasher.hash(user_in.password),
             is_active=True,
             is_admin=is_admin,
         )
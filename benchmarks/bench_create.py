@@ -0,0 +1,158 @@
+"""Compare ECG insert throughput of the ORM unit of work and the COPY path.
+
+Usage::
+
+    python -m benchmarks.bench_create --dsn postgresql+asyncpg://... \
+        --samples 5000 --requests 200 --batch 1000
+
+The database is migrated to head if it is behind, and every row written by the benchmark is
+removed afterwards together with its throwaway user.
+"""
+
+import asyncio
+import time
+import uuid
+from argparse import ArgumentParser
+from datetime import date
+
+import numpy as np
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import create_db_engine, create_session_factory
+from app.models.ecg import ECG
+from app.models.lead import Lead, LeadName
+from app.models.user import User
+from app.schemas.ecg import ECGCreate
+from app.services.ecg import ECGService
+from scripts.migrate import migrate
+
+
+def make_ecg(samples: int, rng: np.random.Generator) -> ECGCreate:
+    return ECGCreate(
+        date=date.today(),
+        leads=[
+            {"name": name, "signal": rng.integers(-2048, 2048, samples).tolist()}
+            for name in LeadName
+        ],
+    )
+
+
+async def create_orm(session: AsyncSession, user_id: uuid.UUID, ecg_in: ECGCreate):
+    """The unit-of-work insert ECGService.create used before the COPY path."""
+    ecg = ECG(
+        user_id=user_id,
+        date=ecg_in.date,
+        leads=[
+            Lead(
+                name=lead_in.name,
+                signal=lead_in.signal,
+                sample_number=lead_in.sample_number,
+            )
+            for lead_in in ecg_in.leads
+        ],
+    )
+    session.add(ecg)
+    await session.commit()
+
+
+async def timed(label: str, rows: int, coro) -> dict:
+    start = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - start
+    result = {
+        "case": label,
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed,
+    }
+    print(
+        f"{label:<32} {rows:>8} rows {elapsed:>9.3f}s {result['rows_per_sec']:>12.0f} rows/s"
+    )
+    return result
+
+
+async def run(dsn: str, samples: int, requests: int, batch: int) -> list[dict]:
+    await asyncio.to_thread(migrate, dsn)
+    engine = create_db_engine(dsn)
+    session_factory = create_session_factory(engine)
+
+    rng = np.random.default_rng(0)
+    ecg_in = make_ecg(samples, rng)
+    rows_per_ecg = 1 + len(ecg_in.leads)
+    results = []
+
+    async with session_factory() as session:
+        user = User(
+            email=f"bench_{uuid.uuid4().hex[:8]}@example.com", hashed_password="-"
+        )
+        session.add(user)
+        await session.commit()
+        service = ECGService(session)
+
+        async def orm_requests():
+            for _ in range(requests):
+                await create_orm(session, user.id, ecg_in)
+
+        async def copy_requests():
+            for _ in range(requests):
+                await service.create(user.id, ecg_in)
+
+        async def orm_batch():
+            for _ in range(batch):
+                session.add(
+                    ECG(
+                        user_id=user.id,
+                        date=ecg_in.date,
+                        leads=[
+                            Lead(name=lead.name, signal=lead.signal)
+                            for lead in ecg_in.leads
+                        ],
+                    )
+                )
+            await session.commit()
+
+        try:
+            results.append(
+                await timed("12-lead ECG, ORM", requests * rows_per_ecg, orm_requests())
+            )
+            results.append(
+                await timed(
+                    "12-lead ECG, COPY", requests * rows_per_ecg, copy_requests()
+                )
+            )
+            session.expunge_all()
+            results.append(
+                await timed(
+                    f"{batch}-ECG batch, ORM", batch * rows_per_ecg, orm_batch()
+                )
+            )
+            session.expunge_all()
+            results.append(
+                await timed(
+                    f"{batch}-ECG batch, COPY",
+                    batch * rows_per_ecg,
+                    service.create_many(user.id, [ecg_in] * batch),
+                )
+            )
+        finally:
+            await session.rollback()
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
+    await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=str(settings.SQLALCHEMY_DATABASE_URI))
+    parser.add_argument("--samples", type=int, default=5000, help="Samples per lead")
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Single-ECG transactions"
+    )
+    parser.add_argument("--batch", type=int, default=1000, help="ECGs in one batch")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.dsn, args.samples, args.requests, args.batch))
@@ -0,0 +1,106 @@
+"""Compare GET /ecg/{id} rendering through ECGTaskOut and the signal fast path.
+
+Usage::
+
+    python -m benchmarks.bench_serialize --samples 500000 --repeat 5
+
+The model path is what FastAPI does for a ``response_model`` endpoint:
+validate the ORM object into ``ECGTaskOut``, serialize it to Python objects
+and encode them with the standard library. The fast path renders the packed
+arrays directly. No database is needed; the ECG is built in memory.
+"""
+
+import asyncio
+import time
+import tracemalloc
+import uuid
+from argparse import ArgumentParser
+from datetime import date
+from typing import Callable
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.api.responses import SignalJSONResponse, ecg_task_content
+from app.db.types import pack_signal, unpack_signal
+from app.main import app
+from app.models.analysis import ECGAnalysis
+from app.models.ecg import ECG
+from app.models.lead import Lead, LeadName
+from app.schemas.ecg import CeleryTaskStatus, ECGTaskOut
+
+
+def make_ecg(samples: int, rng: np.random.Generator) -> ECG:
+    return ECG(
+        id=uuid.uuid4(),
+        date=date.today(),
+        leads=[
+            Lead(
+                id=uuid.uuid4(),
+                name=name,
+                signal=unpack_signal(pack_signal(rng.integers(-2048, 2048, samples))),
+                analysis=ECGAnalysis(id=uuid.uuid4(), result=0),
+            )
+            for name in LeadName
+        ],
+    )
+
+
+def response_field():
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.name == "get_ecg":
+            return route.response_field
+    raise LookupError("get_ecg route not found")
+
+
+async def render_model(ecg: ECG, task: CeleryTaskStatus) -> bytes:
+    content = await serialize_response(
+        field=response_field(), response_content=ECGTaskOut(ecg=ecg, task=task)
+    )
+    return JSONResponse(content).body
+
+
+async def render_fast(ecg: ECG, task: CeleryTaskStatus) -> bytes:
+    return SignalJSONResponse(ecg_task_content(ecg, task)).body
+
+
+async def timed(label: str, repeat: int, render: Callable, *args) -> dict:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = await render(*args)
+    elapsed = (time.perf_counter() - start) / repeat
+    # Tracing slows allocation-heavy code down, measure memory separately.
+    tracemalloc.start()
+    await render(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "case": label,
+        "seconds": elapsed,
+        "bytes": len(body),
+        "peak_mib": peak / 2**20,
+    }
+    print(
+        f"{label:<24} {elapsed * 1000:>10.1f} ms {len(body) / 2**20:>9.1f} MiB body "
+        f"{result['peak_mib']:>9.1f} MiB peak"
+    )
+    return result
+
+
+async def run(samples: int, repeat: int) -> list[dict]:
+    ecg = make_ecg(samples, np.random.default_rng(0))
+    task = CeleryTaskStatus(task_id=uuid.uuid4(), status="SUCCESS")
+    return [
+        await timed("ECGTaskOut model", repeat, render_model, ecg, task),
+        await timed("fast path", repeat, render_fast, ecg, task),
+    ]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=500_000, help="Samples per lead")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.samples, args.repeat))
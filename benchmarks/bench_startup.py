@@ -0,0 +1,82 @@
+"""Measure how long importing the API takes, using ``python -X importtime``.
+
+Usage::
+
+    python -m benchmarks.bench_startup --runs 5 --top 15
+
+Every run imports the module in a fresh interpreter. The fastest run is
+reported, as it is the least disturbed by the rest of the machine, together
+with the modules that took longest on their own in that run.
+IMPORT_BUDGET_SECONDS is enforced by tests/unit/test_startup.py. Its default
+leaves room for slower machines than the ones the API usually starts on; the
+environment variable of the same name overrides it.
+"""
+
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BUDGET_ENV = "IMPORT_BUDGET_SECONDS"
+IMPORT_BUDGET_SECONDS = float(os.environ.get(BUDGET_ENV, 2.0))
+
+
+def import_times(module: str) -> dict[str, tuple[float, float]]:
+    """Import ``module`` in a new interpreter.
+
+    Returns the self and cumulative seconds of every module imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return times
+
+
+def measure(module: str, runs: int) -> dict:
+    fastest = min(
+        (import_times(module) for _ in range(runs)),
+        key=lambda times: times[module][1],
+    )
+    slowest_modules = sorted(fastest.items(), key=lambda item: -item[1][0])
+    return {
+        "module": module,
+        "seconds": fastest[module][1],
+        "modules": len(fastest),
+        "top": [(name, self_s) for name, (self_s, _) in slowest_modules],
+    }
+
+
+def run(module: str, runs: int, top: int) -> dict:
+    result = measure(module, runs)
+    print(
+        f"{module}: {result['seconds'] * 1000:.0f} ms, {result['modules']} modules "
+        f"(budget {IMPORT_BUDGET_SECONDS * 1000:.0f} ms, fastest of {runs} runs)"
+    )
+    for name, self_s in result["top"][:top]:
+        print(f"  {self_s * 1000:>8.1f} ms  {name}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules shown")
+    args = parser.parse_args()
+
+    result = run(args.module, args.runs, args.top)
+    sys.exit(0 if result["seconds"] <= IMPORT_BUDGET_SECONDS else 1)
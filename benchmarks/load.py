@@ -0,0 +1,399 @@
+"""Load test the API end to end with simulated users over httpx.
+
+Usage::
+
+    # In process over ASGI, with analyses run inline by eager Celery:
+    python -m benchmarks.load --celery eager --users 20 --duration 30
+    # In process, with a Celery worker thread on an in-memory broker:
+    python -m benchmarks.load --celery memory --mix upload=1,read=4,refresh=1
+    # Against a running server and its own workers:
+    python -m benchmarks.load --url http://localhost:8000 \
+        --email user@example.com --password ... --celery broker
+
+Every simulated user logs in through ``/auth/login`` and then, until the
+duration is over, picks its next request from ``--mix``: uploading an ECG
+(``POST /ecg``), reading one of its uploads back (``GET /ecg/{id}``) or
+refreshing its access token (``GET /auth/refresh``). Uploads are synthetic
+recordings (see :mod:`benchmarks.synthetic`) sent as JSON or binary frames.
+Latency percentiles and throughput are reported per request type.
+
+In process, the client and the API share one event loop, so the ceiling
+found includes the client's own cost; point ``--url`` at a server on
+another machine for release numbers. Without ``--email`` the in-process
+target runs as a throwaway user, removed with its ECGs afterwards, and
+migrates the database to head if it is behind.
+
+``--celery`` decides what happens to the analyses uploads enqueue: ``eager``
+runs them inside the upload request, ``memory`` hands them to a worker
+thread over an in-memory broker, and ``broker`` leaves Celery as configured.
+Neither of the first two needs RabbitMQ.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from argparse import ArgumentParser
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import date
+from typing import AsyncIterator, Iterator
+
+import httpx
+import numpy as np
+from sqlalchemy import delete
+
+from app.api.responses import dumps
+from app.celery.dispatch import load_worker
+from app.core.config import settings
+from app.core.signal_stream import FRAMES_MEDIA_TYPE, encode_frames
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.user import UserService
+from benchmarks.suite import environment
+from benchmarks.synthetic import Recording, generate_leads
+from scripts.migrate import migrate
+
+OPERATIONS = ("upload", "read", "refresh")
+CELERY_MODES = ("eager", "memory", "broker")
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Credentials:
+    email: str
+    password: str
+
+
+@dataclass
+class Upload:
+    """A prepared ``POST /ecg`` request."""
+
+    content: bytes
+    content_type: str
+    params: dict = field(default_factory=dict)
+
+
+@dataclass
+class LoadStats:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    statuses: dict[str, Counter] = field(default_factory=dict)
+
+    def record(self, operation: str, seconds: float, status: int) -> None:
+        self.latencies.setdefault(operation, []).append(seconds)
+        self.statuses.setdefault(operation, Counter())[status] += 1
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parse ``upload=1,read=4,refresh=1`` into request weights."""
+    mix = {}
+    for item in text.split(","):
+        operation, _, weight = item.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}, expected {OPERATIONS}")
+        mix[operation] = float(weight) if weight else 1.0
+    if sum(mix.values()) <= 0:
+        raise ValueError("The request mix needs a positive weight")
+    return mix
+
+
+def make_upload(recording: Recording, frames: bool, seed: int = 0) -> Upload:
+    leads = generate_leads(recording, seed)
+    if frames:
+        return Upload(
+            encode_frames((name, signal, None) for name, signal in leads.items()),
+            FRAMES_MEDIA_TYPE,
+            {"date": date.today().isoformat()},
+        )
+    content = dumps(
+        {
+            "date": date.today(),
+            "leads": [
+                {"name": name, "signal": signal} for name, signal in leads.items()
+            ],
+        }
+    )
+    return Upload(content, "application/json")
+
+
+def summarize(stats: LoadStats, seconds: float) -> dict[str, dict]:
+    """Latency percentiles in milliseconds and throughput per operation."""
+    report = {}
+    everything = [
+        latency
+        for operation, latencies in stats.latencies.items()
+        if operation != "login"
+        for latency in latencies
+    ]
+    for operation, latencies in [*stats.latencies.items(), ("total", everything)]:
+        if not latencies:
+            continue
+        statuses = (
+            stats.statuses[operation]
+            if operation != "total"
+            else sum((c for o, c in stats.statuses.items() if o != "login"), Counter())
+        )
+        p50, p95, p99 = np.percentile(latencies, PERCENTILES) * 1000
+        report[operation] = {
+            "requests": len(latencies),
+            "errors": sum(n for status, n in statuses.items() if status >= 400),
+            "statuses": {str(status): n for status, n in sorted(statuses.items())},
+            "requests_per_second": (
+                len(latencies) / seconds if operation != "login" else None
+            ),
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "max_ms": max(latencies) * 1000,
+        }
+    return report
+
+
+async def _timed(stats: LoadStats, operation: str, request) -> httpx.Response:
+    start = time.perf_counter()
+    response = await request
+    stats.record(operation, time.perf_counter() - start, response.status_code)
+    return response
+
+
+async def login(
+    client: httpx.AsyncClient, credentials: Credentials, stats: LoadStats
+) -> dict:
+    response = await _timed(
+        stats,
+        "login",
+        client.post(
+            f"{settings.API_V1_STR}/auth/login",
+            data={"username": credentials.email, "password": credentials.password},
+        ),
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def simulated_user(
+    client: httpx.AsyncClient,
+    tokens: dict,
+    mix: dict[str, float],
+    upload: Upload,
+    accept: str,
+    deadline: float,
+    stats: LoadStats,
+    rng: random.Random,
+) -> None:
+    operations, weights = list(mix), list(mix.values())
+    access_token = tokens["access_token"]
+    ecg_ids: list[str] = []
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        if operation == "read" and not ecg_ids:
+            operation = "upload"
+        headers = {"Authorization": f"Bearer {access_token}", "Accept": accept}
+        if operation == "upload":
+            response = await _timed(
+                stats,
+                operation,
+                client.post(
+                    f"{settings.API_V1_STR}/ecg",
+                    content=upload.content,
+                    params=upload.params,
+                    headers={**headers, "Content-Type": upload.content_type},
+                ),
+            )
+            if response.status_code == 200:
+                ecg_ids.append(response.headers.get("ECG-Id") or response.json()["id"])
+        elif operation == "read":
+            await _timed(
+                stats,
+                operation,
+                client.get(
+                    f"{settings.API_V1_STR}/ecg/{rng.choice(ecg_ids)}",
+                    headers=headers,
+                ),
+            )
+        else:
+            response = await _timed(
+                stats,
+                operation,
+                client.get(
+                    f"{settings.API_V1_STR}/auth/refresh",
+                    headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+                ),
+            )
+            if response.status_code == 200:
+                access_token = response.json()["access_token"]
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    credentials: Credentials,
+    users: int,
+    duration: float,
+    mix: dict[str, float],
+    upload: Upload,
+    accept: str = "application/json",
+    seed: int = 0,
+) -> dict:
+    """Log ``users`` simulated users in and replay ``mix`` for ``duration``."""
+    stats = LoadStats()
+    sessions = await asyncio.gather(
+        *(login(client, credentials, stats) for _ in range(users))
+    )
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            simulated_user(
+                client,
+                tokens,
+                mix,
+                upload,
+                accept,
+                start + duration,
+                stats,
+                random.Random(seed + index),
+            )
+            for index, tokens in enumerate(sessions)
+        )
+    )
+    return summarize(stats, time.perf_counter() - start)
+
+
+@contextmanager
+def celery_mode(mode: str) -> Iterator[None]:
+    """Configure where the analyses enqueued by uploads run."""
+    if mode == "broker":
+        yield
+        return
+
+    from app.celery.runtime import runtime
+
+    celery_app = load_worker().celery_app
+    celery_app.conf.update(result_backend="cache+memory://")
+    try:
+        if mode == "eager":
+            celery_app.conf.update(task_always_eager=True)
+            yield
+        else:
+            from celery.contrib.testing.worker import start_worker
+
+            celery_app.conf.update(broker_url="memory://")
+            with start_worker(celery_app, perform_ping_check=False):
+                yield
+    finally:
+        runtime.stop()
+
+
+@asynccontextmanager
+async def api_client(url: str | None) -> AsyncIterator[httpx.AsyncClient]:
+    """A client for the server at ``url``, or for the app in this process."""
+    if url is not None:
+        async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadtest",
+            timeout=None,
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def throwaway_user() -> AsyncIterator[Credentials]:
+    await asyncio.to_thread(migrate)
+    credentials = Credentials(
+        f"load_{uuid.uuid4().hex[:8]}@example.com", f"Load-{uuid.uuid4().hex}"
+    )
+    async with AsyncSessionLocal() as session:
+        user = await UserService(session).create(
+            UserCreate(email=credentials.email, password=credentials.password)
+        )
+    try:
+        yield credentials
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
+
+async def run(args) -> dict:
+    upload = make_upload(
+        Recording(args.rate, args.recording), args.format == "frames", args.seed
+    )
+    accept = FRAMES_MEDIA_TYPE if args.format == "frames" else "application/json"
+    mix = parse_mix(args.mix)
+    async with api_client(args.url) as client:
+        async with (
+            nullcontext(Credentials(args.email, args.password))
+            if args.email
+            else throwaway_user()
+        ) as credentials:
+            return await run_load(
+                client,
+                credentials,
+                args.users,
+                args.duration,
+                mix,
+                upload,
+                accept,
+                args.seed,
+            )
+
+
+def print_report(report: dict[str, dict]) -> None:
+    for operation, result in report.items():
+        throughput = result["requests_per_second"]
+        print(
+            f"{operation:<8} {result['requests']:>7} requests {result['errors']:>5} errors "
+            + (f"{throughput:>8.1f} req/s " if throughput is not None else " " * 15)
+            + " ".join(f"p{p} {result[f'p{p}_ms']:>8.1f} ms" for p in PERCENTILES)
+            + f" max {result['max_ms']:>8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Server to load; the app in process if omitted")
+    parser.add_argument("--email", help="Account the simulated users log in as")
+    parser.add_argument("--password")
+    parser.add_argument("--celery", choices=CELERY_MODES, default="eager")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--mix", default="upload=1,read=4,refresh=1")
+    parser.add_argument("--format", choices=("json", "frames"), default="json")
+    parser.add_argument("--rate", type=int, default=500, help="Upload sample rate")
+    parser.add_argument("--recording", default="10s", help="Upload duration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+    if args.url is not None and not (args.email and args.password):
+        parser.error("--url needs --email and --password")
+
+    with celery_mode(args.celery):
+        report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "environment": environment(),
+                    "settings": {
+                        key: value
+                        for key, value in vars(args).items()
+                        if key != "password"
+                    },
+                    "results": report,
+                },
+                f,
+                indent=2,
+            )
+    sys.exit(0 if all(r["errors"] == 0 for r in report.values()) else 1)
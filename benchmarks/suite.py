@@ -0,0 +1,266 @@
+"""Time ingestion, analysis and retrieval of synthetic 12-lead ECGs.
+
+Usage::
+
+    python -m benchmarks.suite --dsn postgresql+asyncpg://... \
+        --rates 250 500 1000 --durations 10s 5m 1h --repeat 3 \
+        --output results.json --baseline baseline.json --threshold 0.25
+
+Every recording of the rate x duration matrix goes through the path an
+upload takes: ``ECGService.create``, ``get_by_id`` with the signals in a
+fresh session, the zero-crossing kernel on its own, ``analyze_ecg`` with a
+cold cache, and rendering the GET response as JSON and as binary frames.
+Recordings are generated from ``--seed`` (see :mod:`benchmarks.synthetic`);
+the first sample of every repetition is salted so the signal hash cache
+never short-circuits the analysis. 24 h recordings are only run when asked
+for, they need several GiB of memory.
+
+Results and the environment they were measured in are written as JSON.
+Given ``--baseline``, a previous output, cases whose median got slower by
+more than ``--threshold`` are reported and the exit status is 1.
+"""
+
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+
+import numpy as np
+import orjson
+from sqlalchemy import delete
+
+from app.analysis.cache import analysis_results
+from app.analysis.zero_crossings import count_zero_crossings
+from app.api.responses import (
+    SignalJSONResponse,
+    ecg_frames_response,
+    ecg_task_content,
+)
+from app.core.config import settings
+from app.db.session import create_db_engine, create_session_factory
+from app.models.user import User
+from app.schemas.ecg import CeleryTaskStatus
+from app.services.ecg import ECGLoad, ECGService
+from benchmarks.bench_startup import ROOT
+from benchmarks.synthetic import RATES, Recording, generate_leads, make_ecg_create
+from scripts.migrate import migrate
+
+CASES = (
+    "create",
+    "get_by_id",
+    "kernel",
+    "analyze",
+    "serialize_json",
+    "serialize_frames",
+)
+DEFAULT_DURATIONS = ("10s", "5m", "1h")
+
+
+def summarize(case: str, recording: Recording, seconds: list[float]) -> dict:
+    samples = recording.samples * 12
+    median = statistics.median(seconds)
+    return {
+        "case": case,
+        "recording": recording.label,
+        "rate": recording.rate,
+        "duration": recording.duration,
+        "samples": samples,
+        "runs": seconds,
+        "min_seconds": min(seconds),
+        "median_seconds": median,
+        "samples_per_second": samples / median if median else None,
+    }
+
+
+def result_key(result: dict) -> str:
+    return f"{result['case']} {result['recording']}"
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[dict]:
+    """Add the median change against ``baseline`` to every result.
+
+    Returns the results that got slower by more than ``threshold``, a
+    fraction of the baseline median. Cases missing from the baseline are
+    left alone.
+    """
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        change = result["median_seconds"] / before["median_seconds"] - 1
+        result["baseline_median_seconds"] = before["median_seconds"]
+        result["change"] = change
+        if change > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "orjson": orjson.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def salted(leads: dict, rng: np.random.Generator) -> dict:
+    """Copy ``leads`` with a random first sample, giving fresh signal hashes."""
+    copies = {name: signal.copy() for name, signal in leads.items()}
+    for signal in copies.values():
+        signal[0] = rng.integers(-32768, 32768)
+    return copies
+
+
+async def bench_recording(
+    session_factory, user_id: uuid.UUID, recording: Recording, repeat: int, seed: int
+) -> list[dict]:
+    leads = generate_leads(recording, seed)
+    salt = np.random.default_rng()
+    seconds: dict[str, list[float]] = {case: [] for case in CASES}
+
+    def timed(case: str, start: float) -> None:
+        seconds[case].append(time.perf_counter() - start)
+
+    for _ in range(repeat):
+        ecg_in = make_ecg_create(salted(leads, salt))
+        async with session_factory() as session:
+            start = time.perf_counter()
+            created = await ECGService(session).create(user_id, ecg_in)
+            timed("create", start)
+
+        async with session_factory() as session:
+            service = ECGService(session)
+            start = time.perf_counter()
+            ecg = await service.get_by_id(created.id, user_id, ECGLoad.FULL)
+            timed("get_by_id", start)
+
+            signals = [lead.signal for lead in ecg.leads]
+            start = time.perf_counter()
+            count_zero_crossings(signals)
+            timed("kernel", start)
+
+            analysis_results.clear()
+            start = time.perf_counter()
+            await service.analyze_ecg(ecg)
+            timed("analyze", start)
+
+            task = CeleryTaskStatus(task_id=ecg.task_id, status="SUCCESS")
+            start = time.perf_counter()
+            SignalJSONResponse(ecg_task_content(ecg, task))
+            timed("serialize_json", start)
+
+            start = time.perf_counter()
+            ecg_frames_response(ecg)
+            timed("serialize_frames", start)
+
+    results = [summarize(case, recording, seconds[case]) for case in CASES]
+    for result in results:
+        print(
+            f"{result['case']:<18} {recording.label:<12} "
+            f"{result['median_seconds'] * 1000:>10.1f} ms median "
+            f"{result['min_seconds'] * 1000:>10.1f} ms min "
+            f"{result['samples_per_second'] / 1e6:>9.1f} M samples/s"
+        )
+    return results
+
+
+async def run(
+    dsn: str, recordings: list[Recording], repeat: int, seed: int
+) -> list[dict]:
+    # Migrated rather than created from the models, so storage settings and
+    # other DDL only found in migrations apply to the measurements too.
+    await asyncio.to_thread(migrate, dsn)
+    engine = create_db_engine(dsn)
+    session_factory = create_session_factory(engine)
+
+    async with session_factory() as session:
+        user = User(
+            email=f"bench_{uuid.uuid4().hex[:8]}@example.com", hashed_password="-"
+        )
+        session.add(user)
+        await session.commit()
+
+    results = []
+    try:
+        for recording in recordings:
+            results += await bench_recording(
+                session_factory, user.id, recording, repeat, seed
+            )
+    finally:
+        async with session_factory() as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+        await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=str(settings.SQLALCHEMY_DATABASE_URI))
+    parser.add_argument("--rates", type=int, nargs="+", default=list(RATES))
+    parser.add_argument(
+        "--durations",
+        nargs="+",
+        default=list(DEFAULT_DURATIONS),
+        help="Recording lengths such as 10s, 5m, 1h or 24h",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Slowdown of the median, as a fraction, reported as a regression",
+    )
+    args = parser.parse_args()
+
+    recordings = [
+        Recording(rate, duration) for duration in args.durations for rate in args.rates
+    ]
+    report = {
+        "environment": environment(),
+        "settings": {"repeat": args.repeat, "seed": args.seed},
+        "results": asyncio.run(run(args.dsn, recordings, args.repeat, args.seed)),
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline, args.threshold)
+        report["baseline"] = baseline["environment"]
+        for result in regressions:
+            print(
+                f"REGRESSION {result_key(result)}: "
+                f"{result['baseline_median_seconds'] * 1000:.1f} ms -> "
+                f"{result['median_seconds'] * 1000:.1f} ms "
+                f"({result['change']:+.0%})"
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if regressions else 0)
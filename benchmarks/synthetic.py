@@ -0,0 +1,138 @@
+"""Synthetic 12-lead ECG recordings for benchmarks.
+
+Every beat is the sum of Gaussian P, QRS and T waves placed around R peaks
+whose spacing varies like a resting heart rate. Each lead weighs the three
+waves differently (aVR is inverted, V1 mostly negative, and so on). On top
+of that come baseline wander and measurement noise. Samples are int16
+microvolts, like the device uploads. The waveform is only realistic enough
+to give the zero-crossing kernel and the compression of stored signals
+representative work. Recordings are generated in chunks, so even 24 h at
+1 kHz does not need float temporaries for the whole recording.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from app.models.lead import LeadName
+from app.schemas.ecg import ECGCreate
+from app.schemas.lead import LeadCreate
+
+RATES = (250, 500, 1000)
+DURATIONS = ("10s", "5m", "1h", "24h")
+
+# (offset from the R peak, width, amplitude in microvolts), in seconds.
+WAVES = {
+    "P": [(-0.2, 0.025, 150.0)],
+    "QRS": [(-0.03, 0.01, -100.0), (0.0, 0.012, 1200.0), (0.03, 0.01, -250.0)],
+    "T": [(0.3, 0.06, 350.0)],
+}
+# Gain of the P, QRS and T waves in every lead.
+LEAD_GAINS = {
+    LeadName.I: (0.6, 0.6, 0.5),
+    LeadName.II: (1.0, 1.0, 0.9),
+    LeadName.III: (0.4, 0.4, 0.4),
+    LeadName.AVR: (-0.8, -0.8, -0.7),
+    LeadName.AVL: (0.2, 0.2, 0.1),
+    LeadName.AVF: (0.7, 0.7, 0.6),
+    LeadName.V1: (0.3, -0.6, -0.2),
+    LeadName.V2: (0.4, -0.3, 0.6),
+    LeadName.V3: (0.4, 0.4, 0.8),
+    LeadName.V4: (0.5, 1.1, 0.9),
+    LeadName.V5: (0.5, 1.0, 0.8),
+    LeadName.V6: (0.5, 0.8, 0.6),
+}
+WANDER_HZ = 0.3
+WANDER_UV = 50.0
+NOISE_UV = 10.0
+HEART_RATE_BPM = 72.0
+HEART_RATE_VARIABILITY = 0.05
+
+
+@dataclass(frozen=True)
+class Recording:
+    rate: int
+    duration: str
+
+    @property
+    def seconds(self) -> float:
+        return parse_duration(self.duration)
+
+    @property
+    def samples(self) -> int:
+        return int(self.rate * self.seconds)
+
+    @property
+    def label(self) -> str:
+        return f"{self.rate}Hz/{self.duration}"
+
+
+def parse_duration(text: str) -> float:
+    """Parse ``10s``, ``5m``, ``1h`` or ``24h`` into seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smh])", text)
+    if match is None:
+        raise ValueError(f"Invalid duration {text!r}, expected e.g. 10s, 5m or 1h")
+    value, unit = match.groups()
+    return float(value) * {"s": 1, "m": 60, "h": 3600}[unit]
+
+
+def _r_peaks(seconds: float, rng: np.random.Generator) -> np.ndarray:
+    mean_rr = 60.0 / HEART_RATE_BPM
+    # One spare beat on both sides keeps waves of the first and last beats whole.
+    count = int(seconds / mean_rr * 1.2) + 4
+    rr = mean_rr * (1 + HEART_RATE_VARIABILITY * rng.standard_normal(count))
+    return np.cumsum(np.clip(rr, 0.4, 1.5)) - 2 * mean_rr
+
+
+def _waves(t: np.ndarray, peaks: np.ndarray) -> dict[str, np.ndarray]:
+    """Evaluate every wave group around the R peaks before and after ``t``."""
+    after = np.searchsorted(peaks, t)
+    components = {name: np.zeros_like(t) for name in WAVES}
+    for neighbour in (peaks[after - 1], peaks[after]):
+        dt = t - neighbour
+        for name, waves in WAVES.items():
+            for offset, width, amplitude in waves:
+                components[name] += amplitude * np.exp(
+                    -0.5 * ((dt - offset) / width) ** 2
+                )
+    return components
+
+
+def generate_leads(
+    recording: Recording, seed: int = 0, chunk_samples: int = 1_000_000
+) -> dict[LeadName, np.ndarray]:
+    """Generate the 12 leads of ``recording`` as int16 microvolt arrays."""
+    rng = np.random.default_rng(seed)
+    peaks = _r_peaks(recording.seconds, rng)
+    wander_phase = rng.uniform(0, 2 * np.pi, len(LEAD_GAINS))
+    leads = {name: np.empty(recording.samples, dtype=np.int16) for name in LEAD_GAINS}
+    for start in range(0, recording.samples, chunk_samples):
+        stop = min(start + chunk_samples, recording.samples)
+        t = np.arange(start, stop) / recording.rate
+        components = _waves(t, peaks)
+        for index, (name, (p_gain, qrs_gain, t_gain)) in enumerate(LEAD_GAINS.items()):
+            signal = (
+                p_gain * components["P"]
+                + qrs_gain * components["QRS"]
+                + t_gain * components["T"]
+                + WANDER_UV * np.sin(2 * np.pi * WANDER_HZ * t + wander_phase[index])
+                + rng.normal(0, NOISE_UV, t.size)
+            )
+            leads[name][start:stop] = np.rint(signal)
+    return leads
+
+
+def make_ecg_create(
+    leads: dict[LeadName, np.ndarray], ecg_date: date | None = None
+) -> ECGCreate:
+    """Wrap generated leads in an ECGCreate without validating every sample,
+    the same way binary uploads are handed to the service."""
+    return ECGCreate.model_construct(
+        date=ecg_date or date.today(),
+        leads=[
+            LeadCreate.model_construct(name=name, signal=signal, sample_number=None)
+            for name, signal in leads.items()
+        ],
+    )
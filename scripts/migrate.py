@@ -0,0 +1,47 @@
+"""Upgrade the database to the Alembic head unless it is already there.
+
+Run on every container start: when the schema is current this costs one
+query instead of loading Alembic and every migration.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any
+
+# Add the project root to Python path
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from app.core.config import settings
+from app.core.notifications import asyncpg_dsn
+from app.db.migration_state import is_at_head
+
+
+def migrate(url: Any = None) -> None:
+    """Check the migration state and only run Alembic when it is behind.
+
+    ``url`` defaults to ``settings.SQLALCHEMY_DATABASE_URI``. Alembic runs its
+    own event loop, so this must not be called from a running one.
+    """
+    url = str(url or settings.SQLALCHEMY_DATABASE_URI)
+    if asyncio.run(is_at_head(asyncpg_dsn(url))):
+        print("Database is at head, skipping migrations")
+        return
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    # The ini parser treats % as interpolation.
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    command.upgrade(config, "head")
+
+
+def main() -> None:
+    migrate()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import pytest_asyncio
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from app.api.deps import get_user_cache
 from app.core.config import settings
 from app.core.security import (
     create_access_token,
@@ -19,7 +20,9 @@ from app.main import app
 from app.models.user import User
 
 engine = create_async_engine(str(settings.TEST_SQLALCHEMY_DATABASE_URI), echo=True)
-TestingSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = async_sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 
 # Configure pytest-asyncio
 pytest_plugins = ("pytest_asyncio",)
@@ -52,7 +55,7 @@ def mock_settings():
         "REDIS_HOST": "localhost",
         "REDIS_PORT": "6379",
         "CELERY_BROKER_URL": "memory://",
-        "CELERY_RESULT_BACKEND": "memory://",
+        "CELERY_RESULT_BACKEND": "cache+memory://",
     }
 
     with patch.dict("os.environ", test_settings, clear=False):
@@ -90,6 +93,8 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def setup_database():
     app.dependency_overrides[get_db] = override_db
+    # Requests run without the user cache unless a test enables it.
+    app.dependency_overrides[get_user_cache] = lambda: None
     """Create test database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
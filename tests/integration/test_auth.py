@@ -1,8 +1,16 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api import deps
+from app.api.deps import get_user_cache, user_cache
+from app.core.config import settings
+from app.core.notifications import asyncpg_dsn, user_events
+from app.core.rate_limit import TokenBucket
+from app.main import app
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.services.user import UserService
@@ -102,3 +110,110 @@ async def test_register_as_normal_user_fails(client: AsyncClient, authenticated_
     response = await client.post("/api/v1/auth/register", json=new_user_data, headers=headers)
     assert response.status_code == 403
     assert "Not enough permissions" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_user_cache_invalidated_on_change(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+    mocker,
+):
+    """Test that cached users skip the database until their row changes"""
+    user, access_token, _ = authenticated_user
+    mocker.patch.object(
+        user_events, "dsn", asyncpg_dsn(settings.TEST_SQLALCHEMY_DATABASE_URI)
+    )
+    get_by_email = mocker.spy(UserService, "get_by_email")
+    del app.dependency_overrides[get_user_cache]
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    try:
+        # Not cached until the listener, started in the background, is up.
+        response = await client.get("/api/v1/ecg", headers=headers)
+        assert response.status_code == 200
+        while not user_events.listening:
+            await asyncio.sleep(0.01)
+        for _ in range(2):
+            response = await client.get("/api/v1/ecg", headers=headers)
+            assert response.status_code == 200
+        assert get_by_email.call_count == 2
+        assert user_cache.get(user.email).id == user.id
+
+        user.is_admin = True
+        await db_session.commit()
+        for _ in range(100):
+            if user_cache.get(user.email) is None:
+                break
+            await asyncio.sleep(0.01)
+
+        response = await client.get("/api/v1/ecg", headers=headers)
+        assert response.status_code == 403
+        assert get_by_email.call_count == 3
+    finally:
+        app.dependency_overrides[get_user_cache] = lambda: None
+        await user_events.stop()
+        user_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_user_cache_unused_while_listener_down(mocker):
+    """Test that requests skip the cache instead of connecting the listener"""
+    mocker.patch.object(settings, "NOTIFICATIONS_RECONNECT_SECONDS", 0.01)
+    mocker.patch.object(user_events, "dsn", "postgresql://postgres@localhost:1/none")
+    start = mocker.spy(user_events, "start")
+
+    try:
+        assert await get_user_cache() is None
+        assert start.call_count == 0
+        while start.call_count < 2:
+            await asyncio.sleep(0.01)
+        assert await get_user_cache() is None
+        assert not user_events.listening
+    finally:
+        await user_events.stop()
+
+
+@pytest.mark.asyncio
+async def test_user_cache_skips_user_read_before_invalidation(
+    client: AsyncClient, authenticated_user: tuple[User, str, str], mocker
+):
+    """Test that a user changed while being read from the database is not cached"""
+    user, access_token, _ = authenticated_user
+    get_by_email = UserService.get_by_email
+
+    async def changed_during_query(self, email):
+        db_user = await get_by_email(self, email)
+        user_events.publish({"email": email})
+        return db_user
+
+    mocker.patch.object(UserService, "get_by_email", changed_during_query)
+    app.dependency_overrides[get_user_cache] = lambda: user_cache
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    try:
+        response = await client.get("/api/v1/ecg", headers=headers)
+        assert response.status_code == 200
+        assert user_cache.get(user.email) is None
+
+        mocker.patch.object(UserService, "get_by_email", get_by_email)
+        response = await client.get("/api/v1/ecg", headers=headers)
+        assert response.status_code == 200
+        assert user_cache.get(user.email).id == user.id
+    finally:
+        app.dependency_overrides[get_user_cache] = lambda: None
+        user_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited(client: AsyncClient, test_user: User, mocker):
+    """Test that logins beyond the admission rate are rejected with 429"""
+    mocker.patch.object(deps, "login_limiter", TokenBucket(rate=0.01, burst=1))
+    form = {"username": test_user.email, "password": "StrongPass123!"}
+
+    response = await client.post("/api/v1/auth/login", data=form)
+    assert response.status_code == 200
+
+    response = await client.post("/api/v1/auth/login", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.session import create_db_engine, warm_up_pool
+
+
+@pytest.mark.asyncio
+async def test_engine_built_from_settings(mocker):
+    """Test that pool sizing and echo come from the settings"""
+    mocker.patch.object(settings, "DB_POOL_SIZE", 3)
+    mocker.patch.object(settings, "DB_MAX_OVERFLOW", 1)
+    engine = create_db_engine(settings.TEST_SQLALCHEMY_DATABASE_URI)
+    try:
+        assert engine.echo is False
+        assert engine.pool.size() == 3
+        assert engine.pool._max_overflow == 1
+        assert engine.pool._pre_ping is True
+
+        await warm_up_pool(engine, 3)
+        assert engine.pool.checkedin() == 3
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pgbouncer_mode_disables_prepared_statement_cache(mocker):
+    """Test that PgBouncer mode leaves pooling to the bouncer and caches nothing"""
+    mocker.patch.object(settings, "DB_PGBOUNCER", True)
+    engine = create_db_engine(settings.TEST_SQLALCHEMY_DATABASE_URI)
+    try:
+        assert isinstance(engine.pool, NullPool)
+        await warm_up_pool(engine, 3)
+
+        async with engine.connect() as conn:
+            for _ in range(2):
+                result = await conn.execute(
+                    text("SELECT CAST(:x AS integer)"), {"x": 1}
+                )
+                assert result.scalar_one() == 1
+            raw = await conn.get_raw_connection()
+            asyncpg_connection = raw.driver_connection
+            assert asyncpg_connection._stmt_cache.get_max_size() == 0
+    finally:
+        await engine.dispose()
@@ -1,9 +1,35 @@
+import asyncio
+import gzip
+import json
+import re
 from datetime import date
+from uuid import UUID, uuid4
 
+import numpy as np
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.analysis.cache import analysis_results, signal_hash
+from app.analysis.zero_crossings import count_zero_crossings
+from app.api.deps import get_ecg_events
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.notifications import NotificationHub, asyncpg_dsn, ecg_events
+from app.core.signal_stream import (
+    FRAMES_MAGIC,
+    FRAMES_MEDIA_TYPE,
+    encode_frame,
+    encode_frames,
+)
+from app.main import app
+from app.models.ecg import ECG, AnalysisStatus
+from app.models.lead import LeadName
+from app.models.lead_signal_chunk import LeadSignalChunk
 from app.models.user import User
+from app.schemas.ecg import CeleryTaskStatus, ECGCreate
+from app.services.ecg import ECGService
 
 
 @pytest.mark.parametrize("test_data,expected_status", [
@@ -67,3 +93,802 @@ async def test_admin_cannot_create_ecg(client: AsyncClient, authenticated_admin_
     response = await client.post("/api/v1/ecg", json=test_data, headers=headers)
     assert response.status_code == 403
     assert "Not enough permissions" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_ecg(
+    client: AsyncClient, authenticated_user: tuple[User, str, str], mocker
+):
+    """Test that an uploaded ECG is stored and returned with its signals"""
+    user, access_token, _ = authenticated_user
+    analyze = mocker.patch("app.api.v1.endpoints.ecg.analyze_ecg_task")
+    result_backend = mocker.patch("app.services.ecg.get_task_state")
+
+    test_data = {
+        "leads": [
+            {"name": "I", "signal": [1, -2, 3, -4, 5], "sample_number": 250},
+            {"name": "aVR", "signal": [100000, -100000, 0]},
+        ],
+        "date": date.today().isoformat(),
+    }
+
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = await client.post("/api/v1/ecg", json=test_data, headers=headers)
+    assert response.status_code == 200
+    created = response.json()
+    assert {lead["name"]: lead["signal"] for lead in created["leads"]} == {
+        "I": [1, -2, 3, -4, 5],
+        "aVR": [100000, -100000, 0],
+    }
+
+    response = await client.get(f"/api/v1/ecg/{created['id']}", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    task_id = body["task"]["task_id"]
+    assert body["task"]["status"] == "PENDING"
+    assert body["task"]["queued_at"] is not None
+    result_backend.assert_not_called()
+    analyze.assert_called_once_with(UUID(created["id"]), user.id, UUID(task_id))
+    assert {lead["name"]: lead["signal"] for lead in body["ecg"]["leads"]} == {
+        "I": [1, -2, 3, -4, 5],
+        "aVR": [100000, -100000, 0],
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_ecg_rejects_samples_outside_int32(
+    client: AsyncClient, authenticated_user: tuple[User, str, str]
+):
+    """Test that a sample too large to store is a validation error, not a 500"""
+    _, access_token, _ = authenticated_user
+    response = await client.post(
+        "/api/v1/ecg",
+        json={
+            "date": date.today().isoformat(),
+            "leads": [{"name": "I", "signal": [1, 2**31]}],
+        },
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_retry_keeps_analysis_queued_at(
+    test_user: User, db_session: AsyncSession
+):
+    """Test that requeueing for a retry keeps the time the upload was queued"""
+    ecg_service = ECGService(db_session)
+    ecg = await ecg_service.create(
+        test_user.id,
+        ECGCreate(date=date.today(), leads=[{"name": "I", "signal": [1, -1]}]),
+    )
+    queued_at = ecg.analysis_queued_at
+
+    await ecg_service.set_analysis_status(ecg.id, AnalysisStatus.STARTED)
+    assert await ecg_service.set_analysis_status(
+        ecg.id, AnalysisStatus.QUEUED
+    ) == queued_at
+    assert await ecg_service.set_analysis_status(
+        ecg.id, AnalysisStatus.STARTED
+    ) == queued_at
+
+
+@pytest.mark.asyncio
+async def test_get_ecg_analysis_and_status_skip_signals(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+):
+    """Test that the analysis and status endpoints never read sample data"""
+    user, access_token, _ = authenticated_user
+    ecg_service = ECGService(db_session)
+    ecg = await ecg_service.create(
+        user.id,
+        ECGCreate(date=date.today(), leads=[{"name": "I", "signal": [1, -1, 1]}]),
+    )
+    await ecg_service.analyze_ecg(await ecg_service.get_by_id(ecg.id, user.id))
+    await ecg_service.set_analysis_status(ecg.id, AnalysisStatus.SUCCEEDED)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = await client.get(f"/api/v1/ecg/{ecg.id}/analysis", headers=headers)
+    assert response.status_code == 200
+    [lead] = response.json()["leads"]
+    assert (lead["name"], lead["analysis"]["result"]) == ("I", 2)
+    assert "signal" not in lead
+
+    response = await client.get(f"/api/v1/ecg/{ecg.id}/status", headers=headers)
+    body = response.json()
+    assert (body["task_id"], body["status"]) == (str(ecg.task_id), "SUCCESS")
+    assert body["started_at"] is None
+    assert body["finished_at"] is not None
+
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert statements
+    assert not any(re.search(r"lead\.signal\b", sql) for sql in statements)
+
+
+@pytest.mark.asyncio
+async def test_get_analysis_status_falls_back_to_result_backend(
+    db_session: AsyncSession, test_user: User, mocker
+):
+    """Test that ECGs without a stored status ask the result backend in a thread"""
+    result_backend = mocker.patch(
+        "app.services.ecg.get_task_state", return_value="STARTED"
+    )
+    to_thread = mocker.spy(asyncio, "to_thread")
+    ecg_service = ECGService(db_session)
+    ecg = await ecg_service.create(
+        test_user.id,
+        ECGCreate(date=date.today(), leads=[{"name": "I", "signal": [1]}]),
+    )
+    ecg.analysis_status = None
+
+    status = await ecg_service.get_analysis_status(ecg)
+
+    assert status == CeleryTaskStatus(task_id=ecg.task_id, status="STARTED")
+    result_backend.assert_called_once_with(ecg.task_id)
+    to_thread.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_stream_ecg_events(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+):
+    """Test that status changes are pushed over SSE until every ECG finished"""
+    user, access_token, _ = authenticated_user
+    ecg_service = ECGService(db_session)
+    ecgs = await ecg_service.create_many(
+        user.id,
+        [
+            ECGCreate(date=date.today(), leads=[{"name": "I", "signal": [1]}])
+            for _ in range(2)
+        ],
+    )
+    await ecg_service.set_analysis_status(ecgs[1].id, AnalysisStatus.SUCCEEDED)
+    hub = NotificationHub(
+        asyncpg_dsn(settings.TEST_SQLALCHEMY_DATABASE_URI),
+        settings.ECG_EVENTS_CHANNEL,
+        key="ecg_id",
+    )
+    app.dependency_overrides[get_ecg_events] = lambda: hub
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    request = asyncio.create_task(
+        client.get(
+            "/api/v1/ecg/events",
+            params={"ids": [str(ecg.id) for ecg in ecgs]},
+            headers=headers,
+        )
+    )
+    while str(ecgs[0].id) not in hub._subscriptions:
+        await asyncio.sleep(0.01)
+    await ecg_service.set_analysis_status(ecgs[0].id, AnalysisStatus.STARTED)
+    await ecg_service.set_analysis_status(ecgs[0].id, AnalysisStatus.FAILED)
+    response = await asyncio.wait_for(request, 10)
+    missing = await client.get(
+        "/api/v1/ecg/events", params={"ids": [str(uuid4())]}, headers=headers
+    )
+
+    del app.dependency_overrides[get_ecg_events]
+    await hub.stop()
+    assert missing.status_code == 404
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        json.loads(line.removeprefix("data: "))
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert sorted(events[:2], key=lambda e: e["status"]) == [
+        {"ecg_id": str(ecgs[0].id), "status": "PENDING"},
+        {"ecg_id": str(ecgs[1].id), "status": "SUCCESS"},
+    ]
+    assert events[2:] == [
+        {"ecg_id": str(ecgs[0].id), "status": "STARTED"},
+        {"ecg_id": str(ecgs[0].id), "status": "FAILURE"},
+    ]
+    assert hub._subscriptions == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_ecg_events_unavailable_without_listener(
+    client: AsyncClient, authenticated_user: tuple[User, str, str], mocker
+):
+    """Test that events are refused when there is no connection to LISTEN on"""
+    _, access_token, _ = authenticated_user
+    mocker.patch.object(ecg_events, "dsn", None)
+
+    response = await client.get(
+        "/api/v1/ecg/events",
+        params={"ids": [str(uuid4())]},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_ecg_events_resync_after_listener_terminated(
+    test_user: User, db_session: AsyncSession, mocker
+):
+    """Test that a terminated listener reconnects and resyncs its subscriptions"""
+    mocker.patch.object(settings, "NOTIFICATIONS_RECONNECT_SECONDS", 0.01)
+    ecg_service = ECGService(db_session)
+    ecg = await ecg_service.create(
+        test_user.id, ECGCreate(date=date.today(), leads=[{"name": "I", "signal": [1]}])
+    )
+    reconnected = mocker.Mock()
+
+    async def resync(ecg_ids: list[str]) -> list[dict]:
+        events = await ecg_service.get_status_events([UUID(i) for i in ecg_ids])
+        return [event.model_dump(mode="json") for event in events]
+
+    hub = NotificationHub(
+        asyncpg_dsn(settings.TEST_SQLALCHEMY_DATABASE_URI),
+        settings.ECG_EVENTS_CHANNEL,
+        key="ecg_id",
+    )
+    hub.set_resync(resync)
+    hub.add_reconnect_callback(reconnected)
+    subscription = await hub.subscribe([str(ecg.id)])
+    try:
+        # Changed without a notification, so only the resync can deliver it.
+        await db_session.execute(
+            update(ECG)
+            .where(ECG.id == ecg.id)
+            .values(analysis_status=AnalysisStatus.STARTED)
+        )
+        await db_session.commit()
+        pid = hub._connection.get_server_pid()
+        await db_session.execute(select(func.pg_terminate_backend(pid)))
+        await db_session.commit()
+
+        resynced = await asyncio.wait_for(subscription.get(), 10)
+        assert resynced == {"ecg_id": str(ecg.id), "status": "STARTED"}
+        assert hub.listening
+        assert hub._connection.get_server_pid() != pid
+        reconnected.assert_called_once_with()
+
+        await ecg_service.set_analysis_status(ecg.id, AnalysisStatus.SUCCEEDED)
+        event = await asyncio.wait_for(subscription.get(), 10)
+        assert event == {"ecg_id": str(ecg.id), "status": "SUCCESS"}
+    finally:
+        subscription.close()
+        await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_list_ecgs(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+):
+    """Test that ECGs are listed newest first with keyset pagination and filters"""
+    user, access_token, _ = authenticated_user
+    ecgs = await ECGService(db_session).create_many(
+        user.id,
+        [
+            ECGCreate(date=date(2024, 1, day), leads=[{"name": "I", "signal": [1]}])
+            for day in (1, 2, 2, 3, 5)
+        ],
+    )
+    expected = [
+        str(ecg.id) for ecg in sorted(ecgs, key=lambda e: (e.date, e.id), reverse=True)
+    ]
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    pages, params = [], {"limit": 2}
+    while True:
+        response = await client.get("/api/v1/ecg", params=params, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        pages.append([item["id"] for item in body["items"]])
+        if body["next_cursor"] is None:
+            break
+        params["cursor"] = body["next_cursor"]
+    assert pages == [expected[:2], expected[2:4], expected[4:]]
+    assert "leads" not in body["items"][0]
+
+    response = await client.get(
+        "/api/v1/ecg",
+        params={"date_from": "2024-01-02", "date_to": "2024-01-03"},
+        headers=headers,
+    )
+    assert [item["id"] for item in response.json()["items"]] == expected[1:4]
+    assert response.json()["next_cursor"] is None
+
+    response = await client.get(
+        "/api/v1/ecg", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_analyze_ecg(db_session: AsyncSession, test_user: User):
+    """Test that analysis stores the zero-crossing count of every lead"""
+    ecg_service = ECGService(db_session)
+    ecg = await ecg_service.create(
+        test_user.id,
+        ECGCreate(
+            date=date.today(),
+            leads=[
+                {"name": "I", "signal": [1, -1, 0, -5, 3]},
+                {"name": "II", "signal": [0, 0, 0]},
+                {"name": "III", "signal": [-1, 2]},
+            ],
+        ),
+    )
+    ecg = await ecg_service.get_by_id(ecg.id, test_user.id)
+
+    ecg = await ecg_service.analyze_ecg(ecg)
+
+    assert {lead.name: lead.analysis.result for lead in ecg.leads} == {
+        "I": 4,
+        "II": 0,
+        "III": 1,
+    }
+
+    # Re-running the analysis, e.g. on a task retry, updates the results in place.
+    analysis_ids = {lead.analysis.id for lead in ecg.leads}
+    ecg = await ecg_service.analyze_ecg(ecg)
+    assert {lead.analysis.id for lead in ecg.leads} == analysis_ids
+
+
+@pytest.mark.asyncio
+async def test_analyze_ecg_reuses_identical_leads(
+    db_session: AsyncSession, test_user: User, mocker
+):
+    """Test that identical signals reuse stored results instead of recounting"""
+    ecg_service = ECGService(db_session)
+    rng = np.random.default_rng()
+    known = rng.integers(-1000, 1000, 64).tolist()
+    fresh = rng.integers(-1000, 1000, 64).tolist()
+    ecg_in = ECGCreate(date=date.today(), leads=[{"name": "I", "signal": known}])
+    first = await ecg_service.create(test_user.id, ecg_in)
+    await ecg_service.analyze_ecg(await ecg_service.get_by_id(first.id, test_user.id))
+    analysis_results.clear()
+
+    kernel = mocker.patch(
+        "app.services.ecg.count_zero_crossings", wraps=count_zero_crossings
+    )
+    second = await ecg_service.create(
+        test_user.id,
+        ECGCreate(
+            date=date.today(),
+            leads=[{"name": "I", "signal": known}, {"name": "II", "signal": fresh}],
+        ),
+    )
+    ecg = await ecg_service.analyze_ecg(
+        await ecg_service.get_by_id(second.id, test_user.id)
+    )
+
+    # Only the new lead is counted; the known one comes from the database.
+    kernel.assert_called_once()
+    assert [signal.tolist() for signal in kernel.call_args.args[0]] == [fresh]
+    assert {lead.name: lead.analysis.result for lead in ecg.leads} == {
+        "I": count_zero_crossings([known])[0],
+        "II": count_zero_crossings([fresh])[0],
+    }
+    assert analysis_results.get(signal_hash(known)) is not None
+    assert analysis_results.get(signal_hash(fresh)) is not None
+
+
+@pytest.mark.asyncio
+async def test_get_lead_samples(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+):
+    """Test that lead windows are sliced in the database and decimated"""
+    user, access_token, _ = authenticated_user
+    signal = [(-1) ** i * i for i in range(1000)]
+    ecg = await ECGService(db_session).create(
+        user.id,
+        ECGCreate(
+            date=date.today(),
+            leads=[{"name": "I", "signal": signal}, {"name": "aVR", "signal": [40000]}],
+        ),
+    )
+    headers = {"Authorization": f"Bearer {access_token}"}
+    url = f"/api/v1/ecg/{ecg.id}/leads/I/samples"
+
+    response = await client.get(url, params={"start": 10, "end": 20}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "name": "I",
+        "start": 10,
+        "end": 20,
+        "total_samples": 1000,
+        "bucket_size": 1,
+        "signal": signal[10:20],
+    }
+
+    response = await client.get(
+        url, params={"start": 100, "max_points": 10}, headers=headers
+    )
+    body = response.json()
+    assert (body["end"], body["bucket_size"]) == (1000, 180)
+    assert body["signal"][:2] == [min(signal[100:280]), max(signal[100:280])]
+    assert len(body["signal"]) == 10
+
+    response = await client.get(
+        f"/api/v1/ecg/{ecg.id}/leads/aVR/samples", params={"start": 5}, headers=headers
+    )
+    assert response.json()["signal"] == []
+    assert response.json()["total_samples"] == 1
+
+    response = await client.get(
+        f"/api/v1/ecg/{ecg.id}/leads/V1/samples", headers=headers
+    )
+    assert response.status_code == 404
+    response = await client.get(url, params={"start": 5, "end": 5}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_lead_samples_from_pyramid(
+    db_session: AsyncSession, test_user: User, mocker
+):
+    """Test that analysed leads serve overviews from their pyramid levels"""
+    mocker.patch.object(settings, "ECG_PYRAMID_MIN_BUCKETS", 16)
+    ecg_service = ECGService(db_session)
+    signal = np.random.default_rng().integers(-30000, 30000, 5000)
+    ecg = await ecg_service.create(
+        test_user.id,
+        ECGCreate(date=date.today(), leads=[{"name": "I", "signal": signal.tolist()}]),
+    )
+    await ecg_service.analyze_ecg(await ecg_service.get_by_id(ecg.id, test_user.id))
+    read_signal = mocker.spy(ecg_service, "_read_signal_window")
+
+    samples = await ecg_service.get_lead_samples(
+        ecg.id, test_user.id, LeadName.I, 1000, 4990, 20
+    )
+
+    # 3990 samples in 10 buckets need 399 per bucket: two buckets of the 256x
+    # level, with the window widened to that level's bucket boundaries.
+    read_signal.assert_not_called()
+    assert (samples.start, samples.end, samples.bucket_size) == (768, 5000, 512)
+    buckets = [signal[i : i + 512] for i in range(768, 5000, 512)]
+    expected = [value for b in buckets for value in (b.min(), b.max())]
+    assert samples.signal == expected
+    assert len(samples.signal) <= 20
+
+
+@pytest.mark.asyncio
+async def test_get_lead_samples_from_pyramid_fit_max_points(
+    db_session: AsyncSession, test_user: User, mocker
+):
+    """Test that random windows stay within max_points and cover the request"""
+    mocker.patch.object(settings, "ECG_PYRAMID_MIN_BUCKETS", 16)
+    ecg_service = ECGService(db_session)
+    rng = np.random.default_rng(0)
+    signal = rng.integers(-30000, 30000, 20_000)
+    ecg = await ecg_service.create(
+        test_user.id,
+        ECGCreate(date=date.today(), leads=[{"name": "I", "signal": signal.tolist()}]),
+    )
+    await ecg_service.analyze_ecg(await ecg_service.get_by_id(ecg.id, test_user.id))
+
+    for _ in range(300):
+        start, end = sorted(rng.choice(signal.size + 1, 2, replace=False).tolist())
+        max_points = int(rng.integers(2, 200))
+        samples = await ecg_service.get_lead_samples(
+            ecg.id, test_user.id, LeadName.I, start, end, max_points
+        )
+
+        assert len(samples.signal) <= max_points, (start, end, max_points)
+        assert samples.start <= start and end <= samples.end
+        if samples.bucket_size > 1:
+            window = signal[samples.start : samples.end]
+            assert min(samples.signal) == window.min()
+            assert max(samples.signal) == window.max()
+
+
+@pytest.mark.parametrize("content_type,body", [
+    (
+        "application/x-ndjson",
+        b'{"name": "I", "signal": [1, -2, 3], "sample_number": 250, "dtype": "int16"}\n'
+        b'{"name": "II", "signal": [70000, -1]}\n'
+        b'{"name": "I", "signal": [-4, 5, -6, 7], "dtype": "int16"}\n',
+    ),
+    (
+        "application/vnd.ecg-frames",
+        FRAMES_MAGIC
+        + encode_frame(LeadName.I, np.array([1, -2, 3], dtype=np.int16), 250)
+        + encode_frame(LeadName.II, np.array([70000, -1], dtype=np.int32))
+        + encode_frame(LeadName.I, np.array([-4, 5, -6, 7], dtype=np.int16), 250),
+    ),
+])
+@pytest.mark.asyncio
+async def test_create_ecg_stream(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+    mocker,
+    content_type: str,
+    body: bytes,
+):
+    """Test that streamed chunks are appended to their leads in order"""
+    user, access_token, _ = authenticated_user
+    mocker.patch.object(settings, "ECG_STREAM_BUFFER_SAMPLES", 2)
+    analyze = mocker.patch("app.api.v1.endpoints.ecg.analyze_ecg_task")
+
+    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": content_type}
+    response = await client.post(
+        "/api/v1/ecg/stream",
+        params={"date": date.today().isoformat()},
+        content=body,
+        headers=headers,
+    )
+    assert response.status_code == 200
+    created = response.json()
+    analyze.assert_called_once_with(UUID(created["id"]), user.id, UUID(created["task_id"]))
+
+    ecg = await ECGService(db_session).get_by_id(UUID(created["id"]), user.id)
+    assert {lead.name: lead.signal.tolist() for lead in ecg.leads} == {
+        "I": [1, -2, 3, -4, 5, -6, 7],
+        "II": [70000, -1],
+    }
+    assert {lead.name: lead.sample_number for lead in ecg.leads} == {"I": 250, "II": None}
+    for lead in ecg.leads:
+        assert lead.signal_hash == signal_hash(lead.signal)
+    chunks = await db_session.scalar(select(func.count()).select_from(LeadSignalChunk))
+    assert chunks == 0
+
+
+@pytest.mark.asyncio
+async def test_signal_hash_ignores_upload_format(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+    mocker,
+):
+    """Test that the same samples hash the same sent as JSON or as int32 NDJSON"""
+    user, access_token, _ = authenticated_user
+    mocker.patch("app.api.v1.endpoints.ecg.analyze_ecg_task")
+    signal = [1, -2, 3, -4]
+    headers = {"Authorization": f"Bearer {access_token}"}
+    params = {"date": date.today().isoformat()}
+
+    from_json = await client.post(
+        "/api/v1/ecg",
+        json={**params, "leads": [{"name": "I", "signal": signal}]},
+        headers=headers,
+    )
+    from_stream = await client.post(
+        "/api/v1/ecg/stream",
+        params=params,
+        content=json.dumps({"name": "I", "signal": signal, "dtype": "int32"}),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    hashes = [
+        (await ECGService(db_session).get_by_id(UUID(r.json()["id"]), user.id))
+        .leads[0]
+        .signal_hash
+        for r in (from_json, from_stream)
+    ]
+    assert hashes[0] == hashes[1] == signal_hash(signal)
+
+
+@pytest.mark.parametrize("content_type,body,expected_status", [
+    ("application/json", b"{}", 415),
+    ("application/x-ndjson", b"", 422),
+    ("application/x-ndjson", b'{"name": "I", "signal": [1, "a"]}\n', 422),
+    ("application/vnd.ecg-frames", FRAMES_MAGIC + b"\0", 422),
+])
+@pytest.mark.asyncio
+async def test_create_ecg_stream_invalid(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    content_type: str,
+    body: bytes,
+    expected_status: int,
+):
+    """Test that unsupported or malformed streams are rejected"""
+    _, access_token, _ = authenticated_user
+    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": content_type}
+    response = await client.post(
+        "/api/v1/ecg/stream",
+        params={"date": date.today().isoformat()},
+        content=body,
+        headers=headers,
+    )
+    assert response.status_code == expected_status
+
+
+@pytest.mark.asyncio
+async def test_create_ecg_batch(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    db_session: AsyncSession,
+    mocker,
+):
+    """Test that a batch is stored in one go and analysed with one grouped dispatch"""
+    user, access_token, _ = authenticated_user
+    analyze = mocker.patch("app.api.v1.endpoints.ecg.analyze_ecgs_task")
+    test_data = {
+        "ecgs": [
+            {
+                "leads": [{"name": "I", "signal": [i, -i, i]}],
+                "date": date.today().isoformat(),
+            }
+            for i in range(1, 4)
+        ],
+    }
+
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = await client.post("/api/v1/ecg/batch", json=test_data, headers=headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert len(items) == 3
+    assert len({item["task_id"] for item in items}) == 3
+
+    analyze.assert_called_once()
+    dispatched, dispatched_user_id = analyze.call_args.args
+    assert dispatched_user_id == user.id
+    assert [(str(e.id), str(e.task_id)) for e in dispatched] == [
+        (item["id"], item["task_id"]) for item in items
+    ]
+
+    ecg_service = ECGService(db_session)
+    for i, item in enumerate(items, start=1):
+        ecg = await ecg_service.get_by_id(UUID(item["id"]), user.id)
+        assert str(ecg.task_id) == item["task_id"]
+        assert [lead.signal.tolist() for lead in ecg.leads] == [[i, -i, i]]
+
+
+@pytest.mark.asyncio
+async def test_create_ecg_batch_empty(
+    client: AsyncClient, authenticated_user: tuple[User, str, str]
+):
+    """Test that an empty batch is rejected"""
+    _, access_token, _ = authenticated_user
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = await client.post("/api/v1/ecg/batch", json={"ecgs": []}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_ecg_frames(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    mocker,
+):
+    """Test that ECGs can be uploaded and downloaded as binary frames"""
+    _, access_token, _ = authenticated_user
+    mocker.patch("app.api.v1.endpoints.ecg.analyze_ecg_task")
+    body = encode_frames(
+        [
+            (LeadName.I, np.array([1, -2, 3], dtype=np.int16), 250),
+            (LeadName.AVR, np.array([100000, -100000], dtype=np.int32), None),
+        ]
+    )
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": FRAMES_MEDIA_TYPE,
+    }
+
+    response = await client.post(
+        "/api/v1/ecg", params={"date": "2024-03-01"}, content=body, headers=headers
+    )
+    assert response.status_code == 200
+    created = response.json()
+    assert created["date"] == "2024-03-01"
+    assert {lead["name"]: lead["signal"] for lead in created["leads"]} == {
+        "I": [1, -2, 3],
+        "aVR": [100000, -100000],
+    }
+
+    headers["Accept"] = FRAMES_MEDIA_TYPE
+    response = await client.get(f"/api/v1/ecg/{created['id']}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == FRAMES_MEDIA_TYPE
+    assert response.headers["ecg-id"] == created["id"]
+    assert response.headers["ecg-date"] == "2024-03-01"
+    assert response.content == body
+
+
+@pytest.mark.parametrize("params,content_type,body,detail", [
+    ({}, FRAMES_MEDIA_TYPE, FRAMES_MAGIC, "date query parameter"),
+    ({"date": "2024-03-01"}, FRAMES_MEDIA_TYPE, FRAMES_MAGIC, "any leads"),
+    ({"date": "2024-03-01"}, FRAMES_MEDIA_TYPE, b"NOPE", "ECGF"),
+    ({}, "application/json", b'{"leads": []}', [{"loc": ["body", "date"]}]),
+    ({}, "application/json", b"{", [{"loc": ["body", 1]}]),
+    ({}, "application/json", b"", [{"loc": ["body"]}]),
+])
+@pytest.mark.asyncio
+async def test_create_ecg_invalid_body(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    params: dict,
+    content_type: str,
+    body: bytes,
+    detail,
+):
+    """Test that malformed JSON and frame uploads are rejected with 422"""
+    _, access_token, _ = authenticated_user
+    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": content_type}
+    response = await client.post(
+        "/api/v1/ecg", params=params, content=body, headers=headers
+    )
+    assert response.status_code == 422
+    if isinstance(detail, str):
+        assert detail in response.json()["detail"]
+    else:
+        assert [
+            {"loc": error["loc"]} for error in response.json()["detail"]
+        ] == detail
+
+
+@pytest.mark.asyncio
+async def test_compressed_upload_and_download(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    mocker,
+):
+    """Test that gzip request bodies are inflated and large responses compressed"""
+    _, access_token, _ = authenticated_user
+    mocker.patch("app.api.v1.endpoints.ecg.analyze_ecg_task")
+    signal = list(range(-2000, 2000))
+    test_data = {"leads": [{"name": "I", "signal": signal}], "date": "2024-03-01"}
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+        "Content-Encoding": "gzip",
+        "Accept-Encoding": "gzip",
+    }
+
+    response = await client.post(
+        "/api/v1/ecg",
+        content=gzip.compress(json.dumps(test_data).encode()),
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json()["leads"][0]["signal"] == signal
+
+
+def compression_middleware() -> CompressionMiddleware:
+    if app.middleware_stack is None:
+        app.middleware_stack = app.build_middleware_stack()
+    layer = app.middleware_stack
+    while not isinstance(layer, CompressionMiddleware):
+        layer = layer.app
+    return layer
+
+
+@pytest.mark.parametrize("content_encoding,body,expected_status", [
+    ("br", b"{}", 415),
+    ("gzip", gzip.compress(b" " * 2048), 413),
+])
+@pytest.mark.asyncio
+async def test_compressed_upload_rejected(
+    client: AsyncClient,
+    authenticated_user: tuple[User, str, str],
+    mocker,
+    content_encoding: str,
+    body: bytes,
+    expected_status: int,
+):
+    """Test that unknown codings and oversized bodies are refused"""
+    _, access_token, _ = authenticated_user
+    mocker.patch.object(compression_middleware(), "max_request_size", 1024)
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+        "Content-Encoding": content_encoding,
+    }
+    response = await client.post("/api/v1/ecg", content=body, headers=headers)
+    assert response.status_code == expected_status
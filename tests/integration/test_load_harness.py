@@ -0,0 +1,69 @@
+import pytest
+from httpx import AsyncClient
+
+from app.models.user import User
+from benchmarks.load import (
+    Credentials,
+    LoadStats,
+    make_upload,
+    parse_mix,
+    run_load,
+    summarize,
+)
+from benchmarks.synthetic import Recording
+
+
+def test_parse_mix():
+    """Test that request mixes are parsed into weights"""
+    assert parse_mix("upload=1,read=4,refresh") == {
+        "upload": 1.0,
+        "read": 4.0,
+        "refresh": 1.0,
+    }
+    with pytest.raises(ValueError):
+        parse_mix("upload=1,delete=2")
+    with pytest.raises(ValueError):
+        parse_mix("read=0")
+
+
+def test_summarize_percentiles_and_errors():
+    """Test that latencies are reported per operation and in total, without logins"""
+    stats = LoadStats()
+    for latency in range(1, 101):
+        stats.record("read", latency / 1000, 200)
+    stats.record("upload", 0.5, 422)
+    stats.record("login", 2.0, 200)
+
+    report = summarize(stats, seconds=10)
+
+    assert report["read"]["p50_ms"] == pytest.approx(50.5)
+    assert report["read"]["p99_ms"] == pytest.approx(99.01)
+    assert report["read"]["requests_per_second"] == 10
+    assert report["upload"]["errors"] == 1
+    assert report["login"]["requests_per_second"] is None
+    assert report["total"]["requests"] == 101
+    assert report["total"]["statuses"] == {"200": 100, "422": 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("frames", [False, True])
+async def test_run_load(client: AsyncClient, test_user: User, mocker, frames):
+    """Test that simulated users log in, upload, read and refresh over ASGI"""
+    analyze = mocker.patch("app.api.v1.endpoints.ecg.analyze_ecg_task")
+    upload = make_upload(Recording(250, "1s"), frames)
+    accept = upload.content_type
+
+    report = await run_load(
+        client,
+        Credentials(test_user.email, "StrongPass123!"),
+        users=2,
+        duration=0.5,
+        mix=parse_mix("upload=1,read=2,refresh=1"),
+        upload=upload,
+        accept=accept,
+    )
+
+    assert report["login"]["requests"] == 2
+    assert report["total"]["errors"] == 0
+    assert report["upload"]["requests"] == analyze.call_count
+    assert report["total"]["requests"] >= 2
@@ -0,0 +1,102 @@
+import uuid
+from datetime import date
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import create_db_engine
+from app.models.user import User
+from app.schemas.ecg import ECGCreate
+from app.services.ecg import ECGLoad, ECGService
+
+pytestmark = pytest.mark.skipif(not metrics.enabled(), reason="METRICS_ENABLED is off")
+
+
+def sample(name: str, **labels) -> float:
+    value = metrics.prometheus_client.REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_request_latency(
+    client: AsyncClient, authenticated_user: tuple[User, str, str], mocker
+):
+    """Test that requests are counted per route template and exposed"""
+    _, access_token, _ = authenticated_user
+    mocker.patch("app.api.v1.endpoints.ecg.analyze_ecg_task")
+    headers = {"Authorization": f"Bearer {access_token}"}
+    get_labels = {"method": "GET", "route": "/api/v1/ecg/{ecg_id}", "status": "200"}
+    requests_before = sample("http_request_duration_seconds_count", **get_labels)
+    samples_before = sample("ecg_lead_samples_sum")
+
+    response = await client.post(
+        "/api/v1/ecg",
+        json={
+            "date": date.today().isoformat(),
+            "leads": [
+                {"name": "I", "signal": [1, -1, 1]},
+                {"name": "II", "signal": [2]},
+            ],
+        },
+        headers=headers,
+    )
+    ecg_id = response.json()["id"]
+    await client.get(f"/api/v1/ecg/{ecg_id}", headers=headers)
+    await client.get(f"/api/v1/ecg/{uuid.uuid4()}", headers=headers)
+
+    assert sample("http_request_duration_seconds_count", **get_labels) == (
+        requests_before + 1
+    )
+    assert sample("ecg_lead_samples_sum") == samples_before + 4
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/api/v1/ecg/{ecg_id}",status="404"' in response.text
+    assert str(ecg_id) not in response.text
+
+
+@pytest.mark.asyncio
+async def test_analysis_metrics(db_session: AsyncSession, test_user: User):
+    """Test that computed and cached lead results are counted and timed"""
+    service = ECGService(db_session)
+    signal = np.random.default_rng().integers(-1000, 1000, 5000).tolist()
+    ecgs = [
+        await service.create(
+            test_user.id,
+            ECGCreate(date=date.today(), leads=[{"name": "I", "signal": signal}]),
+        )
+        for _ in range(2)
+    ]
+    computed = sample("ecg_analyzed_leads_total", source="computed")
+    cached = sample("ecg_analyzed_leads_total", source="cache")
+    timed = sample("ecg_lead_analysis_duration_seconds_count", mode="inline")
+
+    for created in ecgs:
+        ecg = await service.get_by_id(created.id, test_user.id, ECGLoad.FULL)
+        await service.analyze_ecg(ecg)
+
+    assert sample("ecg_analyzed_leads_total", source="computed") == computed + 1
+    assert sample("ecg_analyzed_leads_total", source="cache") == cached + 1
+    assert (
+        sample("ecg_lead_analysis_duration_seconds_count", mode="inline") == timed + 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_engine_times_queries():
+    """Test that engines built from settings time every statement"""
+    engine = create_db_engine(settings.TEST_SQLALCHEMY_DATABASE_URI)
+    before = sample("db_query_duration_seconds_count", statement="SELECT")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+
+    assert sample("db_query_duration_seconds_count", statement="SELECT") > before
@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.notifications import asyncpg_dsn
+from app.db.migration_state import current_revisions, is_at_head, read_heads
+
+
+@pytest.mark.asyncio
+async def test_is_at_head_reads_alembic_version(db_session: AsyncSession):
+    """Test that the check compares the stamped revision with the head"""
+    dsn = asyncpg_dsn(settings.TEST_SQLALCHEMY_DATABASE_URI)
+    await db_session.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    await db_session.commit()
+    assert await current_revisions(dsn) == set()
+
+    (head,) = read_heads()
+    await db_session.execute(
+        text("CREATE TABLE alembic_version (version_num varchar(32) PRIMARY KEY)")
+    )
+    await db_session.execute(text("INSERT INTO alembic_version VALUES ('0000')"))
+    await db_session.commit()
+    try:
+        assert not await is_at_head(dsn)
+        await db_session.execute(
+            text("UPDATE alembic_version SET version_num = :head"), {"head": head}
+        )
+        await db_session.commit()
+        assert await is_at_head(dsn)
+    finally:
+        await db_session.execute(text("DROP TABLE alembic_version"))
+        await db_session.commit()
@@ -0,0 +1,126 @@
+"""Query plan regression tests.
+
+The queries the ECG service sends on its hot paths are captured and
+EXPLAINed with sequential scans, hash joins and merge joins disabled. The
+planner then only falls back to reading a whole table when no index can
+serve the query, so any table scanned without an index condition fails the
+test, however small the seeded tables are.
+"""
+
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Iterator
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.models.lead import LeadName
+from app.models.user import User
+from app.schemas.ecg import ECGCreate
+from app.services.ecg import ECGService
+
+PLANNER_SETTINGS = ("enable_seqscan", "enable_hashjoin", "enable_mergejoin")
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+# Lookups Postgres runs on the referencing table when a row is deleted.
+FOREIGN_KEY_LOOKUPS = [
+    "SELECT 1 FROM ecg WHERE user_id = $1::uuid",
+    "SELECT 1 FROM lead WHERE ecg_id = $1::uuid",
+    "SELECT 1 FROM ecg_analysis WHERE lead_id = $1::uuid",
+    "SELECT 1 FROM lead_pyramid WHERE lead_id = $1::uuid",
+    "SELECT 1 FROM lead_signal_chunk WHERE lead_id = $1::uuid",
+]
+
+
+@contextmanager
+def capture_queries(engine: AsyncEngine) -> Iterator[list[tuple[str, Any]]]:
+    """Record every single-row statement sent through ``engine``."""
+    queries = []
+
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        if not executemany and not statement.lstrip().upper().startswith("INSERT"):
+            queries.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def unindexed_scans(plan: dict) -> Iterator[str]:
+    """Yield the tables a plan reads without an index condition."""
+    node_type = plan["Node Type"]
+    if node_type == "Seq Scan":
+        yield plan["Relation Name"]
+    elif node_type in INDEX_SCANS and "Index Cond" not in plan:
+        yield plan.get("Relation Name", plan.get("Index Name"))
+    for child in plan.get("Plans", []):
+        yield from unindexed_scans(child)
+
+
+async def explain(engine: AsyncEngine, statement: str, parameters: Any = ()) -> dict:
+    async with engine.connect() as conn:
+        for name in PLANNER_SETTINGS:
+            await conn.exec_driver_sql(f"SET LOCAL {name} = off")
+        result = await conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        plan = result.scalar_one()
+        await conn.rollback()
+    return plan[0]["Plan"]
+
+
+async def seed_and_run_hot_paths(db_session: AsyncSession, user: User) -> None:
+    """Seed a few ECGs and exercise every service read path on them."""
+    ecg_service = ECGService(db_session)
+    signal = np.random.default_rng(0).integers(-1000, 1000, 4096).tolist()
+    ecgs = await ecg_service.create_many(
+        user.id,
+        [
+            ECGCreate(date=date(2024, 3, day), leads=[{"name": "I", "signal": signal}])
+            for day in range(1, 6)
+        ],
+    )
+    ecg = await ecg_service.get_by_id(ecgs[0].id, user.id)
+    await ecg_service.analyze_ecg(ecg)
+    await ecg_service.analyze_ecg(await ecg_service.get_by_id(ecgs[1].id, user.id))
+    await ecg_service.list_for_user(
+        user.id, 2, (ecgs[3].date, ecgs[3].id), date(2024, 3, 2), date(2024, 3, 4)
+    )
+    await ecg_service.get_lead_samples(ecg.id, user.id, LeadName.I, 0, 100, 1000)
+    await ecg_service.get_lead_samples(ecg.id, user.id, LeadName.I, 0, None, 10)
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes(
+    db_session: AsyncSession, test_user: User, mocker
+):
+    """Test that no service query on a hot path reads a whole table"""
+    mocker.patch.object(settings, "ECG_PYRAMID_MIN_BUCKETS", 16)
+    engine = db_session.bind
+    with capture_queries(engine) as queries:
+        await seed_and_run_hot_paths(db_session, test_user)
+
+    assert queries
+    failures = {}
+    for statement, parameters in queries:
+        scans = list(unindexed_scans(await explain(engine, statement, parameters)))
+        if scans:
+            failures[statement] = scans
+    assert failures == {}
+
+
+@pytest.mark.parametrize("statement", FOREIGN_KEY_LOOKUPS)
+@pytest.mark.asyncio
+async def test_foreign_keys_are_indexed(db_session: AsyncSession, statement: str):
+    """Test that cascading deletes can find referencing rows through an index"""
+    plan = await explain(
+        db_session.bind, statement, ("00000000-0000-0000-0000-000000000000",)
+    )
+    assert list(unindexed_scans(plan)) == []
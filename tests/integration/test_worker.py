@@ -0,0 +1,198 @@
+import time
+import uuid
+from datetime import date
+
+import pytest
+from celery.contrib.testing.worker import start_worker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.celery.celery_app import celery_app
+from app.celery.runtime import runtime
+from app.celery.worker import analyze_ecg
+from app.core import metrics
+from app.core.config import settings
+from app.models.ecg import AnalysisStatus
+from app.models.user import User
+from app.schemas.ecg import ECGCreate
+from app.services.ecg import ECGService
+
+
+@pytest.fixture
+def worker_runtime(request, mocker):
+    """Run the worker runtime against the test database"""
+    processes = getattr(request, "param", 0)
+    mocker.patch.object(settings, "ANALYSIS_PROCESSES", processes)
+    mocker.patch.object(settings, "ANALYSIS_PARALLEL_MIN_SAMPLES", 1)
+    mocker.patch(
+        "app.celery.runtime.create_db_engine",
+        side_effect=lambda: create_async_engine(
+            str(settings.TEST_SQLALCHEMY_DATABASE_URI)
+        ),
+    )
+    runtime.start()
+    yield runtime
+    runtime.stop()
+
+
+async def _backend_pid() -> int:
+    async with runtime.session_factory() as session:
+        return (await session.execute(text("SELECT pg_backend_pid()"))).scalar_one()
+
+
+def test_runtime_reuses_loop_and_connections(worker_runtime):
+    """Test that consecutive tasks share one loop and one pooled connection"""
+    loop = worker_runtime.loop
+    first_pid = worker_runtime.run(_backend_pid())
+    second_pid = worker_runtime.run(_backend_pid())
+
+    assert worker_runtime.loop is loop
+    assert first_pid == second_pid
+
+    worker_runtime.stop()
+    assert loop.is_closed()
+    assert worker_runtime.engine is None
+
+
+@pytest.mark.parametrize("worker_runtime", [0, 2], indirect=True)
+def test_analyze_ecg_task(worker_runtime):
+    """Test that the Celery task analyses an ECG inline and on the process pool"""
+
+    async def create_ecg():
+        async with runtime.session_factory() as session:
+            user = User(
+                email=f"worker_{str(uuid.uuid4())[:8]}@example.com",
+                hashed_password="-",
+            )
+            session.add(user)
+            await session.commit()
+            ecg = await ECGService(session).create(
+                user.id,
+                ECGCreate(
+                    date=date.today(), leads=[{"name": "I", "signal": [1, -1, 1]}]
+                ),
+            )
+            return user.id, ecg.id
+
+    async def get_results(user_id, ecg_id):
+        async with runtime.session_factory() as session:
+            ecg = await ECGService(session).get_by_id(ecg_id, user_id)
+            return ecg, [lead.analysis.result for lead in ecg.leads]
+
+    user_id, ecg_id = worker_runtime.run(create_ecg())
+    analyze_ecg.apply(args=(str(ecg_id), str(user_id))).get()
+
+    ecg, results = worker_runtime.run(get_results(user_id, ecg_id))
+    assert results == [2]
+    # The task signals record the status transitions on the ECG row.
+    assert ecg.analysis_status == AnalysisStatus.SUCCEEDED
+    assert ecg.analysis_queued_at <= ecg.analysis_started_at <= ecg.analysis_finished_at
+
+
+@pytest.mark.asyncio
+async def test_runtime_runs_inside_running_loop(worker_runtime):
+    """Test that tasks executed eagerly from the API's event loop still run"""
+    first_pid = worker_runtime.run(_backend_pid())
+    second_pid = worker_runtime.run(_backend_pid())
+
+    assert first_pid == second_pid
+    worker_runtime.stop()
+    assert worker_runtime._loop_thread is None
+
+
+@pytest.mark.skipif(not metrics.enabled(), reason="METRICS_ENABLED is off")
+def test_analyze_ecg_task_metrics(worker_runtime):
+    """Test that the task records its queue wait and duration"""
+    registry = metrics.prometheus_client.REGISTRY
+    task = {"task": analyze_ecg.name}
+    succeeded = {**task, "state": "SUCCESS"}
+    waits = registry.get_sample_value("celery_task_queue_wait_seconds_count", task)
+    runs = registry.get_sample_value("celery_task_duration_seconds_count", succeeded)
+
+    async def create_ecg():
+        async with runtime.session_factory() as session:
+            user = User(
+                email=f"worker_{str(uuid.uuid4())[:8]}@example.com",
+                hashed_password="-",
+            )
+            session.add(user)
+            await session.commit()
+            ecg = await ECGService(session).create(
+                user.id,
+                ECGCreate(date=date.today(), leads=[{"name": "I", "signal": [1, -1]}]),
+            )
+            return user.id, ecg.id
+
+    user_id, ecg_id = worker_runtime.run(create_ecg())
+    analyze_ecg.apply(args=(str(ecg_id), str(user_id))).get()
+
+    assert (
+        registry.get_sample_value("celery_task_queue_wait_seconds_count", task)
+        == (waits or 0) + 1
+    )
+    assert (
+        registry.get_sample_value("celery_task_duration_seconds_count", succeeded)
+        == (runs or 0) + 1
+    )
+
+
+def test_analyze_ecg_task_in_prefork_worker(worker_runtime, mocker, tmp_path):
+    """Test that prefork children fan analyses out to their own process pool"""
+    mocker.patch.object(settings, "ANALYSIS_PROCESSES", 2)
+    broker = tmp_path / "broker"
+    broker.mkdir()
+    # The filesystem transport is a broker every child process can reach.
+    conf = {
+        "broker_url": "filesystem://",
+        "broker_transport_options": {
+            "data_folder_in": str(broker),
+            "data_folder_out": str(broker),
+            "control_folder": str(broker),
+        },
+    }
+    saved = {key: celery_app.conf[key] for key in conf}
+    celery_app.conf.update(conf)
+
+    async def create_ecg():
+        async with runtime.session_factory() as session:
+            user = User(
+                email=f"worker_{str(uuid.uuid4())[:8]}@example.com",
+                hashed_password="-",
+            )
+            session.add(user)
+            await session.commit()
+            ecg = await ECGService(session).create(
+                user.id,
+                ECGCreate(
+                    date=date.today(), leads=[{"name": "I", "signal": [1, -1, 1]}]
+                ),
+            )
+            return user.id, ecg.id
+
+    async def get_results(user_id, ecg_id):
+        async with runtime.session_factory() as session:
+            ecg = await ECGService(session).get_by_id(ecg_id, user_id)
+            return ecg.analysis_status, [
+                lead.analysis and lead.analysis.result for lead in ecg.leads
+            ]
+
+    user_id, ecg_id = worker_runtime.run(create_ecg())
+    # Like the worker's main process, the parent of the children owns no runtime.
+    worker_runtime.stop()
+    try:
+        with start_worker(
+            celery_app, pool="prefork", concurrency=1, perform_ping_check=False
+        ):
+            analyze_ecg.delay(str(ecg_id), str(user_id))
+            # Results stay in the children, so the ECG row is polled instead.
+            deadline = time.monotonic() + 60
+            while time.monotonic() < deadline:
+                status, results = worker_runtime.run(get_results(user_id, ecg_id))
+                if status in (AnalysisStatus.SUCCEEDED, AnalysisStatus.FAILED):
+                    break
+                time.sleep(0.2)
+    finally:
+        celery_app.conf.update(saved)
+
+    assert status == AnalysisStatus.SUCCEEDED
+    assert results == [2]
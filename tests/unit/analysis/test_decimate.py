@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from app.analysis.decimate import (
+    bucket_size_for,
+    build_pyramid,
+    interleave,
+    minmax_reduce,
+)
+
+
+@pytest.mark.parametrize(
+    "count,max_points,expected",
+    [
+        (100, 100, 1),
+        (101, 100, 3),
+        (1000, 10, 200),
+        (7, 2, 7),
+    ],
+)
+def test_bucket_size_for(count: int, max_points: int, expected: int):
+    """Test that decimated ranges fit into max_points min/max values"""
+    bucket_size = bucket_size_for(count, max_points)
+    assert bucket_size == expected
+    if bucket_size > 1:
+        assert 2 * -(-count // bucket_size) <= max_points
+
+
+def test_minmax_reduce_keeps_extremes():
+    """Test that every bucket keeps its extremes, including a partial last one"""
+    samples = np.array([3, -1, 4, 1, -5, 9, 2, -6, 5], dtype=np.int16)
+
+    mins, maxs = minmax_reduce(samples, samples, 4)
+
+    assert mins.tolist() == [-1, -6, 5]
+    assert maxs.tolist() == [4, 9, 5]
+    assert interleave(mins, maxs).tolist() == [-1, 4, -6, 9, 5, 5]
+
+
+def test_minmax_reduce_envelopes():
+    """Test that reducing envelopes equals reducing the raw samples once"""
+    samples = np.random.default_rng(0).integers(-1000, 1000, 1001)
+    mins, maxs = minmax_reduce(samples, samples, 4)
+
+    coarse = minmax_reduce(mins, maxs, 8)
+    direct = minmax_reduce(samples, samples, 32)
+
+    assert coarse[0].tolist() == direct[0].tolist()
+    assert coarse[1].tolist() == direct[1].tolist()
+
+
+def test_build_pyramid():
+    """Test that every level matches reducing the raw samples directly"""
+    samples = np.random.default_rng(1).integers(-1000, 1000, 5000)
+
+    levels = build_pyramid(samples, 4, 64)
+
+    assert [factor for factor, _, _ in levels] == [4, 16, 64, 256]
+    assert levels[-1][1].size == 20
+    for factor, mins, maxs in levels:
+        direct = minmax_reduce(samples, samples, factor)
+        assert mins.tolist() == direct[0].tolist()
+        assert maxs.tolist() == direct[1].tolist()
+
+
+def test_build_pyramid_short_signal():
+    """Test that signals already below min_buckets get no levels"""
+    assert build_pyramid(np.arange(10), 4, 64) == []
@@ -0,0 +1,41 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.analysis.parallel import count_zero_crossings_parallel, plan_segments
+from app.analysis.zero_crossings import count_zero_crossings
+
+
+def test_plan_segments_overlap_by_one_sample():
+    """Test that segments cover every adjacent pair of a lead exactly once"""
+    assert list(plan_segments([7, 0, 1, 3], segment_samples=3)) == [
+        (0, 0, 4),
+        (0, 3, 7),
+        (3, 8, 11),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_count_zero_crossings_parallel_matches_kernel():
+    """Test that segmented process-pool counts equal the in-process kernel"""
+    rng = np.random.default_rng(1)
+    signals = [
+        rng.integers(-50, 50, size=length).astype(dtype)
+        for length, dtype in [
+            (10_000, np.int16),
+            (0, np.int16),
+            (1, np.int32),
+            (9_999, np.int32),
+        ]
+    ]
+
+    with ProcessPoolExecutor(
+        2, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        result = await count_zero_crossings_parallel(
+            signals, executor, segment_samples=1_000
+        )
+
+    assert result.tolist() == count_zero_crossings(signals).tolist()
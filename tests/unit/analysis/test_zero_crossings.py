@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.analysis.zero_crossings import count_zero_crossings
+
+
+def reference_zero_crossings(signal: list[int]) -> int:
+    """Element-by-element rule the vectorized kernel must reproduce"""
+    crossings = 0
+    for value, next_value in zip(signal[:-1], signal[1:]):
+        if (value >= 0 and next_value < 0) or (value < 0 and next_value >= 0):
+            crossings += 1
+    return crossings
+
+
+@pytest.mark.parametrize(
+    "signals",
+    [
+        [[1, -1, 0, -5, 3], [0, 0, 0, 0, 0], [-1, -2, -3, -4, -5]],
+        [[1, -1, 0], [], [7], [-3, 4, -5, 6, 0, -1], []],
+        [[], []],
+        [[5]],
+    ],
+)
+def test_count_zero_crossings_matches_reference(signals: list[list[int]]):
+    """Test equal-length and ragged leads against the element-wise rule"""
+    result = count_zero_crossings(signals)
+    assert result.tolist() == [reference_zero_crossings(signal) for signal in signals]
+
+
+def test_count_zero_crossings_random_leads():
+    """Test randomized int16 leads of mixed lengths"""
+    rng = np.random.default_rng(0)
+    for lengths in ([1000] * 12, [1000, 999, 1, 0, 2500]):
+        signals = [
+            rng.integers(-(2**15), 2**15, size=length, dtype=np.int16)
+            for length in lengths
+        ]
+        result = count_zero_crossings(signals)
+        assert result.tolist() == [
+            reference_zero_crossings(signal.tolist()) for signal in signals
+        ]
+
+
+def test_count_zero_crossings_without_leads():
+    """Test that an ECG without leads yields no counts"""
+    assert count_zero_crossings([]).tolist() == []
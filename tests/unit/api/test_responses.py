@@ -0,0 +1,69 @@
+import json
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.api import responses
+from app.db.types import pack_signal, unpack_signal
+from app.models.analysis import ECGAnalysis
+from app.models.ecg import ECG
+from app.models.lead import Lead, LeadName
+from app.schemas.ecg import CeleryTaskStatus, ECGTaskOut
+
+
+def make_ecg() -> ECG:
+    leads = [
+        Lead(
+            id=uuid4(),
+            name=LeadName.I,
+            signal=unpack_signal(pack_signal([1, -2, 3, 40000])),
+            sample_number=4,
+            analysis=ECGAnalysis(id=uuid4(), result=2),
+        ),
+        Lead(
+            id=uuid4(),
+            name=LeadName.V6,
+            signal=unpack_signal(pack_signal([])),
+            sample_number=None,
+            analysis=None,
+        ),
+    ]
+    return ECG(id=uuid4(), date=date(2024, 3, 1), leads=leads)
+
+
+def test_ecg_task_content_matches_response_model():
+    """Test that the fast path renders the same document as ECGTaskOut"""
+    ecg = make_ecg()
+    task = CeleryTaskStatus(
+        task_id=uuid4(),
+        status="SUCCESS",
+        queued_at=datetime(2024, 3, 1, 12, tzinfo=timezone.utc),
+    )
+
+    rendered = responses.SignalJSONResponse(responses.ecg_task_content(ecg, task))
+
+    expected = ECGTaskOut(ecg=ecg, task=task).model_dump_json()
+    assert json.loads(rendered.body) == json.loads(expected)
+
+
+@pytest.mark.parametrize(
+    "accept,expected",
+    [
+        (None, "application/json"),
+        ("*/*", "application/json"),
+        ("text/html", "application/json"),
+        ("application/vnd.ecg-frames", "application/vnd.ecg-frames"),
+        (
+            "application/json;q=0.5, application/vnd.ecg-frames",
+            "application/vnd.ecg-frames",
+        ),
+        ("application/vnd.ecg-frames;q=0.1, application/*", "application/json"),
+        ("application/vnd.ecg-frames, */*;q=0.1", "application/vnd.ecg-frames"),
+    ],
+)
+def test_preferred_media_type(accept, expected):
+    """Test that Accept picks the format and JSON stays the default"""
+    offers = ["application/json", "application/vnd.ecg-frames"]
+    assert responses.preferred_media_type(accept, offers) == expected
@@ -0,0 +1,37 @@
+from app.core.cache import LRUCache, TTLCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that reading an entry protects it from the next eviction"""
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_disabled():
+    """Test that a zero-sized cache never stores anything"""
+    cache = LRUCache(0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_expires_entries():
+    """Test that entries disappear once their time to live has passed"""
+    now = [0.0]
+    cache = TTLCache(10, ttl=5, timer=lambda: now[0])
+    cache.set("a", 1)
+
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,95 @@
+import gzip
+
+import pytest
+import zstandard
+from starlette.exceptions import HTTPException
+
+from app.core.compression import (
+    ZSTD_MAX_RATIO,
+    ZSTD_MIN_SLICE,
+    BodyDecompressor,
+    compress,
+    preferred_encoding,
+)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("br, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("*", "gzip"),
+    ],
+)
+def test_preferred_encoding(mocker, accept_encoding, expected):
+    """Test that Accept-Encoding picks a supported coding by quality"""
+    mocker.patch("app.core.compression.supported_encodings", return_value=["gzip"])
+    assert preferred_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+def test_body_decompressor_streams_chunks(encoding):
+    """Test that a body split anywhere decompresses to the original"""
+    body = bytes(range(256)) * 100
+    compressed = compress(body, encoding)
+    decompressor = BodyDecompressor(encoding, max_size=len(body))
+
+    parts = [compressed[i : i + 7] for i in range(0, len(compressed), 7)]
+    output = b"".join(
+        decompressor.decompress(part, final=i == len(parts) - 1)
+        for i, part in enumerate(parts)
+    )
+
+    assert output == body
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+def test_body_decompressor_joins_members(encoding):
+    """Test that every gzip member or zstd frame of a body is decompressed"""
+    compressed = compress(b"first ", encoding) + compress(b"second", encoding)
+    decompressor = BodyDecompressor(encoding, max_size=100)
+
+    output = b"".join(
+        decompressor.decompress(compressed[i : i + 5], final=i + 5 >= len(compressed))
+        for i in range(0, len(compressed), 5)
+    )
+
+    assert output == b"first second"
+
+
+@pytest.mark.parametrize(
+    "encoding,body,status_code",
+    [
+        ("gzip", gzip.compress(bytes(10_001)), 413),
+        ("gzip", gzip.compress(bytes(100))[:-4], 400),
+        ("gzip", gzip.compress(bytes(100)) + b"trailing", 400),
+        ("gzip", gzip.compress(bytes(100)) + b"\x1f", 400),
+        ("gzip", b"not gzip", 400),
+        ("zstd", zstandard.ZstdCompressor().compress(bytes(10_001)), 413),
+        ("zstd", zstandard.ZstdCompressor().compress(bytes(100))[:-2], 400),
+        ("zstd", zstandard.ZstdCompressor().compress(bytes(100)) + b"trailing", 400),
+        ("zstd", b"not zstd", 400),
+    ],
+)
+def test_body_decompressor_rejects(encoding: str, body: bytes, status_code: int):
+    """Test that oversized, truncated and corrupt bodies are rejected"""
+    decompressor = BodyDecompressor(encoding, max_size=10_000)
+    with pytest.raises(HTTPException) as exc_info:
+        decompressor.decompress(body, final=True)
+    assert exc_info.value.status_code == status_code
+
+
+def test_zstd_decompressor_bounds_output():
+    """Test that a zstd bomb is rejected without inflating it whole"""
+    compressor = zstandard.ZstdCompressor().compressobj()
+    bomb = compressor.compress(bytes(64 << 20)) + compressor.flush()
+    decompressor = BodyDecompressor("zstd", max_size=1 << 20)
+
+    with pytest.raises(HTTPException) as exc_info:
+        decompressor.decompress(bomb, final=True)
+
+    assert exc_info.value.status_code == 413
+    assert decompressor.size <= (1 << 20) + ZSTD_MIN_SLICE * ZSTD_MAX_RATIO
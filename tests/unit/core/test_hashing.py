@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core import metrics
+from app.core.hashing import PasswordHasher
+
+
+def sample(name: str) -> float:
+    return metrics.prometheus_client.REGISTRY.get_sample_value(name) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_round_trip():
+    """Test that hashes computed on the pool verify against their password"""
+    hasher = PasswordHasher(1)
+    try:
+        hashed = await hasher.hash("StrongPass123!")
+        assert await hasher.verify("StrongPass123!", hashed)
+        assert not await hasher.verify("WrongPass123!", hashed)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_caps_concurrency():
+    """Test that calls beyond the worker count wait for a thread"""
+    hasher = PasswordHasher(2)
+    release = threading.Event()
+    lock = threading.Lock()
+    running = peak = 0
+
+    def work() -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        release.wait(5)
+        with lock:
+            running -= 1
+
+    try:
+        calls = asyncio.gather(*(hasher.run(work) for _ in range(5)))
+        while peak < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        assert running == 2
+        release.set()
+        await calls
+    finally:
+        hasher.shutdown()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not metrics.enabled(), reason="METRICS_ENABLED is off")
+async def test_password_hasher_records_queue_wait_and_abandonment():
+    """Test that queue waits are observed and calls cancelled while queued counted"""
+    waits = sample("password_hash_queue_wait_seconds_count")
+    abandoned = sample("password_hashes_abandoned_total")
+    hasher = PasswordHasher(1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def work() -> None:
+        started.set()
+        release.wait(5)
+
+    try:
+        running = asyncio.ensure_future(hasher.run(work))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(hasher.run(work))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await running
+    finally:
+        hasher.shutdown()
+
+    assert sample("password_hash_queue_wait_seconds_count") == waits + 1
+    assert sample("password_hashes_abandoned_total") == abandoned + 1
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_inline_without_workers():
+    """Test that zero workers hashes on the calling thread"""
+    hasher = PasswordHasher(0)
+    assert await hasher.run(threading.get_ident) == threading.get_ident()
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from app.core import metrics
+
+
+@pytest.mark.parametrize(
+    "statement,expected",
+    [
+        ("SELECT 1", "SELECT"),
+        ("  insert into lead values ($1)", "INSERT"),
+        ("UPDATE ecg SET analysis_status = $1", "UPDATE"),
+        ("WITH x AS (SELECT 1) SELECT * FROM x", "OTHER"),
+        ("LISTEN ecg_analysis", "OTHER"),
+    ],
+)
+def test_statement_type(statement, expected):
+    """Test that statements are labelled by a bounded set of verbs"""
+    assert metrics.statement_type(statement) == expected
+
+
+def test_metrics_are_noops_when_disabled(mocker):
+    """Test that instrumented code runs unchanged when metrics are disabled"""
+    mocker.patch.object(metrics.settings, "METRICS_ENABLED", False)
+
+    assert not metrics.enabled()
+    histogram = metrics._histogram("unused_seconds", "Unused.", ["a"], [1.0])
+    histogram.labels("x").observe(0.5)
+    metrics._counter("unused", "Unused.", []).inc()
+
+
+def test_prepare_multiprocess_dir(tmp_path, monkeypatch):
+    """Test that files left by earlier worker processes are removed"""
+    directory = tmp_path
+    monkeypatch.setenv(metrics.MULTIPROC_DIR_ENV, str(directory))
+    own = f"histogram_{os.getpid()}.db"
+    (directory / "histogram_123.db").write_bytes(b"stale")
+    (directory / own).write_bytes(b"current")
+    (directory / "README").write_text("kept")
+    metrics.prepare_multiprocess_dir()
+
+    assert sorted(path.name for path in directory.iterdir()) == ["README", own]
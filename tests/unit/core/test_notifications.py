@@ -0,0 +1,85 @@
+import asyncpg
+import pytest
+
+from app.core.config import settings
+from app.core.notifications import NotificationHub, asyncpg_dsn, listen_dsn
+
+
+@pytest.fixture
+def hub(mocker) -> NotificationHub:
+    hub = NotificationHub("postgresql://", "events", key="ecg_id")
+    mocker.patch.object(hub, "start")
+    return hub
+
+
+@pytest.mark.asyncio
+async def test_publish_routes_events_by_key(hub: NotificationHub):
+    """Test that events only reach the subscribers of their key"""
+    first = await hub.subscribe(["a", "b"])
+    second = await hub.subscribe(["b"])
+
+    hub.publish({"ecg_id": "a", "status": "STARTED"})
+    hub.publish({"ecg_id": "c", "status": "STARTED"})
+
+    assert await first.get() == {"ecg_id": "a", "status": "STARTED"}
+    assert first.empty()
+    assert second.empty()
+
+    second.close()
+    first.close()
+    assert hub._subscriptions == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_keeps_latest_event_per_key(hub: NotificationHub):
+    """Test that a slow subscriber skips intermediate events but keeps the last"""
+    keys = [str(i) for i in range(100)]
+    subscription = await hub.subscribe(keys)
+    for status in ("PENDING", "STARTED", "SUCCESS"):
+        for key in keys:
+            hub.publish({"ecg_id": key, "status": status})
+
+    events = [await subscription.get() for _ in keys]
+    assert events == [{"ecg_id": key, "status": "SUCCESS"} for key in keys]
+    assert subscription.empty()
+
+
+@pytest.mark.asyncio
+async def test_listen_in_background_retries_until_connected(hub, mocker):
+    """Test that failed connections are retried before reconnect callbacks run"""
+    mocker.patch.object(settings, "NOTIFICATIONS_RECONNECT_SECONDS", 0)
+    hub.start.side_effect = [OSError("refused"), asyncpg.InterfaceError("closed"), None]
+    reconnected = mocker.Mock()
+    hub.add_reconnect_callback(reconnected)
+
+    hub.listen_in_background()
+    await hub._reconnecting
+
+    assert hub.start.call_count == 3
+    reconnected.assert_called_once_with()
+    assert hub._reconnecting is None
+
+
+def test_asyncpg_dsn():
+    """Test that SQLAlchemy URLs are turned into asyncpg DSNs"""
+    assert (
+        asyncpg_dsn("postgresql+asyncpg://u:p@db:5432/app")
+        == "postgresql://u:p@db:5432/app"
+    )
+
+
+def test_listen_dsn_bypasses_pgbouncer(mocker):
+    """Test that LISTEN uses DB_LISTEN_URI, and nothing behind PgBouncer without it"""
+    mocker.patch.object(
+        settings, "SQLALCHEMY_DATABASE_URI", "postgresql+asyncpg://u:p@bouncer/app"
+    )
+    mocker.patch.object(settings, "DB_LISTEN_URI", None)
+    mocker.patch.object(settings, "DB_PGBOUNCER", False)
+    assert listen_dsn() == "postgresql://u:p@bouncer/app"
+
+    mocker.patch.object(settings, "DB_PGBOUNCER", True)
+    assert listen_dsn() is None
+    assert not NotificationHub(listen_dsn(), "events", "ecg_id").available
+
+    mocker.patch.object(settings, "DB_LISTEN_URI", "postgresql://u:p@db/app")
+    assert listen_dsn() == "postgresql://u:p@db/app"
@@ -0,0 +1,25 @@
+from datetime import date
+from uuid import uuid4
+
+import pytest
+
+from app.core.pagination import (
+    InvalidCursorError,
+    decode_date_id_cursor,
+    encode_date_id_cursor,
+)
+
+
+def test_date_id_cursor_round_trip():
+    """Test that a cursor decodes back to the key it was built from"""
+    key = (date(2024, 2, 29), uuid4())
+    assert decode_date_id_cursor(encode_date_id_cursor(*key)) == key
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "abc", encode_date_id_cursor(date.today(), uuid4())[:-3]]
+)
+def test_date_id_cursor_invalid(cursor: str):
+    """Test that malformed cursors are rejected"""
+    with pytest.raises(InvalidCursorError):
+        decode_date_id_cursor(cursor)
@@ -0,0 +1,20 @@
+from app.core.rate_limit import TokenBucket
+
+
+def test_token_bucket_refills_at_rate():
+    """Test that a drained bucket admits again once a token has refilled"""
+    now = [0.0]
+    bucket = TokenBucket(rate=2, burst=3, timer=lambda: now[0])
+
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.retry_after() == 0.5
+
+    now[0] = 0.5
+    assert bucket.acquire()
+    assert not bucket.acquire()
+
+
+def test_token_bucket_disabled():
+    """Test that a non-positive rate admits everything"""
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.acquire() for _ in range(100))
@@ -0,0 +1,120 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.core.signal_stream import (
+    FRAMES_MAGIC,
+    FrameDecoder,
+    NDJSONDecoder,
+    SignalStreamError,
+    decode_frames,
+    encode_frame,
+    encode_frames,
+)
+from app.models.lead import LeadName
+
+
+def decode_all(decoder, parts: list[bytes]) -> list[tuple]:
+    chunks = [chunk for part in parts for chunk in decoder.feed(part)]
+    chunks.extend(decoder.close())
+    return [
+        (chunk.name, chunk.sample_number, chunk.itemsize, chunk.samples.tolist())
+        for chunk in chunks
+    ]
+
+
+def test_ndjson_decoder_split_lines():
+    """Test that NDJSON lines split across reads are decoded once complete"""
+    body = (
+        json.dumps({"name": "I", "signal": [1, -2], "sample_number": 250})
+        + "\n"
+        + json.dumps({"name": "aVR", "signal": [3], "dtype": "int16"})
+    ).encode()
+    parts = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    assert decode_all(NDJSONDecoder(max_line_bytes=1024), parts) == [
+        ("I", 250, 4, [1, -2]),
+        ("aVR", None, 2, [3]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "body,error",
+    [
+        (b'{"name": "I", "signal": [40000], "dtype": "int16"}\n', "int16"),
+        (b'{"name": "X", "signal": [1]}\n', "Invalid NDJSON chunk"),
+        (b'{"name": "I", "signal": [1, 2, 3, 4, 5, 6, 7, 8, 9]', "must not exceed"),
+    ],
+)
+def test_ndjson_decoder_errors(body: bytes, error: str):
+    """Test that malformed or oversized NDJSON chunks are rejected"""
+    with pytest.raises(SignalStreamError) as exc_info:
+        decode_all(NDJSONDecoder(max_line_bytes=32), [body])
+    assert error in str(exc_info.value)
+
+
+def test_frame_decoder_partial_reads():
+    """Test that frame samples are yielded as soon as they arrive"""
+    body = (
+        FRAMES_MAGIC
+        + encode_frame(LeadName.I, np.array([1, -2, 3], dtype=np.int16), 500)
+        + encode_frame(LeadName.AVL, np.array([70000, -70000], dtype=np.int32))
+    )
+    parts = [body[i : i + 5] for i in range(0, len(body), 5)]
+
+    chunks = decode_all(FrameDecoder(), parts)
+    merged: dict[str, list[int]] = {}
+    for name, _, _, samples in chunks:
+        merged.setdefault(name, []).extend(samples)
+
+    assert len(chunks) > 2
+    assert {chunk[:3] for chunk in chunks} == {("I", 500, 2), ("aVL", None, 4)}
+    assert merged == {"I": [1, -2, 3], "aVL": [70000, -70000]}
+
+
+@pytest.mark.parametrize(
+    "body,error",
+    [
+        (b"NOPE", "Missing ECGF stream header"),
+        (
+            FRAMES_MAGIC + encode_frame(LeadName.I, np.arange(4, dtype=np.int16))[:-1],
+            "middle of a frame",
+        ),
+        (FRAMES_MAGIC + b"XX\0\0" + bytes(12), "Unknown lead name"),
+    ],
+)
+def test_frame_decoder_errors(body: bytes, error: str):
+    """Test that malformed binary streams are rejected"""
+    with pytest.raises(SignalStreamError) as exc_info:
+        decode_all(FrameDecoder(), [body])
+    assert error in str(exc_info.value)
+
+
+def test_decode_frames_merges_leads():
+    """Test that a complete frame stream decodes to one chunk per lead"""
+    body = encode_frames(
+        [
+            (LeadName.I, np.array([1, -2], dtype=np.int16), 500),
+            (LeadName.V6, np.array([70000], dtype=np.int32), None),
+        ]
+    ) + encode_frame(LeadName.I, np.array([3], dtype=np.int16))
+
+    chunks = decode_frames(body)
+
+    assert [
+        (chunk.name, chunk.sample_number, chunk.itemsize, chunk.samples.tolist())
+        for chunk in chunks
+    ] == [("I", 500, 2, [1, -2, 3]), ("V6", None, 4, [70000])]
+
+
+def test_decode_frames_rejects_sample_type_change():
+    """Test that a lead cannot switch between int16 and int32 frames"""
+    body = encode_frames(
+        [
+            (LeadName.I, np.array([1], dtype=np.int16), None),
+            (LeadName.I, np.array([70000], dtype=np.int32), None),
+        ]
+    )
+    with pytest.raises(SignalStreamError, match="changed its sample type"):
+        decode_frames(body)
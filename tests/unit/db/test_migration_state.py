@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from app.db.migration_state import VERSIONS_DIR, read_heads
+
+
+def write_migration(path: Path, revision: str, down_revision) -> None:
+    path.joinpath(f"{revision}_migration.py").write_text(
+        f"revision: str = {revision!r}\n"
+        f"down_revision: str | None = {down_revision!r}\n"
+        "branch_labels = None\n"
+    )
+
+
+def test_read_heads_follows_branches_and_merges(tmp_path: Path):
+    """Test that heads are the revisions nothing else revises"""
+    write_migration(tmp_path, "a", None)
+    write_migration(tmp_path, "b", "a")
+    write_migration(tmp_path, "c", "a")
+    assert read_heads(tmp_path) == {"b", "c"}
+
+    write_migration(tmp_path, "d", ("b", "c"))
+    assert read_heads(tmp_path) == {"d"}
+
+
+def test_repository_has_single_head():
+    """Test that the repository migrations form a single line"""
+    assert len(read_heads(VERSIONS_DIR)) == 1
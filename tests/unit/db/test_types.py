@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from app.db.types import pack_signal, unpack_signal
+
+
+@pytest.mark.parametrize(
+    "signal,itemsize",
+    [
+        ([1, -2, 3, 32767, -32768], 2),
+        ([1, -2, 32768], 4),
+        ([-(2**31), 2**31 - 1], 4),
+        ([], 2),
+    ],
+)
+def test_pack_signal_roundtrip(signal: list[int], itemsize: int):
+    """Test that signals are packed with the narrowest item size and decode unchanged"""
+    packed = pack_signal(signal)
+    assert packed[0] == itemsize
+    assert len(packed) == 1 + len(signal) * itemsize
+
+    decoded = unpack_signal(packed)
+    assert isinstance(decoded, np.ndarray)
+    assert decoded.tolist() == signal
+
+
+def test_pack_signal_out_of_range():
+    """Test that samples wider than 32 bits are rejected"""
+    with pytest.raises(ValueError):
+        pack_signal([2**31])
@@ -4,7 +4,7 @@ import pytest
 from pydantic import ValidationError
 
 from app.schemas.ecg import ECGCreate
-from app.schemas.lead import LeadBase
+from app.schemas.lead import LeadBase, LeadCreate
 
 
 def test_valid_ecg_data():
@@ -77,4 +77,14 @@ def test_lead_data_validation():
     # Test invalid sampling rate
     with pytest.raises(ValidationError) as exc_info:
         LeadBase(name="I", signal=[1, 2, 3], sample_number=-1)
-    assert "Input should be greater than 0" in str(exc_info.value) 
\ No newline at end of file
+    assert "Input should be greater than 0" in str(exc_info.value) 
+
+def test_lead_samples_fit_int32():
+    """Test that samples outside the int32 range are rejected"""
+    lead = LeadCreate(name="I", signal=[-(2**31), 2**31 - 1])
+    assert lead.signal == [-(2**31), 2**31 - 1]
+
+    for sample in (2**31, -(2**31) - 1):
+        with pytest.raises(ValidationError) as exc_info:
+            LeadCreate(name="I", signal=[0, sample])
+        assert exc_info.value.errors()[0]["loc"] == ("signal", 1)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.analysis.zero_crossings import count_zero_crossings
+from app.models.lead import LeadName
+from benchmarks.suite import compare, summarize
+from benchmarks.synthetic import Recording, generate_leads, parse_duration
+
+
+def test_parse_duration():
+    """Test that recording lengths are parsed into seconds"""
+    assert parse_duration("10s") == 10
+    assert parse_duration("5m") == 300
+    assert parse_duration("24h") == 86400
+    with pytest.raises(ValueError):
+        parse_duration("10")
+
+
+def test_generate_leads_is_deterministic():
+    """Test that synthetic recordings are 12 int16 leads reproducible by seed"""
+    recording = Recording(250, "10s")
+    leads = generate_leads(recording, seed=1, chunk_samples=700)
+    assert list(leads) == list(LeadName)
+    assert all(signal.dtype == np.int16 for signal in leads.values())
+    assert all(signal.size == 2500 for signal in leads.values())
+    again = generate_leads(recording, seed=1, chunk_samples=700)
+    assert all(np.array_equal(leads[name], again[name]) for name in leads)
+    other = generate_leads(recording, seed=2)
+    assert not np.array_equal(leads[LeadName.II], other[LeadName.II])
+
+
+def test_generate_leads_look_like_ecg():
+    """Test that R peaks dominate lead II and every lead crosses zero"""
+    leads = generate_leads(Recording(500, "10s"))
+    assert leads[LeadName.II].max() > 800
+    assert leads[LeadName.AVR].min() < -600
+    assert (count_zero_crossings(list(leads.values())) > 0).all()
+
+
+def test_compare_reports_regressions_over_threshold():
+    """Test that only cases slower than the baseline by the threshold regress"""
+    recording = Recording(250, "10s")
+    baseline = {
+        "results": [
+            summarize("create", recording, [1.0]),
+            summarize("analyze", recording, [1.0]),
+        ]
+    }
+    results = [
+        summarize("create", recording, [1.2]),
+        summarize("analyze", recording, [1.5, 1.3, 2.0]),
+        summarize("kernel", recording, [0.1]),
+    ]
+    regressions = compare(results, baseline, threshold=0.25)
+    assert [result["case"] for result in regressions] == ["analyze"]
+    assert results[0]["change"] == pytest.approx(0.2)
+    assert results[1]["change"] == pytest.approx(0.5)
+    assert "change" not in results[2]
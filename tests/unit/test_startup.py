@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from app.main import DEFERRED_IMPORTS
+from benchmarks.bench_startup import IMPORT_BUDGET_SECONDS, ROOT, measure
+
+
+def test_api_import_time_within_budget():
+    """Test that importing the API stays within the startup budget"""
+    result = measure("app.main", runs=3)
+    assert result["seconds"] <= IMPORT_BUDGET_SECONDS, result["top"][:10]
+
+
+def test_api_import_defers_heavy_modules():
+    """Test that Celery, jose and passlib are not imported with the API"""
+    code = (
+        "import sys, app.main; "
+        f"print(' '.join(m for m in {DEFERRED_IMPORTS!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""